@@ -1,15 +1,36 @@
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel
 from datetime import datetime, timedelta
 import httpx
 import logging
 import os # Keep os for potential future environment variables, though not strictly needed now
+import sys
+import time
+
+# Share the services package at the repository root with the backend
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from services.brs_calculator import BRSCalculator
+from services.discovery_feed import DiscoveryFeed
+from services.http_compression import CompressionMiddleware
+from services.candidate_filter import CandidateFilter
+from services.negative_cache import negative_cache
+from services.pair_record import PairRecord, raw_archive
+from services.log_config import configure_logging, token_logger
+from services.rate_limiter import dexscreener_limiter
+from services.response_cache import cache_from_env
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
+token_log = token_logger(__name__)
+
+# Warm serverless containers can answer repeat lookups from /tmp (DEXSCREENER_CACHE_PATH)
+dexscreener_limiter.cache = cache_from_env()
+dexscreener_limiter.hedge_budget = float(os.getenv("DEXSCREENER_HEDGE_BUDGET", 0.05))
+raw_archive.open(os.getenv("PAIR_ARCHIVE_DIR"))
 
 # Create FastAPI app
 app = FastAPI(
@@ -27,6 +48,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large bodies such as the analysis payload
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+# Scoring profile shared with the backend (see services/brs_profiles.py)
+BRS_PROFILE = os.getenv("BRS_PROFILE", "weighted")
+
 # Pydantic models (as they were in the working version)
 class TokenResponse(BaseModel):
     address: str
@@ -56,178 +83,97 @@ class TokenResponse(BaseModel):
     first_seen_date: Optional[str]
     token_age_days: Optional[int]
 
-# BRS Calculator - using the version that was working well
-class BRSCalculator:
-    def calculate_brs(self, token_data):
-        try:
-            holder_resilience = self._calculate_holder_resilience(token_data)
-            volume_floor = self._calculate_volume_floor(token_data)
-            price_recovery = self._calculate_price_recovery(token_data)
-            distribution_health = self._calculate_distribution_health(token_data)
-            revival_momentum = self._calculate_revival_momentum(token_data)
-            smart_accumulation = self._calculate_smart_accumulation(token_data)
-
-            brs_score = (
-                holder_resilience * 0.23 +
-                volume_floor * 0.24 +
-                price_recovery * 0.22 +
-                distribution_health * 0.11 +
-                revival_momentum * 0.13 +
-                smart_accumulation * 0.15
-            )
-            
-            return {
-                "brs_score": round(min(95, max(20, brs_score)), 1),
-                "holder_resilience_score": round(holder_resilience, 1),
-                "volume_floor_score": round(volume_floor, 1),
-                "price_recovery_score": round(price_recovery, 1),
-                "distribution_health_score": round(distribution_health, 1),
-                "revival_momentum_score": round(revival_momentum, 1),
-                "smart_accumulation_score": round(smart_accumulation, 1)
-            }
-        except Exception as e:
-            logger.error(f"Error calculating BRS for {token_data.get('symbol')}: {e}")
-            return {
-                "brs_score": 30.0, # Default to a low score on error
-                "holder_resilience_score": 0,
-                "volume_floor_score": 0,
-                "price_recovery_score": 0,
-                "distribution_health_score": 0,
-                "revival_momentum_score": 0,
-                "smart_accumulation_score": 0
-            }
-
-    def _safe_get(self, data, key, default=0):
-        return data.get(key, default) if data.get(key) is not None else default
-
-    def _calculate_holder_resilience(self, data):
-        liquidity = self._safe_get(data, "liquidity_usd")
-        volume_24h = self._safe_get(data, "volume_24h")
-        if liquidity > 0 and volume_24h > 0:
-            ratio = volume_24h / liquidity
-            return max(20, min(80, ratio * 50)) 
-        return 30
-
-    def _calculate_volume_floor(self, data):
-        volume_24h = self._safe_get(data, "volume_24h")
-        market_cap = self._safe_get(data, "market_cap")
-        if market_cap > 0:
-            volume_ratio = (volume_24h / market_cap) * 100
-            return max(20, min(90, 30 + (volume_ratio * 3)))
-        elif volume_24h > 50000:
-            return 65
-        return 25
-
-    def _calculate_price_recovery(self, data):
-        price_change_24h = self._safe_get(data, "price_change_24h")
-        base_score = 40
-        if price_change_24h > 0:
-            base_score += min(40, price_change_24h * 2)
-        elif price_change_24h < -10:
-            base_score -= abs(price_change_24h)
-        return max(15, min(85, base_score))
-
-    def _calculate_distribution_health(self, data):
-        liquidity = self._safe_get(data, "liquidity_usd")
-        if liquidity > 100000: return 75
-        if liquidity > 50000: return 60
-        if liquidity > 10000: return 45
-        return 30
-
-    def _calculate_revival_momentum(self, data):
-        volume_24h = self._safe_get(data, "volume_24h")
-        price_change_24h = self._safe_get(data, "price_change_24h")
-        score = 40
-        if volume_24h > 100000: score += 20
-        if price_change_24h > 5: score += 25
-        elif price_change_24h > 0: score += 10
-        return max(20, min(85, score))
+# Dexscreener interaction and token processing
+# The cursor and processed tokens live as long as the warm container: each call fetches
+# the tokens that are new or changed in the discovery feeds, plus tracked tokens whose
+# data is older than LIVE_REFRESH_SECONDS. Tokens not refreshed for LIVE_TOKEN_TTL are
+# dropped, and at most LIVE_TOKENS_MAX are kept
+LIVE_REFRESH_SECONDS = float(os.getenv("LIVE_REFRESH_SECONDS", 60))
+LIVE_TOKEN_TTL = float(os.getenv("LIVE_TOKEN_TTL", 900))
+LIVE_TOKENS_MAX = int(os.getenv("LIVE_TOKENS_MAX", 500))
+live_feed = DiscoveryFeed()
+live_tokens: Dict[str, Dict] = {}
+live_refreshed: Dict[str, float] = {}  # address -> time of its last successful refresh
 
-    def _calculate_smart_accumulation(self, data):
-        liquidity = self._safe_get(data, "liquidity_usd")
-        volume_24h = self._safe_get(data, "volume_24h")
-        score = 35
-        if liquidity > 50000: score += 15
-        if volume_24h > 50000: score += 20
-        return max(25, min(80, score))
+def prune_live_tokens(now: float):
+    # Least recently refreshed first: expired tokens, then any beyond the cap
+    by_age = sorted(live_refreshed, key=live_refreshed.get)
+    expired = [a for a in by_age if now - live_refreshed[a] > LIVE_TOKEN_TTL]
+    expired = by_age[:max(len(expired), len(by_age) - LIVE_TOKENS_MAX)]
+    for address in expired:
+        live_tokens.pop(address, None)
+        live_refreshed.pop(address, None)
 
-# Dexscreener interaction and token processing
 async def fetch_live_tokens():
-    tokens = []
-    search_terms = [
-        "SOL", "BONK", "WIF", "BOME", "MEW", "POPCAT", "MYRO", "WEN", "SAMO", 
-        "FOXY", "COPE", "SLERF", "HARAMBE", "GIGA", "PONKE", "SMOLE", "ANALOS",
-        "meme", "pepe", "doge", "cat"
-    ]
-    logger.info(f"Starting token discovery on Solana with {len(search_terms)} terms.")
-    brs_calculator = BRSCalculator()
+    brs_calculator = BRSCalculator(profile=BRS_PROFILE)
 
     async with httpx.AsyncClient(timeout=10.0) as client: # Added timeout
-        for term in search_terms:
-            try:
-                logger.info(f"Searching Dexscreener for Solana tokens matching term: {term}")
-                response = await client.get(f"https://api.dexscreener.com/latest/dex/search?q={term}")
-                response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
-                data = response.json()
-                pairs = data.get("pairs", [])
-                solana_pairs_count = sum(1 for p in pairs if p.get('chainId') == 'solana')
-                logger.info(f"Found {solana_pairs_count} Solana pairs for term '{term}'. Processing...")
+        try:
+            changes = await live_feed.poll(client, ["solana"])
+            now = time.time()
+            stale = [a for a, refreshed_at in live_refreshed.items() if now - refreshed_at >= LIVE_REFRESH_SECONDS]
+            addresses = list(dict.fromkeys(changes.get("solana", []) + stale))
+            logger.info("Starting token discovery on Solana with %d new or changed feed tokens and %d stale tracked tokens.",
+                        len(addresses) - len(stale), len(stale))
 
-                for pair_data in pairs:
-                    if pair_data.get("chainId") == "solana":
-                        token = process_dex_pair(pair_data, brs_calculator)
-                        if token:
-                            tokens.append(token)
-                            logger.info(f"Processed and added token: {token['symbol']} (BRS: {token['brs_score']})")
-            except httpx.HTTPStatusError as exc:
-                logger.error(f"Dexscreener API error for term '{term}': {exc.response.status_code} - {exc.response.text}")
-            except httpx.RequestError as exc:
-                logger.error(f"Dexscreener request error for term '{term}': {exc}")
-            except Exception as e:
-                logger.error(f"Unexpected error fetching/processing data for term '{term}': {e}", exc_info=True)
+            pairs = await live_feed.fetch_pairs(client, "solana", addresses)
+            for pair in pairs:
+                token = process_dex_pair(pair, brs_calculator)
+                if token:
+                    live_tokens[pair.address] = token
+                    live_refreshed[pair.address] = now
+                    token_log.info("Processed and added token: %s (BRS: %s)", token["symbol"], token["brs_score"])
+                else:
+                    live_tokens.pop(pair.address, None)
+                    live_refreshed.pop(pair.address, None)
+
+            live_feed.commit("solana")
+            prune_live_tokens(now)
+        except httpx.RequestError as exc:
+            logger.error(f"Dexscreener request error during discovery: {exc}")
+        except Exception as e:
+            logger.error(f"Unexpected error fetching/processing discovery feed: {e}", exc_info=True)
     
     # Filter by BRS score (example: >= 60)
-    phoenix_tokens = [token for token in tokens if token["brs_score"] >= 60]
+    phoenix_tokens = [token for token in live_tokens.values() if token["brs_score"] >= 60]
     phoenix_tokens.sort(key=lambda x: x["brs_score"], reverse=True)
     
-    logger.info(f"Finished discovery. Total processed Solana tokens: {len(tokens)}. Potential phoenix tokens (BRS >= 60): {len(phoenix_tokens)}.")
-    return phoenix_tokens[:20] # Return top 20
+    logger.info("Finished discovery. Total tracked Solana tokens: %d. Potential phoenix tokens (BRS >= 60): %d.", len(live_tokens), len(phoenix_tokens))
+    return phoenix_tokens
 
-def process_dex_pair(pair_data, brs_calculator):
+# Pre-BRS filters (as from localhost logic), checked before anything is built or scored
+PRE_BRS_FILTER = CandidateFilter(min_liquidity=5000, min_volume=10000, min_market_cap=100000, require_price=True)
+
+def process_dex_pair(pair: PairRecord, brs_calculator):
     try:
-        base_token = pair_data.get("baseToken", {})
-        if not base_token.get("address") or not base_token.get("symbol"):
-            logger.warning(f"Skipping pair due to missing baseToken address or symbol: {pair_data.get('pairAddress')}")
+        if not pair.address or not pair.symbol:
+            logger.warning(f"Skipping pair due to missing baseToken address or symbol: {pair.pair_address}")
+            return None
+
+        reason = PRE_BRS_FILTER.reject_reason(pair)
+        if reason is not None:
+            # Skipped by the feed lookups until its re-check window passes
+            negative_cache.add(pair.address, reason)
             return None
 
         # Basic data extraction
         token_metrics = {
-            "address": base_token.get("address"),
-            "symbol": base_token.get("symbol"),
-            "name": base_token.get("name", base_token.get("symbol")),
-            "current_price": float(pair_data.get("priceUsd", 0)),
-            "liquidity_usd": float(pair_data.get("liquidity", {}).get("usd", 0)),
-            "volume_24h": float(pair_data.get("volume", {}).get("h24", 0)),
-            "market_cap": float(pair_data.get("marketCap", 0)),
-            "fdv": float(pair_data.get("fdv", 0)),
-            "price_change_24h": float(pair_data.get("priceChange", {}).get("h24", 0)),
+            "address": pair.address,
+            "symbol": pair.symbol,
+            "name": pair.name or pair.symbol,
+            "current_price": pair.price_usd,
+            "liquidity_usd": pair.liquidity_usd,
+            "volume_24h": pair.volume_24h,
+            "market_cap": pair.market_cap,
+            "fdv": pair.fdv,
+            "price_change_24h": pair.price_change_24h,
         }
 
-        # Apply crucial pre-BRS filters (as from localhost logic)
-        if not (token_metrics["liquidity_usd"] >= 5000 and \
-                token_metrics["market_cap"] >= 100000 and \
-                token_metrics["volume_24h"] >= 10000 and \
-                token_metrics["current_price"] > 0):
-            # logger.info(f"Token {token_metrics['symbol']} filtered out by pre-BRS criteria.")
-            return None
-
         brs_components = brs_calculator.calculate_brs(token_metrics)
         brs_score = brs_components["brs_score"]
 
         # Determine category based on BRS score
-        if brs_score >= 75: category = "Phoenix Rising"
-        elif brs_score >= 60: category = "Showing Life"
-        else: category = "Deep Bottom" # Could be filtered out later if not desired
+        category, _ = brs_calculator.get_score_interpretation(brs_score)
         
         # Crash percentage (example logic)
         crash_percentage = min(90, max(60, 80 - (brs_score * 0.25)))
@@ -235,7 +181,7 @@ def process_dex_pair(pair_data, brs_calculator):
         # Token Age
         first_seen_date_str = datetime.utcnow().isoformat() + "Z"
         token_age_days = 0
-        pair_created_at_timestamp = pair_data.get("pairCreatedAt")
+        pair_created_at_timestamp = pair.pair_created_at
         if pair_created_at_timestamp:
             try:
                 # Assuming timestamp is in milliseconds
@@ -266,7 +212,7 @@ def process_dex_pair(pair_data, brs_calculator):
             "token_age_days": token_age_days,
         }
     except Exception as e:
-        logger.error(f"Error processing Dexscreener pair {pair_data.get('pairAddress')}: {e}", exc_info=True)
+        logger.error(f"Error processing Dexscreener pair {pair.pair_address}: {e}", exc_info=True)
         return None
 
 # API Endpoints
@@ -294,12 +240,18 @@ async def api_test():
 
 @app.get("/api/top-phoenixes", response_model=List[TokenResponse])
 async def get_top_phoenixes_endpoint(
-    # Query parameters can be added here if needed, e.g., min_brs, min_liquidity
-    limit: int = Query(20, ge=1, le=100)
+    limit: int = Query(20, ge=1, le=100),
+    min_score: float = Query(0),
+    min_market_cap: float = Query(0),
+    min_volume: float = Query(0)
 ):
     try:
-        logger.info(f"API endpoint /api/top-phoenixes called with limit={limit}")
+        logger.info("API endpoint /api/top-phoenixes called with limit=%d", limit)
         tokens = await fetch_live_tokens()
+        tokens = [
+            t for t in tokens
+            if t["brs_score"] >= min_score and t["market_cap"] >= min_market_cap and t["volume_24h"] >= min_volume
+        ]
         return tokens[:limit]
     except Exception as e:
         logger.error(f"Error getting top phoenixes: {e}")
@@ -342,17 +294,22 @@ async def get_token_analysis(address: str):
         # First, try to get the token data from Dexscreener
         async with httpx.AsyncClient(timeout=15.0) as client:
             try:
-                # Search for the specific token by address
-                response = await client.get(f"https://api.dexscreener.com/latest/dex/tokens/{address}")
-                response.raise_for_status()
-                data = response.json()
-                pairs = data.get("pairs", [])
-                
-                if not pairs:
-                    # If no pairs found, try searching by address in search API
-                    response = await client.get(f"https://api.dexscreener.com/latest/dex/search?q={address}")
+                pairs = []
+                # Addresses Dexscreener recently had no pairs for go straight to the fallback
+                if negative_cache.reason(address, probable=False) != "not_found":
+                    # Search for the specific token by address
+                    response = await dexscreener_limiter.get(client, f"https://api.dexscreener.com/latest/dex/tokens/{address}", hedge=True)
+                    response.raise_for_status()
                     data = response.json()
                     pairs = data.get("pairs", [])
+                    
+                    if not pairs:
+                        # If no pairs found, try searching by address in search API
+                        response = await dexscreener_limiter.get(client, f"https://api.dexscreener.com/latest/dex/search?q={address}", hedge=True)
+                        data = response.json()
+                        pairs = data.get("pairs", [])
+                        if not pairs and response.status_code == 200:
+                            negative_cache.add(address, "not_found")
                 
                 if pairs:
                     # Use the first pair (usually the most liquid one)
@@ -378,7 +335,7 @@ async def get_token_analysis(address: str):
                     try:
                         # Get pair-specific data which sometimes includes more history
                         if pair_address:
-                            hist_response = await client.get(f"https://api.dexscreener.com/latest/dex/pairs/solana/{pair_address}")
+                            hist_response = await dexscreener_limiter.get(client, f"https://api.dexscreener.com/latest/dex/pairs/solana/{pair_address}", hedge=True)
                             hist_data = hist_response.json()
                             if hist_data.get("pair"):
                                 hist_pair = hist_data["pair"]
@@ -417,7 +374,7 @@ async def get_token_analysis(address: str):
                             })
                     
                     # Calculate BRS for this specific token
-                    brs_calculator = BRSCalculator()
+                    brs_calculator = BRSCalculator(profile=BRS_PROFILE)
                     token_metrics = {
                         "current_price": current_price,
                         "liquidity_usd": liquidity_usd,
@@ -1,14 +1,17 @@
 // API Configuration
 const API_URL = '/api';
 const API_BASE_URL = '';
-const WS_URL = `${window.location.protocol === 'https:' ? 'wss:' : 'ws:'}//${window.location.host}/ws/updates`;
 
 // State Management
 let phoenixTokens = [];
 let recentAlerts = [];
 let selectedToken = null;
-let ws = null;
+let eventSource = null;
+let leaderboardVersion = null;
 let autoRefreshInterval = null;
+let nextCursor = null;
+let totalPhoenixes = 0;
+let loadingMore = false;
 
 // DOM Elements
 const phoenixTbody = document.getElementById('phoenix-tbody');
@@ -24,19 +27,19 @@ document.addEventListener('DOMContentLoaded', () => {
     // Initialize Feather icons
     feather.replace();
     
-    // Load initial data
-    loadTopPhoenixes();
+    // Load initial data, then stream the changes after it
+    loadTopPhoenixes().then(connectLeaderboardStream);
     loadRecentAlerts();
     
-    // Set up WebSocket connection
-    connectWebSocket();
-    
     // Set up event listeners
     setupEventListeners();
     
     // Set up auto-refresh
     autoRefreshInterval = setInterval(() => {
-        loadTopPhoenixes();
+        // The leaderboard stream delivers every cycle's changes; poll only while it is down
+        if (!eventSource || eventSource.readyState !== EventSource.OPEN) {
+            loadTopPhoenixes();
+        }
         loadRecentAlerts();
     }, 60000); // Refresh every minute
     
@@ -51,6 +54,14 @@ function setupEventListeners() {
     document.getElementById('marketcap-filter').addEventListener('change', loadTopPhoenixes);
     document.getElementById('volume-filter').addEventListener('change', loadTopPhoenixes);
     
+    // Fetch the next page when the table is scrolled near its end
+    document.querySelector('.table-wrapper').addEventListener('scroll', (e) => {
+        const wrapper = e.target;
+        if (wrapper.scrollTop + wrapper.clientHeight >= wrapper.scrollHeight - 200) {
+            loadMorePhoenixes();
+        }
+    });
+    
     // Refresh button
     document.getElementById('refresh-btn').addEventListener('click', () => {
         const refreshBtn = document.getElementById('refresh-btn');
@@ -90,25 +101,10 @@ async function loadTopPhoenixes() {
         const minMarketCap = document.getElementById('marketcap-filter').value;
         const minVolume = document.getElementById('volume-filter').value;
         
-        // Build query params
-        const params = new URLSearchParams({
-            limit: 20,
-            min_score: minScore,
-            min_liquidity: 5000,  // Keep a minimum liquidity
-            chain: 'solana'  // Always Solana
-        });
-        
-        const response = await fetch(`${API_BASE_URL}/api/top-phoenixes?${params}`);
-        if (!response.ok) throw new Error('Failed to load tokens');
-        
-        let tokens = await response.json();
-        
-        // Client-side filtering for market cap and volume
-        tokens = tokens.filter(token => {
-            const marketCap = token.market_cap || 0;
-            const volume = token.volume_24h || 0;
-            return marketCap >= parseFloat(minMarketCap) && volume >= parseFloat(minVolume);
-        });
+        const { tokens, cursor, total, version } = await fetchPhoenixPage(minScore, minMarketCap, minVolume, null);
+        nextCursor = cursor;
+        totalPhoenixes = total;
+        leaderboardVersion = version || leaderboardVersion;
         
         phoenixTokens = tokens;
         renderPhoenixTable();
@@ -122,6 +118,53 @@ async function loadTopPhoenixes() {
     }
 }
 
+// Fetch one page of phoenix tokens; filters are applied server-side
+async function fetchPhoenixPage(minScore, minMarketCap, minVolume, cursor) {
+    const params = new URLSearchParams({
+        limit: 50,
+        min_score: minScore,
+        min_market_cap: minMarketCap,
+        min_volume: minVolume,
+        min_liquidity: 5000,  // Keep a minimum liquidity
+        chain: 'solana'  // Always Solana
+    });
+    if (cursor) params.set('cursor', cursor);
+    
+    const response = await fetch(`${API_BASE_URL}/api/top-phoenixes?${params}`);
+    if (!response.ok) throw new Error('Failed to load tokens');
+    
+    const tokens = await response.json();
+    return {
+        tokens,
+        cursor: response.headers.get('X-Next-Cursor'),
+        total: parseInt(response.headers.get('X-Total-Count') || tokens.length, 10),
+        version: response.headers.get('X-Leaderboard-Version')
+    };
+}
+
+// Append the next page of phoenix tokens to the table
+async function loadMorePhoenixes() {
+    if (!nextCursor || loadingMore) return;
+    loadingMore = true;
+    
+    try {
+        const minScore = document.getElementById('score-filter').value;
+        const minMarketCap = document.getElementById('marketcap-filter').value;
+        const minVolume = document.getElementById('volume-filter').value;
+        
+        const { tokens, cursor } = await fetchPhoenixPage(minScore, minMarketCap, minVolume, nextCursor);
+        nextCursor = cursor;
+        
+        phoenixTokens = phoenixTokens.concat(tokens);
+        tokens.forEach(token => phoenixTbody.appendChild(createPhoenixRow(token)));
+        
+    } catch (error) {
+        console.error('Error loading more phoenix tokens:', error);
+    } finally {
+        loadingMore = false;
+    }
+}
+
 // Render Phoenix Table
 function renderPhoenixTable() {
     phoenixTbody.innerHTML = '';
@@ -151,47 +194,49 @@ function renderPhoenixTable() {
         document.getElementById('featured-phoenix').style.display = 'none';
     }
     
-    phoenixTokens.forEach(token => {
-        const volumeToMcRatio = token.market_cap > 0 ? (token.volume_24h / token.market_cap * 100).toFixed(0) : 0;
-        
-        const row = document.createElement('tr');
-        row.innerHTML = `
-            <td>
-                <div class="token-info">
-                    <strong>${token.symbol}</strong>
-                    <span class="token-name">${token.name || ''}</span>
-                </div>
-            </td>
-            <td>
-                <span class="brs-score">${token.brs_score.toFixed(1)}</span>
-                <div class="score-category">${token.category}</div>
-            </td>
-            <td>
-                <div>$${formatPrice(token.current_price)}</div>
-                <div class="price-change ${token.price_change_24h >= 0 ? 'positive' : 'negative'}">
-                    ${token.price_change_24h >= 0 ? '+' : ''}${token.price_change_24h.toFixed(1)}%
-                </div>
-            </td>
-            <td>$${formatNumber(token.market_cap)}</td>
-            <td>
-                <div>$${formatNumber(token.volume_24h)}</div>
-                ${volumeToMcRatio > 100 ? 
-                    `<div class="volume-ratio-high">${volumeToMcRatio}% of MC</div>` : 
-                    `<div class="volume-ratio">${volumeToMcRatio}% of MC</div>`
-                }
-            </td>
-            <td>$${formatNumber(token.liquidity_usd)}</td>
-            <td>
-                <div class="actions">
-                    <button class="btn-small" onclick="showTokenDetails('${token.address}')">Analysis</button>
-                    <a href="https://dexscreener.com/solana/${token.address}" target="_blank" class="btn-small btn-outline">
-                        Chart
-                    </a>
-                </div>
-            </td>
-        `;
-        phoenixTbody.appendChild(row);
-    });
+    phoenixTokens.forEach(token => phoenixTbody.appendChild(createPhoenixRow(token)));
+}
+
+function createPhoenixRow(token) {
+    const volumeToMcRatio = token.market_cap > 0 ? (token.volume_24h / token.market_cap * 100).toFixed(0) : 0;
+    
+    const row = document.createElement('tr');
+    row.innerHTML = `
+        <td>
+            <div class="token-info">
+                <strong>${token.symbol}</strong>
+                <span class="token-name">${token.name || ''}</span>
+            </div>
+        </td>
+        <td>
+            <span class="brs-score">${token.brs_score.toFixed(1)}</span>
+            <div class="score-category">${token.category}</div>
+        </td>
+        <td>
+            <div>$${formatPrice(token.current_price)}</div>
+            <div class="price-change ${token.price_change_24h >= 0 ? 'positive' : 'negative'}">
+                ${token.price_change_24h >= 0 ? '+' : ''}${token.price_change_24h.toFixed(1)}%
+            </div>
+        </td>
+        <td>$${formatNumber(token.market_cap)}</td>
+        <td>
+            <div>$${formatNumber(token.volume_24h)}</div>
+            ${volumeToMcRatio > 100 ? 
+                `<div class="volume-ratio-high">${volumeToMcRatio}% of MC</div>` : 
+                `<div class="volume-ratio">${volumeToMcRatio}% of MC</div>`
+            }
+        </td>
+        <td>$${formatNumber(token.liquidity_usd)}</td>
+        <td>
+            <div class="actions">
+                <button class="btn-small" onclick="showTokenDetails('${token.address}')">Analysis</button>
+                <a href="https://dexscreener.com/solana/${token.address}" target="_blank" class="btn-small btn-outline">
+                    Chart
+                </a>
+            </div>
+        </td>
+    `;
+    return row;
 }
 
 function showFeaturedPhoenix(token) {
@@ -527,45 +572,39 @@ async function addToWatchlist(address) {
     }
 }
 
-// WebSocket Connection
-function connectWebSocket() {
-    ws = new WebSocket(WS_URL);
+// Leaderboard stream: one delta per discovery cycle; the browser resumes it with Last-Event-ID
+function connectLeaderboardStream() {
+    if (!window.EventSource || eventSource) return;
     
-    ws.onopen = () => {
-        console.log('WebSocket connected');
-    };
+    const params = leaderboardVersion ? `?since=${encodeURIComponent(leaderboardVersion)}` : '';
+    eventSource = new EventSource(`${API_BASE_URL}/api/stream${params}`);
     
-    ws.onmessage = (event) => {
-        const data = JSON.parse(event.data);
-        if (data.type === 'phoenix_update') {
-            handlePhoenixUpdate(data.data);
-        }
-    };
+    eventSource.addEventListener('delta', (event) => {
+        const delta = JSON.parse(event.data);
+        handlePhoenixUpdate(delta.upsert, delta.remove);
+    });
     
-    ws.onclose = () => {
-        console.log('WebSocket disconnected');
-        // Reconnect after 5 seconds
-        setTimeout(connectWebSocket, 5000);
-    };
+    // Too far behind for deltas, or the server restarted: reload the first page
+    eventSource.addEventListener('reset', () => loadTopPhoenixes());
     
-    ws.onerror = (error) => {
-        console.error('WebSocket error:', error);
+    eventSource.onerror = () => {
+        console.log('Leaderboard stream disconnected, reconnecting');
     };
 }
 
-// Handle Phoenix Update
-function handlePhoenixUpdate(tokens) {
-    // Update tokens if on the main view
-    if (modal.classList.contains('active')) return;
-    
-    // Filter for our criteria
+// Apply upserted rows and removed addresses from a leaderboard delta
+function handlePhoenixUpdate(tokens, removed = []) {
+    // Deltas cover every chain and score; keep what the current filters show
+    const minScore = parseFloat(document.getElementById('score-filter').value);
     const minMarketCap = document.getElementById('marketcap-filter').value;
     const minVolume = document.getElementById('volume-filter').value;
     
     tokens = tokens.filter(token => {
         const marketCap = token.market_cap || 0;
         const volume = token.volume_24h || 0;
-        return marketCap >= parseFloat(minMarketCap) && volume >= parseFloat(minVolume);
+        return token.chain === 'solana' &&
+               token.brs_score >= minScore &&
+               marketCap >= parseFloat(minMarketCap) && volume >= parseFloat(minVolume);
     });
     
     // Check for new high-scoring tokens
@@ -578,18 +617,22 @@ function handlePhoenixUpdate(tokens) {
         }
     });
     
-    // Merge updates with existing tokens
-    tokens.forEach(updatedToken => {
-        const index = phoenixTokens.findIndex(t => t.address === updatedToken.address);
-        if (index >= 0) {
-            phoenixTokens[index] = updatedToken;
-        } else {
-            phoenixTokens.unshift(updatedToken);
-            phoenixTokens = phoenixTokens.slice(0, 20);
+    // Rows that changed, left the leaderboard or no longer match are replaced or dropped
+    const dropped = new Set(removed.concat(tokens.map(t => t.address)));
+    phoenixTokens = phoenixTokens.filter(t => !dropped.has(t.address));
+    
+    // Unloaded pages stay unloaded: new rows are only added above the last loaded row
+    const last = phoenixTokens[phoenixTokens.length - 1];
+    tokens.forEach(token => {
+        if (!nextCursor || !last || token.brs_score > last.brs_score ||
+            (token.brs_score === last.brs_score && token.address < last.address)) {
+            phoenixTokens.push(token);
         }
     });
+    phoenixTokens.sort((a, b) => b.brs_score - a.brs_score || (a.address < b.address ? -1 : 1));
     
     renderPhoenixTable();
+    updateStats();
 }
 
 // Notification System
@@ -618,7 +661,7 @@ function showNotification(message, type = 'success') {
 
 // Update Stats
 function updateStats() {
-    document.getElementById('total-tracked').textContent = phoenixTokens.length;
+    document.getElementById('total-tracked').textContent = Math.max(totalPhoenixes, phoenixTokens.length);
     document.getElementById('phoenixes-found').textContent = phoenixTokens.filter(t => t.brs_score >= 80).length;
     document.getElementById('alerts-sent').textContent = recentAlerts.length;
 }
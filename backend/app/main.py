@@ -1,21 +1,36 @@
-from fastapi import FastAPI, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from typing import List, Optional
 from pydantic import BaseModel
 import asyncio
+import hashlib
 import logging
 import os
+import time
 from dotenv import load_dotenv
 
 from models.database import init_db, get_session
 from services.token_manager import TokenManager
+from services.leaderboard import leaderboard_state, decode_cursor
+from services.alert_engine import alert_engine
+from services.alert_dispatcher import AlertDispatcher
+from services.telegram_bot import TelegramAlertBot
+from services.http_compression import CompressionMiddleware, strip_encoding_suffix
+from services.metrics import MetricsMiddleware, instrument_engine, record_cache, registry
+from services.log_config import configure_logging
+from services.profiling import Profiler, ProfilingMiddleware
+from services.rate_limiter import dexscreener_limiter
+from services.response_cache import cache_from_env
+from services.pair_record import raw_archive
+from services.refresh_queue import RefreshQueue
+from services.change_log import get_changes, install_change_log, latest_seq, prune_change_log
 
 # Load environment variables
 load_dotenv()
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Create FastAPI app
@@ -32,10 +47,54 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag", "X-Leaderboard-Version", "X-Next-Since", "X-Has-More", "X-Latest-Seq"],
 )
 
+# Compress large bodies such as the analysis payload
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+# Opt-in cProfile captures of discovery cycles and sampled requests
+profiler = Profiler(
+    profile_dir=os.getenv("PROFILE_DIR", "./profiles"),
+    cycles=int(os.getenv("PROFILE_CYCLES", 0)),
+    requests=int(os.getenv("PROFILE_REQUESTS", 0)),
+    request_rate=float(os.getenv("PROFILE_REQUEST_RATE", 1.0))
+)
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+# Outermost, so request latency includes compression
+app.add_middleware(MetricsMiddleware)
+
 # Initialize database
 engine = init_db(os.getenv("DATABASE_URL", "sqlite:///./bottom.db"))
+instrument_engine(engine)
+
+# Every token, score and alert write also appends to change_log for /api/changes
+install_change_log()
+
+# Optional on-disk Dexscreener response cache (DEXSCREENER_CACHE_PATH)
+dexscreener_limiter.cache = cache_from_env()
+
+# Share of user-facing Dexscreener requests that may send a duplicate after the p95
+dexscreener_limiter.hedge_budget = float(os.getenv("DEXSCREENER_HEDGE_BUDGET", 0.05))
+
+# Optional archive of the raw pair payloads discovery drops after decoding (PAIR_ARCHIVE_DIR)
+raw_archive.open(os.getenv("PAIR_ARCHIVE_DIR"))
+
+# Telegram delivery runs beside scoring and reads its work from the alerts table
+telegram_bot = TelegramAlertBot(engine)
+alert_dispatcher = AlertDispatcher(
+    telegram_bot, engine,
+    poll_interval=float(os.getenv("ALERT_DISPATCH_INTERVAL", 5)),
+    chat_interval=float(os.getenv("TELEGRAM_CHAT_INTERVAL", 1))
+)
+
+# On-demand /brs refreshes, coalesced per token and run ahead of discovery sweeps
+refresh_queue = RefreshQueue(
+    engine,
+    max_age=float(os.getenv("BRS_REFRESH_MAX_AGE", 60)),
+    workers=int(os.getenv("BRS_REFRESH_WORKERS", 2))
+)
 
 # WebSocket connection manager
 class ConnectionManager:
@@ -58,11 +117,45 @@ class ConnectionManager:
 
 manager = ConnectionManager()
 
+# Distinguishes cycle ids across restarts
+BOOT_ID = format(int(time.time()), "x")
+
+def cycle_etag(request: Request) -> str:
+    """Strong ETag for data that only changes when a discovery cycle completes"""
+    params = hashlib.sha1(str(sorted(request.query_params.multi_items())).encode()).hexdigest()[:12]
+    return f'"{BOOT_ID}-{leaderboard_state.cycle_id}-{params}"'
+
+def alerts_etag(request: Request, alerts_version: str) -> str:
+    """Strong ETag for the alert feed, which also changes between discovery cycles"""
+    params = hashlib.sha1(str(sorted(request.query_params.multi_items())).encode()).hexdigest()[:12]
+    return f'"{BOOT_ID}-alerts-{alerts_version}-{params}"'
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """True when If-None-Match already names the current representation"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        record_cache("etag", True)
+        return True
+    candidates = [strip_encoding_suffix(tag.strip()) for tag in if_none_match.split(",")]
+    hit = etag in candidates
+    record_cache("etag", hit)
+    return hit
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
 # Pydantic models
 class WatchlistAdd(BaseModel):
     token_address: str
     alert_threshold: float = 80.0
 
+class ProfilingArm(BaseModel):
+    cycles: Optional[int] = None
+    requests: Optional[int] = None
+    request_rate: Optional[float] = None
+
 class TokenResponse(BaseModel):
     address: str
     symbol: str
@@ -100,63 +193,141 @@ async def root():
         "health": "/health"
     }
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics for discovery stages, endpoints, Dexscreener, caches and the database"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "bottom-api"}
 
 @app.get("/api/top-phoenixes", response_model=List[TokenResponse])
 async def get_top_phoenixes(
+    request: Request,
+    response: Response,
     chain: Optional[str] = Query(None, description="Filter by blockchain (ethereum/bsc/polygon/all)"),
     min_liquidity: float = Query(5000, description="Minimum liquidity in USD"),
     min_score: float = Query(0, description="Minimum BRS score"),
-    limit: int = Query(20, description="Number of results to return")
+    min_market_cap: float = Query(500000, description="Minimum market cap in USD"),
+    min_volume: float = Query(50000, description="Minimum 24h volume in USD"),
+    limit: int = Query(20, ge=1, le=500, description="Number of results to return"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page")
 ):
-    """Get top phoenix tokens by BRS score"""
+    """Get top phoenix tokens by BRS score, one keyset page at a time"""
+    etag = cycle_etag(request)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    
     try:
+        # Hot path: pre-serialized bytes from this cycle's index, no validation or encoding
+        index = leaderboard_state.index
+        if index is not None:
+            body, next_cursor, total = index.query_json(
+                limit=limit,
+                after=decode_cursor(cursor) if cursor else None,
+                min_score=min_score,
+                chain=chain,
+                min_market_cap=min_market_cap,
+                min_volume=min_volume
+            )
+            headers = {
+                "ETag": etag, "Cache-Control": "no-cache", "X-Total-Count": str(total),
+                # Pass as ?since= to /api/stream to receive only later changes
+                "X-Leaderboard-Version": leaderboard_state.deltas.event_id
+            }
+            if next_cursor:
+                headers["X-Next-Cursor"] = next_cursor
+            return Response(content=body, media_type="application/json", headers=headers)
+        
         session = get_session(engine)
         token_manager = TokenManager(session)
         
-        phoenixes = await token_manager.get_top_phoenixes(
-            limit=limit,
-            min_score=min_score,
-            chain=chain
-        )
+        try:
+            page = await token_manager.get_top_phoenixes_page(
+                limit=limit,
+                cursor=cursor,
+                min_score=min_score,
+                chain=chain,
+                min_market_cap=min_market_cap,
+                min_volume=min_volume
+            )
+        finally:
+            session.close()
+            await token_manager.cleanup()
         
-        session.close()
-        await token_manager.cleanup()
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Total-Count"] = str(page["total"])
+        if page["next_cursor"]:
+            response.headers["X-Next-Cursor"] = page["next_cursor"]
         
-        return phoenixes
+        return page["items"]
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting top phoenixes: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/token/{address}/brs")
-async def get_token_brs(address: str):
-    """Get detailed BRS breakdown for specific token"""
+@app.get("/api/stream")
+async def stream_leaderboard(
+    since: Optional[str] = Query(None, description="X-Leaderboard-Version of the page the client already has"),
+    last_event_id: Optional[str] = Header(None)
+):
+    """Server-Sent Events with one delta (upserted rows, removed addresses) per discovery cycle"""
+    # EventSource sends Last-Event-ID itself when it reconnects
+    return StreamingResponse(
+        leaderboard_state.deltas.stream(last_event_id or since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/changes")
+async def get_changes_since(
+    since: int = Query(0, ge=0, description="Last seq already applied; 0 starts at the oldest kept entry"),
+    limit: int = Query(1000, ge=1, le=5000, description="Maximum entries to return")
+):
+    """Token, score and alert changes after a sequence number, oldest first, for incremental sync"""
+    session = get_session(engine)
     try:
-        session = get_session(engine)
-        token_manager = TokenManager(session)
-        
-        # Update token data first
-        token = await token_manager.update_token_data(address)
-        if not token:
-            raise HTTPException(status_code=404, detail="Token not found")
+        page = get_changes(session, since, limit)
+        if page is None:
+            raise HTTPException(
+                status_code=410,
+                detail="Changes after this seq were pruned; resync, then continue from X-Latest-Seq",
+                headers={"X-Latest-Seq": str(latest_seq(session))}
+            )
         
-        # Get latest BRS score
-        phoenixes = await token_manager.get_top_phoenixes(limit=1, chain=token.chain)
-        phoenix_data = next((p for p in phoenixes if p["address"] == address), None)
+        return Response(content=page["body"], media_type="application/json", headers={
+            "Cache-Control": "no-cache",
+            "X-Next-Since": str(page["next"]),
+            "X-Has-More": "true" if page["has_more"] else "false"
+        })
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting changes since {since}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
         session.close()
-        await token_manager.cleanup()
-        
+
+@app.get("/api/token/{address}/brs")
+async def get_token_brs(address: str):
+    """Get detailed BRS breakdown for specific token"""
+    try:
+        # Refreshed first unless recently scored; concurrent requests share one refresh
+        phoenix_data = await refresh_queue.get_brs(address)
         if not phoenix_data:
-            raise HTTPException(status_code=404, detail="BRS data not found")
+            raise HTTPException(status_code=404, detail="Token not found")
         
         return phoenix_data
         
     except HTTPException:
         raise
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="Too many token refreshes queued, try again shortly")
     except Exception as e:
         logger.error(f"Error getting token BRS: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -186,22 +357,32 @@ async def add_to_watchlist(watchlist_data: WatchlistAdd):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/alerts/recent")
-async def get_recent_alerts(limit: int = Query(10, description="Number of alerts to return")):
+async def get_recent_alerts(
+    request: Request,
+    response: Response,
+    limit: int = Query(10, description="Number of alerts to return")
+):
     """Get recent phoenix alerts"""
+    session = get_session(engine)
+    token_manager = TokenManager(session)
     try:
-        session = get_session(engine)
-        token_manager = TokenManager(session)
+        # Alerts are also created by on-demand refreshes and marked sent by the dispatcher
+        etag = alerts_etag(request, token_manager.get_alerts_version())
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
         
         alerts = await token_manager.get_recent_alerts(limit=limit)
         
-        session.close()
-        await token_manager.cleanup()
-        
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
         return alerts
         
     except Exception as e:
         logger.error(f"Error getting recent alerts: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        session.close()
+        await token_manager.cleanup()
 
 @app.get("/api/token/{token_address}/analysis")
 async def get_token_analysis(token_address: str):
@@ -255,6 +436,33 @@ async def websocket_endpoint(websocket: WebSocket):
         logger.error(f"WebSocket error: {e}")
         manager.disconnect(websocket)
 
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Admin endpoints are disabled unless ADMIN_TOKEN is set and sent as X-Admin-Token"""
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token or x_admin_token != admin_token:
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@app.get("/admin/profiling", dependencies=[Depends(require_admin)])
+async def get_profiling_status():
+    return profiler.status()
+
+@app.post("/admin/profiling", dependencies=[Depends(require_admin)])
+async def arm_profiling(arm: ProfilingArm):
+    """Profile the next N discovery cycles and/or N requests sampled at request_rate"""
+    profiler.arm(cycles=arm.cycles, requests=arm.requests, request_rate=arm.request_rate)
+    return profiler.status()
+
+@app.get("/admin/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    return profiler.list_profiles()
+
+@app.get("/admin/profiles/{name}", dependencies=[Depends(require_admin)])
+async def download_profile(name: str):
+    path = profiler.get_path(name)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=name)
+
 # Background task to periodically update token data
 async def update_tokens_task():
     """Background task to update token data and calculate BRS scores"""
@@ -265,9 +473,16 @@ async def update_tokens_task():
             session = get_session(engine)
             token_manager = TokenManager(session)
             
-            # Discover new phoenixes
-            await token_manager.discover_new_phoenixes()
+            with profiler.cycle(f"cycle-{leaderboard_state.cycle_id + 1}"):
+                # Discover new phoenixes
+                await token_manager.discover_new_phoenixes()
+                
+                # Publish the refreshed leaderboard for the read endpoints and the bot
+                index = token_manager.build_leaderboard_index()
+                leaderboard_state.complete_cycle(index, token_manager.build_cycle_stats(index))
+            alert_dispatcher.notify()
             
+            prune_change_log(session, float(os.getenv("CHANGE_LOG_RETENTION_DAYS", 7)))
             session.close()
             await token_manager.cleanup()
             
@@ -281,12 +496,34 @@ async def update_tokens_task():
 @app.on_event("startup")
 async def startup_event():
     """Start background tasks on app startup"""
+    session = get_session(engine)
+    token_manager = TokenManager(session)
+    token_manager.rebuild_leaderboard()
+    alert_engine.load(session)
+    index = token_manager.build_leaderboard_index()
+    leaderboard_state.complete_cycle(index, token_manager.build_cycle_stats(index))
+    session.close()
+    await token_manager.cleanup()
+    
     asyncio.create_task(update_tokens_task())
+    alert_dispatcher.start()
+    refresh_queue.start()
+    try:
+        await telegram_bot.start_bot()
+    except Exception as e:
+        logger.error(f"Error starting Telegram bot: {e}")
     logger.info("Bottom API started successfully")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on app shutdown"""
+    await alert_dispatcher.stop()
+    await refresh_queue.stop()
+    try:
+        await telegram_bot.stop_bot()
+    except Exception as e:
+        logger.error(f"Error stopping Telegram bot: {e}")
+    raw_archive.close()
     logger.info("Bottom API shutting down")
 
 if __name__ == "__main__":
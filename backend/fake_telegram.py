@@ -0,0 +1,116 @@
+"""
+Minimal stand-in for the Telegram Bot API, for exercising the bot offline.
+
+    python fake_telegram.py                  # serves on http://localhost:8081
+    TELEGRAM_API_BASE_URL=http://localhost:8081/bot TELEGRAM_BOT_TOKEN=test TELEGRAM_CHAT_ID=1 python3 app/main.py
+
+Simulate a user with POST /fake/send {"chat_id": 1, "text": "/top"} and read
+what the bot answered or alerted with GET /fake/messages.
+"""
+import asyncio
+import json
+import time
+from typing import Dict, List
+from urllib.parse import parse_qsl
+
+from fastapi import FastAPI, Request
+
+app = FastAPI(title="Fake Telegram Bot API")
+
+updates: List[Dict] = []
+messages: List[Dict] = []
+new_update = asyncio.Event()
+counters = {"update_id": 0, "message_id": 0}
+
+
+def _chat(chat_id) -> Dict:
+    return {"id": int(chat_id), "type": "private", "first_name": "Tester"}
+
+
+async def _params(request: Request) -> Dict:
+    """python-telegram-bot posts url-encoded fields whose values are JSON encoded"""
+    if request.headers.get("content-type", "").startswith("application/json"):
+        return await request.json()
+    params = {}
+    for key, value in parse_qsl((await request.body()).decode()):
+        try:
+            params[key] = json.loads(value)
+        except (TypeError, ValueError):
+            params[key] = value
+    return params
+
+
+@app.post("/fake/send")
+async def fake_send(payload: Dict):
+    """Queue an incoming user message for the bot's next getUpdates"""
+    counters["update_id"] += 1
+    counters["message_id"] += 1
+    text = payload["text"]
+    entities = []
+    if text.startswith("/"):
+        entities.append({"type": "bot_command", "offset": 0, "length": len(text.split()[0])})
+
+    updates.append({
+        "update_id": counters["update_id"],
+        "message": {
+            "message_id": counters["message_id"],
+            "date": int(time.time()),
+            "chat": _chat(payload.get("chat_id", 1)),
+            "from": {"id": int(payload.get("chat_id", 1)), "is_bot": False, "first_name": "Tester"},
+            "text": text,
+            "entities": entities
+        }
+    })
+    new_update.set()
+    return {"update_id": counters["update_id"]}
+
+
+@app.get("/fake/messages")
+async def fake_messages(clear: bool = False):
+    """Everything the bot sent so far"""
+    sent = list(messages)
+    if clear:
+        messages.clear()
+    return sent
+
+
+@app.post("/bot{token}/{method}")
+async def bot_api(token: str, method: str, request: Request):
+    params = await _params(request)
+
+    if method == "getMe":
+        result = {"id": 1, "is_bot": True, "first_name": "Bottom", "username": "bottom_test_bot"}
+
+    elif method == "getUpdates":
+        offset = int(params.get("offset") or 0)
+        pending = [u for u in updates if u["update_id"] >= offset]
+        if not pending:
+            new_update.clear()
+            try:
+                await asyncio.wait_for(new_update.wait(), timeout=float(params.get("timeout") or 0))
+            except asyncio.TimeoutError:
+                pass
+            pending = [u for u in updates if u["update_id"] >= offset]
+        result = pending
+
+    elif method == "sendMessage":
+        counters["message_id"] += 1
+        result = {
+            "message_id": counters["message_id"],
+            "date": int(time.time()),
+            "chat": _chat(params["chat_id"]),
+            "text": params.get("text", "")
+        }
+        messages.append({"chat_id": params["chat_id"], "text": params.get("text", ""),
+                         "parse_mode": params.get("parse_mode")})
+
+    else:
+        # deleteWebhook, setMyCommands and friends only need to succeed
+        result = True
+
+    return {"ok": True, "result": result}
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=8081)
@@ -0,0 +1,252 @@
+import asyncio
+import html
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_
+from telegram.error import RetryAfter
+
+from models.database import Alert, AlertDelivery, Watchlist, get_session
+
+logger = logging.getLogger(__name__)
+
+# Telegram rejects messages longer than 4096 characters
+MAX_MESSAGE_LENGTH = 4000
+
+# Watchlist.user_id of a Telegram chat tracking a token; that chat gets the token's alerts
+TELEGRAM_WATCHER_PREFIX = "telegram:"
+
+
+def _retry_seconds(error: RetryAfter) -> float:
+    retry_after = error.retry_after
+    return retry_after.total_seconds() if isinstance(retry_after, timedelta) else float(retry_after)
+
+
+class AlertDispatcher:
+    """
+    Delivers queued alerts to Telegram in the background
+
+    Unsent Alert rows are queued as one AlertDelivery row per chat: every
+    configured chat, plus each chat tracking the token whose threshold the
+    alert's score reached. Each chat gets at most one message per
+    chat_interval, combining up to batch_size due alerts. Failures back off
+    exponentially until max_attempts, and a Telegram flood-wait pauses only
+    the chat it was raised for. Deliveries are committed right after each
+    send, so a restart resumes the queue without losing alerts and can
+    repeat at most the message in flight. Database work runs on the default
+    executor so queries and commits never block the event loop.
+    """
+
+    def __init__(self, bot, engine, chat_ids: Optional[List[str]] = None,
+                 poll_interval: float = 5.0, chat_interval: float = 1.0,
+                 batch_size: int = 10, max_attempts: int = 8,
+                 max_backoff: float = 3600, max_alert_age_hours: float = 24):
+        self.bot = bot
+        self.engine = engine
+        if chat_ids is None:
+            chat_ids = [c.strip() for c in (bot.chat_id or "").split(",") if c.strip()]
+        self.chat_ids = chat_ids
+        self.poll_interval = poll_interval
+        self.chat_interval = chat_interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+        self.max_alert_age = timedelta(hours=max_alert_age_hours)
+        self._next_send: Dict[str, float] = {}  # chat -> earliest monotonic time for its next message
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        # Chats tracking tokens get alerts even without a configured chat
+        return bool(self.bot.bot)
+
+    def notify(self):
+        """Wake the dispatcher early, e.g. right after a discovery cycle created alerts"""
+        self._wakeup.set()
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        logger.info(f"Alert dispatcher delivering to {len(self.chat_ids)} chats and to tracking chats")
+        while True:
+            try:
+                await self.dispatch_once()
+            except Exception as e:
+                logger.error(f"Error dispatching alerts: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def enqueue_pending(self, db) -> int:
+        """Queue a delivery per chat for every recent unsent alert that has none yet"""
+        since = datetime.utcnow() - self.max_alert_age
+        alerts = db.query(Alert).filter(
+            and_(Alert.sent_status == False, Alert.timestamp > since)
+        ).all()
+        if not alerts:
+            return 0
+
+        queued = {
+            (alert_id, chat_id) for alert_id, chat_id in db.query(AlertDelivery.alert_id, AlertDelivery.chat_id)
+            .filter(AlertDelivery.alert_id.in_([a.id for a in alerts])).all()
+        }
+        watchers: Dict[str, List[Tuple[str, float]]] = {}
+        for token_address, user_id, threshold in db.query(
+            Watchlist.token_address, Watchlist.user_id, Watchlist.alert_threshold
+        ).filter(
+            and_(
+                Watchlist.active == True,
+                Watchlist.user_id.startswith(TELEGRAM_WATCHER_PREFIX),
+                Watchlist.token_address.in_({a.token_address for a in alerts})
+            )
+        ).all():
+            watchers.setdefault(token_address, []).append((user_id[len(TELEGRAM_WATCHER_PREFIX):], threshold or 0))
+
+        added = 0
+        for alert in alerts:
+            chat_ids = list(self.chat_ids)
+            for chat_id, threshold in watchers.get(alert.token_address, []):
+                if (alert.score_at_alert or 0) >= threshold and chat_id not in chat_ids:
+                    chat_ids.append(chat_id)
+            for chat_id in chat_ids:
+                if (alert.id, chat_id) not in queued:
+                    db.add(AlertDelivery(alert_id=alert.id, chat_id=chat_id))
+                    added += 1
+        db.commit()
+        return added
+
+    def _format_batch(self, deliveries: List[AlertDelivery]) -> Tuple[str, List[AlertDelivery]]:
+        """Combine as many deliveries as fit in one message; returns the text and the deliveries it covers"""
+        lines: List[str] = []
+        covered: List[AlertDelivery] = []
+        length = 0
+        for delivery in deliveries:
+            line = html.escape(delivery.alert.message or "")
+            if covered and length + len(line) + 2 > MAX_MESSAGE_LENGTH:
+                break
+            lines.append(line)
+            covered.append(delivery)
+            length += len(line) + 2
+
+        if len(covered) > 1:
+            lines.insert(0, f"🔥 <b>{len(covered)} new phoenix alerts</b>")
+        return "\n\n".join(lines), covered
+
+    async def dispatch_once(self) -> int:
+        """Send one batch to every chat that is due; returns the number of alerts delivered"""
+        if not self.enabled:
+            return 0
+
+        loop = asyncio.get_running_loop()
+        batches = await loop.run_in_executor(None, self._due_batches)
+
+        delivered = 0
+        for chat_id, text, delivery_ids in batches:
+            delivered += await self._send_batch(chat_id, text, delivery_ids)
+        return delivered
+
+    def _due_batches(self) -> List[Tuple[str, str, List[int]]]:
+        """Queue new deliveries and build the next message of every chat that is due"""
+        db = get_session(self.engine)
+        try:
+            self.enqueue_pending(db)
+
+            batches = []
+            now = datetime.utcnow()
+            chat_ids = [chat_id for chat_id, in db.query(AlertDelivery.chat_id).filter(
+                and_(AlertDelivery.status == "pending", AlertDelivery.next_attempt_at <= now)
+            ).distinct().all()]
+            for chat_id in chat_ids:
+                if time.monotonic() < self._next_send.get(chat_id, 0):
+                    continue
+
+                due = db.query(AlertDelivery).filter(
+                    and_(
+                        AlertDelivery.chat_id == chat_id,
+                        AlertDelivery.status == "pending",
+                        AlertDelivery.next_attempt_at <= now
+                    )
+                ).order_by(AlertDelivery.id).limit(self.batch_size).all()
+                if not due:
+                    continue
+
+                text, batch = self._format_batch(due)
+                batches.append((chat_id, text, [delivery.id for delivery in batch]))
+            return batches
+        finally:
+            db.close()
+
+    async def _send_batch(self, chat_id: str, text: str, delivery_ids: List[int]) -> int:
+        loop = asyncio.get_running_loop()
+        self._next_send[chat_id] = time.monotonic() + self.chat_interval
+
+        try:
+            await self.bot.deliver(chat_id, text)
+        except RetryAfter as e:
+            # Flood control is not the message's fault; wait as told without spending an attempt
+            wait = _retry_seconds(e)
+            logger.warning(f"Telegram flood control on chat {chat_id}, retrying in {wait:.0f}s")
+            self._next_send[chat_id] = time.monotonic() + wait
+            return 0
+        except Exception as e:
+            await loop.run_in_executor(None, self._record_failure, delivery_ids, str(e)[:500])
+            logger.error(f"Error delivering {len(delivery_ids)} alerts to chat {chat_id}: {e}")
+            return 0
+
+        await loop.run_in_executor(None, self._record_sent, delivery_ids)
+        logger.info(f"Delivered {len(delivery_ids)} alerts to chat {chat_id}")
+        return len(delivery_ids)
+
+    def _record_failure(self, delivery_ids: List[int], error: str):
+        db = get_session(self.engine)
+        try:
+            for delivery in db.query(AlertDelivery).filter(AlertDelivery.id.in_(delivery_ids)).all():
+                delivery.attempts = (delivery.attempts or 0) + 1
+                delivery.last_error = error
+                if delivery.attempts >= self.max_attempts:
+                    delivery.status = "failed"
+                else:
+                    backoff = min(self.poll_interval * 2 ** delivery.attempts, self.max_backoff)
+                    delivery.next_attempt_at = datetime.utcnow() + timedelta(seconds=backoff)
+            db.commit()
+        finally:
+            db.close()
+
+    def _record_sent(self, delivery_ids: List[int]):
+        db = get_session(self.engine)
+        try:
+            batch = db.query(AlertDelivery).filter(AlertDelivery.id.in_(delivery_ids)).all()
+            sent_at = datetime.utcnow()
+            for delivery in batch:
+                delivery.status = "sent"
+                delivery.sent_at = sent_at
+                delivery.attempts = (delivery.attempts or 0) + 1
+            db.flush()
+
+            # An alert counts as sent once every chat has it
+            for delivery in batch:
+                outstanding = db.query(AlertDelivery.id).filter(
+                    and_(AlertDelivery.alert_id == delivery.alert_id, AlertDelivery.status != "sent")
+                ).first()
+                if not outstanding:
+                    delivery.alert.sent_status = True
+            db.commit()
+        finally:
+            db.close()
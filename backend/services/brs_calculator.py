@@ -1,283 +1,259 @@
-from typing import Dict, Optional, Tuple
-from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+import copy
+import json
 import logging
+import operator
+import os
+import threading
+import time
+
+from services.brs_profiles import DEFAULT_PROFILE, PROFILES
 
 logger = logging.getLogger(__name__)
 
+_OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+_INPUT_METRICS = (
+    "buys_24h", "sells_24h", "volume_24h", "liquidity_usd", "market_cap",
+    "price_change_24h", "price_change_6h", "price_change_1h", "price_change_5m",
+)
+
+
+def _build_metrics(data: Dict) -> Dict[str, float]:
+    """Normalize token data into the flat metric map the rules are written against"""
+    metrics = {name: float(data.get(name) or 0) for name in _INPUT_METRICS}
+
+    buys = metrics["buys_24h"]
+    sells = metrics["sells_24h"]
+    liquidity = metrics["liquidity_usd"]
+    volume = metrics["volume_24h"]
+    market_cap = metrics["market_cap"]
+
+    metrics["buy_sell_ratio"] = buys / sells if sells else float("inf")
+    metrics["liquidity_to_mcap"] = liquidity / market_cap if market_cap > 0 else 0.0
+    metrics["volume_to_liquidity"] = volume / liquidity if liquidity > 0 else 0.0
+    metrics["volume_to_mcap_pct"] = volume / market_cap * 100 if market_cap > 0 else 0.0
+    return metrics
+
+
+def _compile_operand(spec) -> Callable[[Dict], float]:
+    if isinstance(spec, dict):
+        metric = spec["metric"]
+        scale = float(spec.get("scale", 1))
+        return lambda m: m[metric] * scale
+    value = float(spec)
+    return lambda m: value
+
+
+def _compile_condition(spec) -> Callable[[Dict], bool]:
+    metric, op_name, rhs = spec
+    op = _OPERATORS[op_name]
+    if isinstance(rhs, dict):
+        rhs_fn = _compile_operand(rhs)
+        return lambda m: op(m[metric], rhs_fn(m))
+    value = float(rhs)
+    return lambda m: op(m[metric], value)
+
+
+def _compile_value(spec):
+    if isinstance(spec, dict):
+        metric = spec["metric"]
+        scale = float(spec.get("scale", 1))
+        offset = float(spec.get("offset", 0))
+        low, high = spec.get("clamp", (float("-inf"), float("inf")))
+        digits = spec.get("round")
+        if digits is not None:
+            return lambda m: round(max(low, min(high, m[metric] * scale + offset)), digits)
+        return lambda m: max(low, min(high, m[metric] * scale + offset))
+    return lambda m: spec
+
+
+def _compile_rules(rules: List[Dict]) -> Tuple:
+    return tuple(
+        (tuple(_compile_condition(c) for c in rule.get("when", [])), _compile_value(rule["score"]))
+        for rule in rules
+    )
+
+
+def _first_match(rules: Tuple, metrics: Dict, default):
+    for conditions, value in rules:
+        for condition in conditions:
+            if not condition(metrics):
+                break
+        else:
+            return value(metrics)
+    return default
+
+
+class CompiledProfile:
+    """A scoring profile turned into plain callables, evaluated without re-reading the table"""
+
+    def __init__(self, name: str, spec: Dict):
+        self.name = name
+        self.round = spec.get("round", 2)
+        self.component_round = spec.get("component_round")
+        self.clamp = spec.get("clamp")
+        self.error_score = spec.get("error_score", 0)
+
+        self.components = []
+        self.max_scores = {}
+        for component, cspec in spec["components"].items():
+            bonuses = tuple(_compile_rules(group) for group in cspec.get("bonuses", []))
+            low, high = cspec.get("clamp", (float("-inf"), float("inf")))
+            self.components.append((
+                f"{component}_score",
+                float(cspec.get("weight", 1.0)),
+                _compile_rules(cspec.get("rules", [])),
+                cspec.get("default", 0.0),
+                bonuses,
+                low,
+                high,
+            ))
+            self.max_scores[component] = cspec.get("max_score")
+
+        self.labels = [
+            (label, _compile_rules(lspec.get("rules", [])), lspec.get("default"))
+            for label, lspec in spec.get("labels", {}).items()
+        ]
+        self.categories = [tuple(c) for c in spec.get("categories", [])]
+
+    def evaluate(self, data: Dict) -> Dict:
+        metrics = _build_metrics(data)
+        result = {}
+        total = 0.0
+
+        for key, weight, rules, default, bonuses, low, high in self.components:
+            score = _first_match(rules, metrics, default)
+            for group in bonuses:
+                score += _first_match(group, metrics, 0)
+            score = max(low, min(high, score))
+            total += score * weight
+            result[key] = round(score, self.component_round) if self.component_round is not None else score
+
+        if self.clamp:
+            total = min(self.clamp[1], max(self.clamp[0], total))
+
+        for label, rules, default in self.labels:
+            result[label] = _first_match(rules, metrics, default)
+
+        return {"brs_score": round(total, self.round), **result}
+
+    def interpret(self, brs_score: float) -> Tuple[str, str]:
+        for threshold, category, description in self.categories:
+            if threshold is None or brs_score >= threshold:
+                return category, description
+        return "Unknown", ""
+
+
+class ProfileRegistry:
+    """Compiles the scoring profiles once and hot-reloads overrides from BRS_PROFILES_PATH"""
+
+    def __init__(self, path: Optional[str] = None, check_interval: float = 5.0):
+        # None: read BRS_PROFILES_PATH on first use, after the app has loaded its .env
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._profiles: Dict[str, CompiledProfile] = {}
+        self._mtime = None
+        self._last_check: Optional[float] = None
+        self._compile({})
+
+    def _compile(self, overrides: Dict):
+        specs = copy.deepcopy(PROFILES)
+        specs.update(overrides)
+        self._profiles = {name: CompiledProfile(name, spec) for name, spec in specs.items()}
+
+    def _reload_if_changed(self):
+        now = time.monotonic()
+        if self._last_check is None:
+            if self.path is None:
+                self.path = os.getenv("BRS_PROFILES_PATH") or ""
+        elif now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        if not self.path:
+            return
+
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+
+        with self._lock:
+            try:
+                with open(self.path) as f:
+                    overrides = json.load(f)
+                self._compile(overrides)
+                self._mtime = mtime
+                logger.info(f"Loaded BRS profiles from {self.path}: {sorted(self._profiles)}")
+            except Exception as e:
+                # Keep serving the previous profiles if the new file is broken
+                self._mtime = mtime
+                logger.error(f"Error loading BRS profiles from {self.path}: {e}")
+
+    def get(self, name: str) -> CompiledProfile:
+        self._reload_if_changed()
+        profile = self._profiles.get(name)
+        if profile is None:
+            logger.warning(f"Unknown BRS profile '{name}', falling back to '{DEFAULT_PROFILE}'")
+            profile = self._profiles[DEFAULT_PROFILE]
+        return profile
+
+    def names(self) -> List[str]:
+        self._reload_if_changed()
+        return sorted(self._profiles)
+
+
+profile_registry = ProfileRegistry()
+
+
 class BRSCalculator:
     """Calculate Bottom Resilience Score for tokens"""
-    
+
+    def __init__(self, profile: Optional[str] = None):
+        self.profile_name = profile or os.getenv("BRS_PROFILE", DEFAULT_PROFILE)
+
+    @property
+    def profile(self) -> CompiledProfile:
+        return profile_registry.get(self.profile_name)
+
     def calculate_brs(self, token_data: Dict, historical_data: Optional[Dict] = None) -> Dict:
         """
         Calculate the complete BRS score and component scores
-        
+
         Returns dict with:
         - brs_score: Total score (0-100)
         - Component scores
         - Additional metrics
         """
+        profile = self.profile
         try:
-            # Calculate all component scores
-            holder_resilience = self._calculate_holder_resilience(token_data)
-            volume_floor = self._calculate_volume_floor(token_data)
-            price_recovery = self._calculate_price_recovery(token_data)
-            distribution_health = self._calculate_distribution_health(token_data)
-            revival_momentum = self._calculate_revival_momentum(token_data)
-            smart_accumulation = self._calculate_smart_accumulation(token_data)
-            
-            # Calculate total BRS score
-            brs_score = (
-                holder_resilience +
-                volume_floor +
-                price_recovery +
-                distribution_health +
-                revival_momentum +
-                smart_accumulation
-            )
-            
-            # Additional metrics
-            buy_sell_ratio = self._calculate_buy_sell_ratio(token_data)
-            volume_trend = self._determine_volume_trend(token_data)
-            price_trend = self._determine_price_trend(token_data)
-            
-            return {
-                "brs_score": round(brs_score, 2),
-                "holder_resilience_score": holder_resilience,
-                "volume_floor_score": volume_floor,
-                "price_recovery_score": price_recovery,
-                "distribution_health_score": distribution_health,
-                "revival_momentum_score": revival_momentum,
-                "smart_accumulation_score": smart_accumulation,
-                "buy_sell_ratio": buy_sell_ratio,
-                "volume_trend": volume_trend,
-                "price_trend": price_trend
-            }
-            
+            return profile.evaluate(token_data)
+
         except Exception as e:
             logger.error(f"Error calculating BRS: {e}")
-            return {"brs_score": 0, "error": str(e)}
-    
-    def _calculate_holder_resilience(self, data: Dict) -> float:
-        """
-        Calculate holder resilience score (20 points max)
-        Based on buy/sell ratio
-        """
-        try:
-            buys = data.get("buys_24h", 0)
-            sells = data.get("sells_24h", 0)
-            
-            if sells == 0:
-                return 20.0
-            
-            ratio = buys / sells
-            
-            if ratio > 1.2:
-                return 20.0
-            elif ratio > 1.0:
-                return 15.0
-            elif ratio > 0.8:
-                return 10.0
-            else:
-                return 5.0
-                
-        except Exception:
-            return 5.0
-    
-    def _calculate_volume_floor(self, data: Dict) -> float:
-        """
-        Calculate volume floor score (20 points max)
-        Based on 24h volume - adjusted for 50k+ volume tokens
-        """
-        try:
-            volume_24h = data.get("volume_24h", 0)
-            
-            # Adjusted for higher volume requirements
-            if volume_24h >= 500000:  # 500k+ volume
-                return 20.0
-            elif volume_24h >= 250000:  # 250k+ volume
-                return 18.0
-            elif volume_24h >= 100000:  # 100k+ volume
-                return 15.0
-            elif volume_24h >= 50000:   # 50k+ volume (minimum)
-                return 12.0
-            elif volume_24h >= 25000:
-                return 8.0
-            else:
-                return 5.0
-                
-        except Exception:
-            return 5.0
-    
-    def _calculate_price_recovery(self, data: Dict) -> float:
-        """
-        Calculate price recovery score (20 points max)
-        Based on recent price movement - check multiple timeframes
-        """
-        try:
-            price_change_24h = data.get("price_change_24h", 0)
-            price_change_6h = data.get("price_change_6h", 0)
-            price_change_1h = data.get("price_change_1h", 0)
-            
-            # Check for recovery patterns
-            if price_change_1h > 5 and price_change_6h > 0:
-                # Strong recent recovery
-                return 20.0
-            elif price_change_24h > 0:
-                # Positive 24h change
-                return 18.0
-            elif price_change_6h > 0 and price_change_1h > -2:
-                # Recent stabilization/recovery
-                return 15.0
-            elif price_change_24h >= -5:
-                # Minimal decline
-                return 12.0
-            elif price_change_24h >= -10:
-                # Moderate decline
-                return 8.0
-            else:
-                # Still falling
-                return 5.0
-                
-        except Exception:
-            return 5.0
-    
-    def _calculate_distribution_health(self, data: Dict) -> float:
-        """
-        Calculate distribution health score (10 points max)
-        Based on liquidity and market cap ratio
-        """
-        try:
-            liquidity = data.get("liquidity_usd", 0)
-            market_cap = data.get("market_cap", 0)
-            
-            # Check liquidity to market cap ratio
-            if market_cap > 0:
-                liq_ratio = liquidity / market_cap
-                
-                if liq_ratio >= 0.1:  # 10%+ liquidity/mcap ratio
-                    return 10.0
-                elif liq_ratio >= 0.05:  # 5%+ ratio
-                    return 8.0
-                elif liq_ratio >= 0.02:  # 2%+ ratio
-                    return 6.0
-                else:
-                    return 4.0
-            else:
-                # Fallback to absolute liquidity
-                if liquidity >= 100000:
-                    return 8.0
-                elif liquidity >= 50000:
-                    return 6.0
-                else:
-                    return 3.0
-                
-        except Exception:
-            return 3.0
-    
-    def _calculate_revival_momentum(self, data: Dict) -> float:
-        """
-        Calculate revival momentum score (15 points max)
-        Based on volume trend and price stabilization
-        """
-        try:
-            volume_24h = data.get("volume_24h", 0)
-            price_change_24h = data.get("price_change_24h", 0)
-            price_change_6h = data.get("price_change_6h", 0)
-            buys = data.get("buys_24h", 0)
-            sells = data.get("sells_24h", 0)
-            
-            # Strong revival signs
-            if volume_24h > 100000 and price_change_6h > 0 and buys > sells:
-                return 15.0
-            # Good volume with stabilization
-            elif volume_24h > 50000 and -5 <= price_change_24h <= 20:
-                return 12.0
-            # Decent activity
-            elif volume_24h > 50000 or (price_change_6h > -5 and buys >= sells * 0.8):
-                return 10.0
-            else:
-                return 5.0
-                
-        except Exception:
-            return 5.0
-    
-    def _calculate_smart_accumulation(self, data: Dict) -> float:
-        """
-        Calculate smart accumulation score (15 points max)
-        Based on buy patterns and volume distribution
-        """
-        try:
-            buys = data.get("buys_24h", 0)
-            sells = data.get("sells_24h", 0)
-            volume = data.get("volume_24h", 0)
-            price_change_5m = data.get("price_change_5m", 0)
-            
-            # Strong accumulation patterns
-            if buys > sells * 1.5 and volume > 100000:
-                return 15.0
-            # Good accumulation with high volume
-            elif buys > sells * 1.2 and volume > 50000:
-                return 13.0
-            # Positive buy pressure
-            elif buys > sells and volume > 50000:
-                return 11.0
-            # Recent buying interest
-            elif price_change_5m > 0 and buys > sells * 0.8:
-                return 8.0
-            else:
-                return 5.0
-                
-        except Exception:
-            return 5.0
-    
-    def _calculate_buy_sell_ratio(self, data: Dict) -> float:
-        """Calculate buy/sell ratio"""
-        try:
-            buys = data.get("buys_24h", 0)
-            sells = data.get("sells_24h", 1)  # Avoid division by zero
-            return round(buys / sells, 2)
-        except:
-            return 1.0
-    
-    def _determine_volume_trend(self, data: Dict) -> str:
-        """Determine volume trend based on volume levels"""
-        try:
-            volume_24h = data.get("volume_24h", 0)
-            # Adjusted for higher volume tokens
-            if volume_24h > 250000:
-                return "up"
-            elif volume_24h > 100000:
-                return "stable"
-            else:
-                return "down"
-        except:
-            return "unknown"
-    
-    def _determine_price_trend(self, data: Dict) -> str:
-        """Determine price trend based on multiple timeframes"""
-        try:
-            price_change_24h = data.get("price_change_24h", 0)
-            price_change_6h = data.get("price_change_6h", 0)
-            
-            if price_change_6h > 5 or (price_change_24h > 0 and price_change_6h > 0):
-                return "up"
-            elif price_change_24h < -10 and price_change_6h < -5:
-                return "down"
-            else:
-                return "stable"
-        except:
-            return "unknown"
-    
+            return {
+                "brs_score": profile.error_score,
+                **{key: 0 for key, *_ in profile.components},
+                "error": str(e)
+            }
+
+    def get_max_scores(self) -> Dict[str, Optional[float]]:
+        """Maximum points per component for the active profile"""
+        return dict(self.profile.max_scores)
+
     def get_score_interpretation(self, brs_score: float) -> Tuple[str, str]:
         """
         Get interpretation of BRS score
         Returns: (category, description)
         """
-        if brs_score >= 80:
-            return "Phoenix Rising", "Strong buy signal - high recovery potential"
-        elif brs_score >= 60:
-            return "Showing Life", "Add to watchlist - monitoring recommended"
-        elif brs_score >= 40:
-            return "Still Dormant", "Monitor only - not ready yet"
-        else:
-            return "Dead Token", "Avoid - low recovery probability" 
\ No newline at end of file
+        return self.profile.interpret(brs_score)
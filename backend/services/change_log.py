@@ -0,0 +1,130 @@
+"""
+Append-only change log of token, score and alert writes.
+
+A session listener appends one change_log row per inserted, updated or
+deleted Token, BRSScore or Alert in the same flush, so each entry commits
+or rolls back with the write it describes. ``seq`` only grows (SQLite
+writers are serialized, and AUTOINCREMENT never hands a value out twice),
+so a consumer that remembers the last seq it applied asks only for newer
+entries: one indexed range scan, O(changes) rather than O(universe).
+"""
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+
+from models.database import Alert, BRSScore, ChangeLog, Token
+from services.json_codec import dumps
+
+logger = logging.getLogger(__name__)
+
+# Mapped class -> entity name in the log
+TRACKED_ENTITIES = {Token: "token", BRSScore: "score", Alert: "alert"}
+
+# Entries older than this are pruned; consumers further behind must resync
+CHANGE_LOG_RETENTION_DAYS = 7
+
+
+def _entry(obj, entity: str, op: str, now: datetime) -> Dict:
+    mapper = inspect(obj).mapper
+    data = {}
+    if op != "delete":
+        for attr in mapper.column_attrs:
+            value = getattr(obj, attr.key)
+            data[attr.key] = value.isoformat() if isinstance(value, (datetime, date)) else value
+    return {
+        "entity": entity,
+        "entity_id": str(mapper.primary_key_from_instance(obj)[0]),
+        "op": op,
+        "token_address": obj.address if isinstance(obj, Token) else obj.token_address,
+        "payload": dumps(data).decode(),
+        "created_at": now,
+    }
+
+
+def _log_flush(session: Session, flush_context):
+    # new/dirty/deleted still describe the flush that just ran, and score/alert ids are assigned
+    now = datetime.utcnow()
+    entries = []
+    for op, objects in (("insert", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for obj in objects:
+            entity = TRACKED_ENTITIES.get(type(obj))
+            if entity is None or (op == "update" and not session.is_modified(obj, include_collections=False)):
+                continue
+            entries.append(_entry(obj, entity, op, now))
+    if entries:
+        # Core insert on the flush's connection: same transaction, no ORM state to manage
+        session.connection().execute(ChangeLog.__table__.insert(), entries)
+
+
+def install_change_log():
+    """Log tracked writes made through any session"""
+    if not event.contains(Session, "after_flush", _log_flush):
+        event.listen(Session, "after_flush", _log_flush)
+
+
+def get_changes(db: Session, since: int, limit: int) -> Optional[Dict]:
+    """
+    Entries after seq ``since``, oldest first
+
+    Returns dict with:
+    - body: JSON array of entries, each with its payload spliced in as stored
+    - next: seq to pass as ``since`` next time
+    - has_more: whether more entries are already waiting
+
+    Returns None when entries after ``since`` have been pruned and the
+    consumer has to resync from the full endpoints.
+    """
+    rows = db.query(ChangeLog).filter(ChangeLog.seq > since).order_by(ChangeLog.seq).limit(limit + 1).all()
+    if rows and since and rows[0].seq > since + 1 and _pruned_after(db, since):
+        return None
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items: List[bytes] = []
+    for row in rows:
+        head = dumps({
+            "seq": row.seq,
+            "entity": row.entity,
+            "id": row.entity_id,
+            "op": row.op,
+            "token_address": row.token_address,
+            "at": row.created_at.isoformat(),
+        })
+        items.append(head[:-1] + b',"data":' + (row.payload or "{}").encode() + b"}")
+    return {
+        "body": b"[" + b",".join(items) + b"]",
+        "next": rows[-1].seq if rows else since,
+        "has_more": has_more,
+    }
+
+
+def latest_seq(db: Session) -> int:
+    """Seq of the newest entry, where a consumer that just resynced continues from"""
+    return db.query(func.max(ChangeLog.seq)).scalar() or 0
+
+
+def _pruned_after(db: Session, since: int) -> bool:
+    # Sequences elsewhere can skip values on rollback; only entries older than the oldest kept were pruned
+    oldest = db.query(func.min(ChangeLog.seq)).scalar()
+    return oldest is not None and oldest > since + 1
+
+
+def prune_change_log(db: Session, retention_days: float = CHANGE_LOG_RETENTION_DAYS) -> int:
+    """Delete entries older than the retention window, always keeping the newest so a pruned gap stays detectable"""
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        newest = latest_seq(db)
+        deleted = db.query(ChangeLog).filter(
+            ChangeLog.created_at < cutoff, ChangeLog.seq < newest
+        ).delete(synchronize_session=False)
+        db.commit()
+        if deleted:
+            logger.info(f"Pruned {deleted} change log entries older than {retention_days} days")
+        return deleted
+    except Exception as e:
+        logger.error(f"Error pruning change log: {e}")
+        db.rollback()
+        return 0
@@ -0,0 +1,20 @@
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard encoder
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def loads(data) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,273 @@
+import asyncio
+import base64
+import json
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+from services.json_codec import dumps
+from services.metrics import record_cache
+
+# Filter steps offered by the dashboard; the index keeps a presorted bucket per combination
+MARKET_CAP_TIERS = (500000, 1000000, 5000000, 10000000)
+VOLUME_TIERS = (50000, 100000, 250000, 500000)
+
+# Serialized pages kept per index; the index is replaced every cycle
+MAX_CACHED_PAGES = 256
+
+# Cycle deltas kept for Last-Event-ID resume; a client further behind is told to reload
+MAX_DELTA_HISTORY = 16
+# Comment sent on an idle event stream so proxies keep it open
+SSE_KEEPALIVE_SECONDS = 15
+
+# Sorts after any address, so (-score, _MAX_ADDRESS) bounds every row with that score
+_MAX_ADDRESS = "\U0010ffff"
+
+
+def encode_cursor(brs_score: float, address: str) -> str:
+    """Opaque keyset cursor for the row after (brs_score, address)"""
+    raw = json.dumps([brs_score, address], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """Inverse of encode_cursor; raises ValueError for anything it did not produce"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        brs_score, address = json.loads(raw)
+        return float(brs_score), str(address)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _tier(value: float, tiers: Tuple) -> int:
+    """Index of the highest tier not above value, or -1 below the first tier"""
+    return bisect_right(tiers, value or 0) - 1
+
+
+def _tier_floor(tier: int, tiers: Tuple) -> float:
+    return tiers[tier] if tier >= 0 else 0
+
+
+class _Bucket:
+    __slots__ = ("keys", "rows")
+
+    def __init__(self):
+        self.keys: List[Tuple[float, str]] = []
+        self.rows: List[Dict] = []
+
+
+class LeaderboardIndex:
+    """
+    Immutable in-memory copy of the leaderboard, rebuilt after each discovery cycle
+
+    Rows are kept in rank order (brs_score desc, address asc) and bucketed by
+    chain, market cap tier and volume tier. A query picks the bucket for the
+    tiers at or below its thresholds, bisects to the score cut-off and cursor,
+    and only scans rows when a threshold falls between tiers.
+    """
+
+    def __init__(self, rows: List[Dict]):
+        self.rows = sorted(rows, key=lambda r: (-r["brs_score"], r["address"]))
+        self._buckets: Dict[Tuple[Optional[str], int, int], _Bucket] = {}
+        self._totals: Dict[Tuple, int] = {}
+        self._row_json: Dict[str, bytes] = {}
+        self._by_address: Dict[str, Dict] = {row["address"]: row for row in self.rows}
+        self._pages: Dict[Tuple, Tuple[bytes, Optional[str], int]] = {}
+
+        for row in self.rows:
+            self._row_json[row["address"]] = dumps(row)
+            key = (-row["brs_score"], row["address"])
+            row_mcap_tier = _tier(row.get("market_cap"), MARKET_CAP_TIERS)
+            row_volume_tier = _tier(row.get("volume_24h"), VOLUME_TIERS)
+            chains = (None, row["chain"]) if row.get("chain") else (None,)
+            for chain in chains:
+                for mcap_tier in range(-1, row_mcap_tier + 1):
+                    for volume_tier in range(-1, row_volume_tier + 1):
+                        bucket = self._buckets.get((chain, mcap_tier, volume_tier))
+                        if bucket is None:
+                            bucket = self._buckets[(chain, mcap_tier, volume_tier)] = _Bucket()
+                        bucket.keys.append(key)
+                        bucket.rows.append(row)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get(self, address: str) -> Optional[Dict]:
+        return self._by_address.get(address)
+
+    def query(self, limit: int = 20, after: Optional[Tuple[float, str]] = None,
+              min_score: float = 0, chain: Optional[str] = None,
+              min_market_cap: float = 0, min_volume: float = 0) -> Dict:
+        """Same result shape as TokenManager.get_top_phoenixes_page"""
+        chain = None if chain in (None, "all") else chain
+        mcap_tier = _tier(min_market_cap, MARKET_CAP_TIERS)
+        volume_tier = _tier(min_volume, VOLUME_TIERS)
+        bucket = self._buckets.get((chain, mcap_tier, volume_tier))
+        if bucket is None:
+            return {"items": [], "next_cursor": None, "total": 0}
+
+        end = bisect_right(bucket.keys, (-min_score, _MAX_ADDRESS))
+        start = bisect_right(bucket.keys, (-after[0], after[1])) if after else 0
+
+        # Thresholds on a tier boundary are answered by the bucket alone
+        exact = (
+            _tier_floor(mcap_tier, MARKET_CAP_TIERS) >= min_market_cap
+            and _tier_floor(volume_tier, VOLUME_TIERS) >= min_volume
+        )
+
+        if exact:
+            total = end
+            items = bucket.rows[start:min(end, start + limit + 1)]
+        else:
+            def matches(row):
+                return (row.get("market_cap") or 0) >= min_market_cap and (row.get("volume_24h") or 0) >= min_volume
+
+            totals_key = (chain, min_score, min_market_cap, min_volume)
+            total = self._totals.get(totals_key)
+            if total is None:
+                total = self._totals[totals_key] = sum(1 for row in bucket.rows[:end] if matches(row))
+
+            items = []
+            for row in bucket.rows[start:end]:
+                if matches(row):
+                    items.append(row)
+                    if len(items) > limit:
+                        break
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor(items[-1]["brs_score"], items[-1]["address"])
+
+        return {"items": items, "next_cursor": next_cursor, "total": total}
+
+    def query_json(self, limit: int = 20, after: Optional[Tuple[float, str]] = None,
+                   min_score: float = 0, chain: Optional[str] = None,
+                   min_market_cap: float = 0, min_volume: float = 0) -> Tuple[bytes, Optional[str], int]:
+        """Like query, but returns the page as ready-to-send JSON bytes, serialized once per cycle"""
+        key = (limit, after, min_score, chain, min_market_cap, min_volume)
+        page = self._pages.get(key)
+        record_cache("leaderboard_page", page is not None)
+        if page is None:
+            result = self.query(limit, after, min_score, chain, min_market_cap, min_volume)
+            body = b"[" + b",".join(self._row_json[row["address"]] for row in result["items"]) + b"]"
+            page = (body, result["next_cursor"], result["total"])
+            if len(self._pages) < MAX_CACHED_PAGES:
+                self._pages[key] = page
+        return page
+
+
+class LeaderboardDeltas:
+    """
+    Versioned per-cycle leaderboard changes, serialized once as SSE events and shared by every stream
+
+    Each published index is diffed against the previous one by row JSON:
+    rows that are new or changed go out as upserts, rows that left as
+    removals. Event ids are ``<epoch>-<version>``, so an id from before a
+    restart is never taken for a current version. Streams resuming within
+    MAX_DELTA_HISTORY cycles get the deltas they missed; any other stream
+    gets a ``reset`` event and reloads /api/top-phoenixes.
+    """
+
+    def __init__(self, history: int = MAX_DELTA_HISTORY):
+        self.epoch = str(int(time.time()))
+        self.version = 0
+        self._rows: Dict[str, bytes] = {}  # address -> row JSON as of the current version
+        self._events: Deque[Tuple[int, bytes]] = deque(maxlen=history)
+        self._published = asyncio.Event()
+
+    @property
+    def event_id(self) -> str:
+        return f"{self.epoch}-{self.version}"
+
+    def _frame(self, event: bytes, data: bytes, version: int) -> bytes:
+        return b"id: %s-%d\nevent: %s\ndata: %s\n\n" % (self.epoch.encode(), version, event, data)
+
+    def publish(self, index: LeaderboardIndex):
+        """Diff a new index against the last one and wake every stream; call from the event loop"""
+        rows = index._row_json
+        upserts = [body for address, body in rows.items() if self._rows.get(address) != body]
+        removed = [address for address in self._rows if address not in rows]
+        self._rows = rows
+        self.version += 1
+
+        data = b'{"version":%d,"upsert":[%s],"remove":%s}' % (self.version, b",".join(upserts), dumps(removed))
+        self._events.append((self.version, self._frame(b"delta", data, self.version)))
+        self._published.set()
+        self._published = asyncio.Event()
+
+    def parse_event_id(self, event_id: Optional[str]) -> Optional[int]:
+        epoch, _, version = (event_id or "").partition("-")
+        if epoch != self.epoch or not version.isdigit():
+            return None
+        return int(version)
+
+    def missed(self, version: Optional[int]) -> Optional[List[bytes]]:
+        """Delta events after version, or None when they are no longer all kept"""
+        if version is None or version > self.version:
+            return None
+        oldest = self._events[0][0] if self._events else self.version + 1
+        if version + 1 < oldest:
+            return None
+        return [frame for event_version, frame in self._events if event_version > version]
+
+    async def stream(self, last_event_id: Optional[str]) -> AsyncIterator[bytes]:
+        """SSE body for one client, resuming after last_event_id"""
+        yield b"retry: 5000\n\n"
+        version = self.parse_event_id(last_event_id)
+        while True:
+            # Snapshot before yielding: a publish while a slow client holds us at a yield
+            # must leave this event set and its delta after ``version``
+            sent_through, published = self.version, self._published
+            frames = self.missed(version)
+            if frames is None:
+                frames = [self._frame(b"reset", b'{"version":%d}' % sent_through, sent_through)]
+            for frame in frames:
+                yield frame
+            version = sent_through
+
+            try:
+                await asyncio.wait_for(published.wait(), SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+
+
+class LeaderboardState:
+    """Per-cycle leaderboard bookkeeping shared by the API and the discovery task"""
+
+    def __init__(self):
+        self.cycle_id = 0
+        self.completed_at: Optional[datetime] = None
+        self.index: Optional[LeaderboardIndex] = None
+        self.stats: Dict = {}
+        self._counts: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self.deltas = LeaderboardDeltas()
+
+    def complete_cycle(self, index: Optional[LeaderboardIndex] = None, stats: Optional[Dict] = None):
+        """Called after each discovery cycle; swaps in the new index and stats and drops the previous cycle's caches"""
+        with self._lock:
+            self.index = index
+            self.stats = stats or {}
+            self.cycle_id += 1
+            self.completed_at = datetime.utcnow()
+            self._counts.clear()
+        if index is not None:
+            self.deltas.publish(index)
+
+    def get_count(self, key: Hashable, compute: Callable[[], int]) -> int:
+        """Total rows for a filter combination, computed at most once per cycle"""
+        count = self._counts.get(key)
+        record_cache("leaderboard_count", count is not None)
+        if count is None:
+            count = compute()
+            with self._lock:
+                self._counts[key] = count
+        return count
+
+
+leaderboard_state = LeaderboardState()
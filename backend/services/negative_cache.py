@@ -0,0 +1,135 @@
+"""
+Negative cache of token addresses that were recently rejected or not found.
+
+Rejections are kept in a bounded exact map (address -> reason, expiry)
+and also added to a Bloom filter per reason. The exact map is
+authoritative; the Bloom filters only answer for addresses that were
+pushed out of it, at the cost of rare false positives, so callers that
+must not guess (API lookups) ask with ``probable=False``.
+
+Each reason has its own re-check window. Bloom filters cannot forget
+single entries, so every reason keeps two generations rotated every half
+window: an address stays in them for at most one window, never longer
+than its exact entry.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from services.metrics import record_cache
+
+# Seconds before a rejected token is looked at again, by rejection reason
+REJECTION_TTLS = {
+    "not_found": 6 * 3600,   # No pairs on Dexscreener
+    "address": 24 * 3600,
+    "market_cap": 3600,
+    "liquidity": 1800,
+    "price": 1800,
+    "volume": 900,
+    "pattern": 600,
+}
+DEFAULT_REJECTION_TTL = 900
+
+
+class _BloomFilter:
+    def __init__(self, bits: int, hashes: int):
+        self.bits = bits
+        self.hashes = hashes
+        self.array = bytearray(bits // 8)
+
+    def _positions(self, key: str):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.array[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.array[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class _BloomGenerations:
+    """Current and previous Bloom filter for one reason, rotated every half TTL"""
+
+    def __init__(self, ttl: float, bits: int, hashes: int, now: float):
+        self.interval = ttl / 2
+        self.bits = bits
+        self.hashes = hashes
+        self.current = _BloomFilter(bits, hashes)
+        self.previous = _BloomFilter(bits, hashes)
+        self.rotated_at = now
+
+    def _rotate(self, now: float):
+        elapsed = now - self.rotated_at
+        if elapsed < self.interval:
+            return
+        # Generations stay on a fixed grid so an entry never outlives its TTL, however rarely we are called
+        if elapsed < 2 * self.interval:
+            self.previous = self.current
+        else:
+            self.previous = _BloomFilter(self.bits, self.hashes)
+        self.current = _BloomFilter(self.bits, self.hashes)
+        self.rotated_at += self.interval * (elapsed // self.interval)
+
+    def add(self, key: str, now: float):
+        self._rotate(now)
+        self.current.add(key)
+
+    def contains(self, key: str, now: float) -> bool:
+        self._rotate(now)
+        return key in self.current or key in self.previous
+
+
+class NegativeCache:
+    """Recently rejected token addresses, skipped until their reason's re-check window passes"""
+
+    def __init__(self, ttls: Dict[str, float] = REJECTION_TTLS, max_exact: int = 20000,
+                 bloom_bits: int = 1 << 20, bloom_hashes: int = 4):
+        self.ttls = ttls
+        self.max_exact = max_exact
+        self.bloom_bits = bloom_bits
+        self.bloom_hashes = bloom_hashes
+        self._exact: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._blooms: Dict[str, _BloomGenerations] = {}
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def add(self, address: str, reason: str, now: Optional[float] = None):
+        now = now if now is not None else time.time()
+        ttl = self.ttls.get(reason, DEFAULT_REJECTION_TTL)
+
+        self._exact[address] = (reason, now + ttl)
+        self._exact.move_to_end(address)
+        while len(self._exact) > self.max_exact:
+            self._exact.popitem(last=False)
+
+        bloom = self._blooms.get(reason)
+        if bloom is None:
+            bloom = self._blooms[reason] = _BloomGenerations(ttl, self.bloom_bits, self.bloom_hashes, now)
+        bloom.add(address, now)
+
+    def reason(self, address: str, probable: bool = True, now: Optional[float] = None) -> Optional[str]:
+        """Why the address is being skipped, or None if it should be looked at"""
+        now = now if now is not None else time.time()
+        found = None
+
+        entry = self._exact.get(address)
+        if entry is not None:
+            if entry[1] > now:
+                found = entry[0]
+            else:
+                del self._exact[address]
+        elif probable:
+            found = next((r for r, bloom in self._blooms.items() if bloom.contains(address, now)), None)
+
+        record_cache("negative", found is not None)
+        return found
+
+
+negative_cache = NegativeCache()
@@ -0,0 +1,162 @@
+"""
+Opt-in cProfile capture for discovery cycles and sampled API requests.
+
+Nothing is profiled until cycles or requests are armed, either at startup
+(PROFILE_CYCLES, PROFILE_REQUESTS, PROFILE_REQUEST_RATE) or through the
+admin endpoints; while disarmed the hooks cost one integer comparison.
+Each capture is written to PROFILE_DIR as a pstats ``.prof`` file plus a
+``.txt`` summary of the top functions by cumulative time.
+
+cProfile follows the thread, not the task, so a capture taken on the event
+loop includes whatever other coroutines ran meanwhile. Only one capture
+runs at a time; requests arriving during a cycle capture are not sampled.
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import re
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Oldest captures are deleted beyond this many
+MAX_PROFILES = 50
+
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class Profiler:
+    """Arms and records cProfile captures"""
+
+    def __init__(self, profile_dir: str = "./profiles", cycles: int = 0,
+                 requests: int = 0, request_rate: float = 0.0):
+        self.profile_dir = profile_dir
+        self.cycles_remaining = cycles
+        self.requests_remaining = requests
+        self.request_rate = request_rate
+        self._active = False
+
+    def arm(self, cycles: Optional[int] = None, requests: Optional[int] = None,
+            request_rate: Optional[float] = None):
+        if cycles is not None:
+            self.cycles_remaining = max(0, cycles)
+        if requests is not None:
+            self.requests_remaining = max(0, requests)
+        if request_rate is not None:
+            self.request_rate = min(1.0, max(0.0, request_rate))
+
+    def status(self) -> Dict:
+        return {
+            "cycles_remaining": self.cycles_remaining,
+            "requests_remaining": self.requests_remaining,
+            "request_rate": self.request_rate,
+            "profile_dir": self.profile_dir,
+        }
+
+    @contextmanager
+    def cycle(self, label: str = "cycle"):
+        """Profile the enclosed discovery cycle if cycles are armed"""
+        if self.cycles_remaining <= 0 or self._active:
+            yield
+            return
+        self.cycles_remaining -= 1
+        with self._capture(label):
+            yield
+
+    def should_profile_request(self) -> bool:
+        if self.requests_remaining <= 0 or self._active:
+            return False
+        return self.request_rate >= 1.0 or random.random() < self.request_rate
+
+    @contextmanager
+    def request(self, label: str):
+        """Profile the enclosed request; the caller decides with should_profile_request"""
+        self.requests_remaining -= 1
+        with self._capture(label):
+            yield
+
+    @contextmanager
+    def _capture(self, label: str):
+        self._active = True
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._active = False
+            self._save(profile, label, time.perf_counter() - start)
+
+    def _save(self, profile: cProfile.Profile, label: str, elapsed: float):
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+            name = _SAFE_NAME.sub("_", f"{stamp}-{int(time.time() * 1000) % 1000:03d}-{label}")[:120]
+            path = os.path.join(self.profile_dir, name)
+
+            profile.dump_stats(f"{path}.prof")
+
+            summary = io.StringIO()
+            summary.write(f"{label}: {elapsed:.3f}s wall\n\n")
+            pstats.Stats(profile, stream=summary).sort_stats("cumulative").print_stats(50)
+            with open(f"{path}.txt", "w") as f:
+                f.write(summary.getvalue())
+
+            logger.info("Saved profile %s (%.3fs)", name, elapsed)
+            self._prune()
+        except Exception as e:
+            logger.error(f"Error saving profile for {label}: {e}")
+
+    def _prune(self):
+        captures = sorted({os.path.splitext(f)[0] for f in os.listdir(self.profile_dir)
+                           if f.endswith((".prof", ".txt"))})
+        for stale in captures[:-MAX_PROFILES]:
+            for ext in (".prof", ".txt"):
+                path = os.path.join(self.profile_dir, stale + ext)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def list_profiles(self) -> List[Dict]:
+        """Saved files, newest first"""
+        if not os.path.isdir(self.profile_dir):
+            return []
+        files = []
+        for name in os.listdir(self.profile_dir):
+            if not name.endswith((".prof", ".txt")):
+                continue
+            stat = os.stat(os.path.join(self.profile_dir, name))
+            files.append({
+                "name": name,
+                "size": stat.st_size,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(stat.st_mtime)),
+            })
+        return sorted(files, key=lambda f: f["name"], reverse=True)
+
+    def get_path(self, name: str) -> Optional[str]:
+        """Path of a saved file, or None for anything that is not one"""
+        if name != os.path.basename(name) or not name.endswith((".prof", ".txt")):
+            return None
+        path = os.path.join(self.profile_dir, name)
+        return path if os.path.isfile(path) else None
+
+
+class ProfilingMiddleware:
+    """Profiles sampled HTTP requests while request captures are armed"""
+
+    def __init__(self, app, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.should_profile_request():
+            await self.app(scope, receive, send)
+            return
+
+        with self.profiler.request(f"{scope['method']}{scope['path']}"):
+            await self.app(scope, receive, send)
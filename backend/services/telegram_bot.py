@@ -1,24 +1,49 @@
+import html
 import logging
-from typing import List, Optional
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
 from telegram import Bot, Update
 from telegram.ext import Application, CommandHandler, ContextTypes
 import os
 from dotenv import load_dotenv
 
+from models.database import get_session
+from services.alert_dispatcher import TELEGRAM_WATCHER_PREFIX
+from services.alert_engine import alert_engine
+from services.leaderboard import leaderboard_state
+from services.metrics import record_cache
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Same default filters as the dashboard leaderboard
+TOP_FILTERS = {"min_market_cap": 500000, "min_volume": 50000}
+
+def _compact_usd(value: float) -> str:
+    value = value or 0
+    for threshold, suffix in ((1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if value >= threshold:
+            return f"${value / threshold:.1f}{suffix}"
+    return f"${value:,.0f}"
+
 class TelegramAlertBot:
-    def __init__(self):
+    def __init__(self, engine=None):
         self.token = os.getenv("TELEGRAM_BOT_TOKEN")
         self.chat_id = os.getenv("TELEGRAM_CHAT_ID")
+        # Point at a local fake (see fake_telegram.py) to exercise the bot offline
+        self.base_url = os.getenv("TELEGRAM_API_BASE_URL", "https://api.telegram.org/bot")
+        self.engine = engine
         self.bot = None
         self.app = None
+        self.started_at = time.time()
+        # name -> (cycle_id, text); command replies are rendered once per discovery cycle
+        self._rendered: Dict[str, Tuple[int, str]] = {}
         
         if self.token:
-            self.bot = Bot(token=self.token)
-            self.app = Application.builder().token(self.token).build()
+            self.bot = Bot(token=self.token, base_url=self.base_url)
+            self.app = Application.builder().token(self.token).base_url(self.base_url).build()
             self._setup_handlers()
     
     def _setup_handlers(self):
@@ -52,11 +77,49 @@ Let's find some phoenixes! 🚀
         """
         await update.message.reply_text(welcome_message)
     
+    def _render_cached(self, name: str, render: Callable[[], str]) -> str:
+        cycle_id = leaderboard_state.cycle_id
+        cached = self._rendered.get(name)
+        record_cache("bot_render", cached is not None and cached[0] == cycle_id)
+        if cached is None or cached[0] != cycle_id:
+            cached = self._rendered[name] = (cycle_id, render())
+        return cached[1]
+    
+    def _render_top(self) -> str:
+        index = leaderboard_state.index
+        if index is None:
+            return "⏳ The first scan is still running, try again in a few minutes."
+        
+        tokens = index.query(limit=5, **TOP_FILTERS)["items"]
+        if not tokens:
+            return "🔍 No phoenix tokens match right now."
+        
+        lines = ["🔥 <b>Top Phoenix Tokens</b>", ""]
+        for rank, token in enumerate(tokens, 1):
+            lines.append(
+                f"{rank}. <b>{html.escape(token['symbol'] or '')}</b> ({token['chain']}) - "
+                f"BRS {token['brs_score']:.1f}, {token['category']}"
+            )
+            lines.append(
+                f"    MC {_compact_usd(token['market_cap'])} · Vol {_compact_usd(token['volume_24h'])} · "
+                f"24h {token['price_change_24h']:+.1f}%"
+            )
+        return "\n".join(lines)
+    
+    def _render_stats(self) -> str:
+        stats = leaderboard_state.stats
+        return f"""
+📊 Bot Statistics:
+
+🔍 Tokens Tracked: {stats.get("tokens_tracked", 0)}
+🔥 Phoenixes Found: {stats.get("phoenixes_found", 0)}
+📢 Alerts Sent: {stats.get("alerts_sent", 0)}
+👀 Watched Tokens: {stats.get("watched_tokens", 0)}
+"""
+    
     async def top_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /top command"""
-        # This would connect to your token manager to get top tokens
-        await update.message.reply_text("🔍 Fetching top phoenix tokens...")
-        # Implementation would fetch from database
+        await update.message.reply_text(self._render_cached("top", self._render_top), parse_mode="HTML")
     
     async def alert_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /alert command"""
@@ -73,22 +136,42 @@ Let's find some phoenixes! 🚀
             return
         
         address = context.args[0]
-        await update.message.reply_text(f"📊 Now tracking token: {address}")
-        # Implementation would add to watchlist
+        try:
+            threshold = float(context.args[1]) if len(context.args) > 1 else 80.0
+        except ValueError:
+            await update.message.reply_text("❌ Please provide a valid number for threshold")
+            return
+        
+        index = leaderboard_state.index
+        token = index.get(address) if index else None
+        if token is None or self.engine is None:
+            await update.message.reply_text(f"❌ Token {address} is not on the leaderboard yet")
+            return
+        
+        session = get_session(self.engine)
+        try:
+            added = alert_engine.add_watch(session, address, f"{TELEGRAM_WATCHER_PREFIX}{update.effective_chat.id}", threshold)
+        except Exception as e:
+            logger.error(f"Error tracking {address} from Telegram: {e}")
+            session.rollback()
+            await update.message.reply_text("❌ Could not track this token, please try again later")
+            return
+        finally:
+            session.close()
+        
+        if added:
+            await update.message.reply_text(f"📊 Now tracking {token['symbol']}, alerting from BRS {threshold:.0f}")
+        else:
+            await update.message.reply_text(f"📊 Already tracking {token['symbol']}")
     
     async def stats_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /stats command"""
-        stats_message = """
-📊 Bot Statistics:
-
-🔍 Tokens Tracked: 0
-🔥 Phoenixes Found: 0
-📢 Alerts Sent: 0
-⏱️ Uptime: 0h
-
-Last scan: Just now
-        """
-        await update.message.reply_text(stats_message)
+        uptime_hours = (time.time() - self.started_at) / 3600
+        completed_at = leaderboard_state.completed_at
+        last_scan = f"{int((datetime.utcnow() - completed_at).total_seconds() // 60)} min ago" if completed_at else "Never"
+        
+        stats_message = self._render_cached("stats", self._render_stats)
+        await update.message.reply_text(f"{stats_message}⏱️ Uptime: {uptime_hours:.0f}h\n\nLast scan: {last_scan}")
     
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /help command"""
@@ -111,6 +194,14 @@ Last scan: Just now
             logger.error(f"Error sending Telegram alert: {e}")
             return False
     
+    async def deliver(self, chat_id: str, message: str, parse_mode: str = "HTML"):
+        """Send to one chat, letting Telegram errors propagate so the caller can retry"""
+        await self.bot.send_message(
+            chat_id=chat_id,
+            text=message,
+            parse_mode=parse_mode
+        )
+    
     async def send_phoenix_alert(self, token_data: dict):
         """Send formatted phoenix alert"""
         message = f"""
@@ -19,13 +19,12 @@ async def test_discovery():
         
         print(f"\nFound {len(tokens)} potential phoenix tokens:")
         for i, token in enumerate(tokens[:5]):  # Show first 5
-            base = token.get("baseToken", {})
-            print(f"\n{i+1}. {base.get('symbol', 'Unknown')} ({base.get('name', 'Unknown')})")
-            print(f"   Address: {base.get('address', 'Unknown')}")
-            print(f"   24h Change: {token.get('priceChange', {}).get('h24', 0):.2f}%")
-            print(f"   Liquidity: ${token.get('liquidity', {}).get('usd', 0):,.0f}")
-            print(f"   Volume: ${token.get('volume', {}).get('h24', 0):,.0f}")
-            print(f"   Market Cap: ${token.get('marketCap', 0):,.0f}")
+            print(f"\n{i+1}. {token.symbol or 'Unknown'} ({token.name or 'Unknown'})")
+            print(f"   Address: {token.address or 'Unknown'}")
+            print(f"   24h Change: {token.price_change_24h:.2f}%")
+            print(f"   Liquidity: ${token.liquidity_usd:,.0f}")
+            print(f"   Volume: ${token.volume_24h:,.0f}")
+            print(f"   Market Cap: ${token.market_cap:,.0f}")
             
     finally:
         await service.close()
@@ -0,0 +1,24 @@
+import os
+
+import pytest
+
+# app.main builds its engine and background services at import; keep them in memory and idle
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("DISCOVERY_CHAINS", "none")
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """app.main on a fresh in-memory database, without running the startup tasks"""
+    import app.main as main
+    from models.database import init_db
+
+    monkeypatch.setattr(main, "engine", init_db("sqlite://"))
+    return main
+
+
+@pytest.fixture
+def client(api):
+    from fastapi.testclient import TestClient
+
+    return TestClient(api.app)
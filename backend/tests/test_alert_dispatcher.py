@@ -0,0 +1,86 @@
+import asyncio
+import threading
+from datetime import datetime
+
+from models.database import Alert, AlertDelivery, Token, Watchlist, get_session, init_db
+from services import alert_dispatcher
+from services.alert_dispatcher import TELEGRAM_WATCHER_PREFIX, AlertDispatcher
+
+
+class FakeBot:
+    bot = object()
+    chat_id = "100"
+
+    def __init__(self):
+        self.sent = []
+
+    async def deliver(self, chat_id: str, message: str):
+        self.sent.append((chat_id, message))
+
+
+def test_alerts_reach_configured_chats_and_tracking_chats_past_their_threshold():
+    engine = init_db("sqlite://")
+    db = get_session(engine)
+    db.add_all([Token(address="hot", symbol="HOT"), Token(address="warm", symbol="WARM")])
+    db.add_all([
+        Watchlist(token_address="hot", user_id=f"{TELEGRAM_WATCHER_PREFIX}200", alert_threshold=80),
+        Watchlist(token_address="warm", user_id=f"{TELEGRAM_WATCHER_PREFIX}200", alert_threshold=80),
+        Watchlist(token_address="hot", user_id="default", alert_threshold=50),
+    ])
+    db.add_all([
+        Alert(token_address="hot", alert_type="phoenix", message="HOT", score_at_alert=85, timestamp=datetime.utcnow()),
+        Alert(token_address="warm", alert_type="phoenix", message="WARM", score_at_alert=65, timestamp=datetime.utcnow()),
+    ])
+    db.commit()
+
+    bot = FakeBot()
+    dispatcher = AlertDispatcher(bot, engine, chat_interval=0)
+    assert asyncio.run(dispatcher.dispatch_once()) == 3
+
+    sent = {chat_id: message for chat_id, message in bot.sent}
+    assert sorted(sent) == ["100", "200"]
+    assert "HOT" in sent["100"] and "WARM" in sent["100"]
+    assert "HOT" in sent["200"] and "WARM" not in sent["200"]
+    assert all(alert.sent_status for alert in db.query(Alert).all())
+    db.close()
+
+
+class FailingBot(FakeBot):
+    async def deliver(self, chat_id: str, message: str):
+        raise RuntimeError("chat not found")
+
+
+def _queue_alert(engine):
+    db = get_session(engine)
+    db.add(Token(address="hot", symbol="HOT"))
+    db.add(Alert(token_address="hot", alert_type="phoenix", message="HOT", score_at_alert=85, timestamp=datetime.utcnow()))
+    db.commit()
+    db.close()
+
+
+def test_database_work_stays_off_the_event_loop_thread(monkeypatch):
+    engine = init_db("sqlite://")
+    _queue_alert(engine)
+    threads = []
+
+    def recording_session(bound_engine):
+        threads.append(threading.current_thread())
+        return get_session(bound_engine)
+
+    monkeypatch.setattr(alert_dispatcher, "get_session", recording_session)
+    assert asyncio.run(AlertDispatcher(FakeBot(), engine, chat_interval=0).dispatch_once()) == 1
+    assert threads and threading.main_thread() not in threads
+
+
+def test_failed_deliveries_back_off_and_stay_pending():
+    engine = init_db("sqlite://")
+    _queue_alert(engine)
+    dispatcher = AlertDispatcher(FailingBot(), engine, chat_interval=0, max_attempts=2)
+    assert asyncio.run(dispatcher.dispatch_once()) == 0
+
+    db = get_session(engine)
+    delivery = db.query(AlertDelivery).one()
+    assert (delivery.status, delivery.attempts, delivery.last_error) == ("pending", 1, "chat not found")
+    assert delivery.next_attempt_at > datetime.utcnow()
+    assert not db.query(Alert).one().sent_status
+    db.close()
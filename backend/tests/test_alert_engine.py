@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+from services.alert_engine import AlertEngine
+from services.brs_calculator import BRSCalculator
+
+NOW = datetime(2026, 1, 1, 12)
+
+
+def _alerted(engine, scored, now=NOW):
+    return [alert.token_address for alert in engine.evaluate(scored, BRSCalculator("classic"), now=now)]
+
+
+def test_unwatched_tokens_alert_from_the_default_threshold():
+    engine = AlertEngine(default_threshold=60)
+
+    assert _alerted(engine, [("a", "A", 59.9), ("b", "B", 60.0)]) == ["b"]
+
+
+def test_watchers_lower_but_never_raise_the_threshold():
+    engine = AlertEngine(default_threshold=60)
+    engine.watch("eager", 40)
+    engine.watch("strict", 80)
+    engine.watch("strict", 90)
+
+    assert engine.threshold_for("eager") == 40
+    assert engine.threshold_for("strict") == 60
+    assert _alerted(engine, [("eager", "E", 45), ("strict", "S", 65)]) == ["eager", "strict"]
+
+
+def test_cooldown_suppresses_repeat_alerts_until_it_expires():
+    engine = AlertEngine(cooldown_hours=24)
+
+    assert _alerted(engine, [("a", "A", 70), ("a", "A", 75)]) == ["a"]
+    assert _alerted(engine, [("a", "A", 70)], now=NOW + timedelta(hours=23)) == []
+    assert _alerted(engine, [("a", "A", 70)], now=NOW + timedelta(hours=24, seconds=1)) == ["a"]
+
+
+def test_forget_releases_the_cooldown_of_unsaved_alerts():
+    engine = AlertEngine()
+    alerts = engine.evaluate([("a", "A", 70)], BRSCalculator("classic"), now=NOW)
+
+    engine.forget(alerts)
+    assert _alerted(engine, [("a", "A", 70)], now=NOW + timedelta(minutes=1)) == ["a"]
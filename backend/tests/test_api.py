@@ -0,0 +1,106 @@
+import pytest
+
+from models.database import Alert, Token, get_session
+from services.leaderboard import LeaderboardIndex, LeaderboardState
+
+
+def _add_alert(engine, address="a"):
+    db = get_session(engine)
+    if db.get(Token, address) is None:
+        db.add(Token(address=address, symbol=address.upper()))
+    db.add(Alert(token_address=address, alert_type="phoenix_rising", message="up", score_at_alert=80.0))
+    db.commit()
+    db.close()
+
+
+def test_recent_alerts_etag_changes_when_an_alert_is_created_between_cycles(api, client):
+    _add_alert(api.engine)
+    first = client.get("/api/alerts/recent")
+    assert first.status_code == 200 and len(first.json()) == 1
+    etag = first.headers["ETag"]
+    assert client.get("/api/alerts/recent", headers={"If-None-Match": etag}).status_code == 304
+
+    # No discovery cycle completes in between
+    _add_alert(api.engine)
+    second = client.get("/api/alerts/recent", headers={"If-None-Match": etag})
+    assert second.status_code == 200 and len(second.json()) == 2
+    assert second.headers["ETag"] != etag
+
+
+def test_recent_alerts_etag_changes_when_an_alert_is_sent(api, client):
+    _add_alert(api.engine)
+    etag = client.get("/api/alerts/recent").headers["ETag"]
+    db = get_session(api.engine)
+    db.query(Alert).update({Alert.sent_status: True})
+    db.commit()
+    db.close()
+    assert client.get("/api/alerts/recent", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_wildcard_if_none_match_counts_as_an_etag_hit(api, client, monkeypatch):
+    hits = []
+    monkeypatch.setattr(api, "record_cache", lambda kind, hit: hits.append((kind, hit)))
+    assert client.get("/api/alerts/recent", headers={"If-None-Match": "*"}).status_code == 304
+    assert hits == [("etag", True)]
+
+
+def _request_count(client, endpoint):
+    prefix = f'bottom_http_request_seconds_count{{method="GET",endpoint="{endpoint}",status="200"}} '
+    for line in client.get("/metrics").text.splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return 0.0
+
+
+def test_metrics_count_requests_per_endpoint(client):
+    before = _request_count(client, "health_check")
+    for _ in range(3):
+        client.get("/health")
+    response = client.get("/metrics")
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE bottom_http_request_seconds histogram" in response.text
+    assert _request_count(client, "health_check") == before + 3
+
+
+@pytest.mark.parametrize("path", ["/admin/profiling", "/admin/profiles"])
+def test_admin_endpoints_require_the_admin_token(client, monkeypatch, path):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert client.get(path, headers={"X-Admin-Token": "secret"}).status_code == 403
+
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    assert client.get(path).status_code == 403
+    assert client.get(path, headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get(path, headers={"X-Admin-Token": "secret"}).status_code == 200
+
+
+def test_index_served_top_phoenixes_headers_match_the_index(api, client, monkeypatch):
+    state = LeaderboardState()
+    monkeypatch.setattr(api, "leaderboard_state", state)
+    rows = [{
+        "address": f"token{i:02d}", "symbol": f"T{i}", "chain": "solana" if i % 2 else "base",
+        "brs_score": float(40 + i), "market_cap": 2000000 if i % 3 else 100000, "volume_24h": 300000,
+    } for i in range(20)]
+    state.complete_cycle(LeaderboardIndex(rows))
+
+    addresses, cursor = [], None
+    while True:
+        params = {"chain": "solana", "limit": 4, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/top-phoenixes", params=params)
+        assert response.status_code == 200
+        assert response.headers["X-Leaderboard-Version"] == state.deltas.event_id
+        total = state.index.query(limit=1, chain="solana", min_market_cap=500000, min_volume=50000)["total"]
+        assert response.headers["X-Total-Count"] == str(total)
+        addresses.extend(row["address"] for row in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    expected = [row["address"] for row in sorted(rows, key=lambda r: -r["brs_score"])
+                if row["chain"] == "solana" and row["market_cap"] >= 500000]
+    assert addresses == expected and len(expected) == total
+
+    version = response.headers["X-Leaderboard-Version"]
+    state.complete_cycle(LeaderboardIndex(rows[:5]))
+    response = client.get("/api/top-phoenixes", params={"chain": "solana"})
+    assert response.headers["X-Leaderboard-Version"] != version
+    assert response.headers["X-Total-Count"] == str(len(response.json())) == "1"
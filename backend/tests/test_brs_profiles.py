@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from services.brs_calculator import BRSCalculator, ProfileRegistry
+
+TOKENS = {
+    "recovering": dict(buys_24h=120, sells_24h=80, volume_24h=600000, liquidity_usd=200000, market_cap=5000000,
+                       price_change_24h=8, price_change_6h=3, price_change_1h=8, price_change_5m=1),
+    "stabilizing": dict(buys_24h=50, sells_24h=50, volume_24h=60000, liquidity_usd=60000, market_cap=500000,
+                        price_change_24h=-3, price_change_6h=2, price_change_1h=-1, price_change_5m=0),
+    "falling": dict(buys_24h=5, sells_24h=100, volume_24h=10000, liquidity_usd=5000, market_cap=50000,
+                    price_change_24h=-60, price_change_6h=-10, price_change_1h=-5, price_change_5m=-1),
+    "no_sells": dict(buys_24h=10, sells_24h=0, volume_24h=120000, liquidity_usd=20000, market_cap=0,
+                     price_change_24h=0, price_change_6h=0, price_change_1h=0),
+    # Every field present, as PairRecord.to_dict produces it
+    "inactive": dict(buys_24h=0, sells_24h=0, volume_24h=0, liquidity_usd=0, market_cap=0,
+                     price_change_24h=0, price_change_6h=0, price_change_1h=0, price_change_5m=0),
+}
+
+COMPONENTS = ("holder_resilience", "volume_floor", "price_recovery",
+              "distribution_health", "revival_momentum", "smart_accumulation")
+
+# Scores from the hard-coded calculators the profiles replaced:
+# classic from backend/services/brs_calculator.py, weighted from api/main.py
+CLASSIC = {
+    "recovering": (94.0, (20, 20, 20, 6, 15, 13), 1.5, "up", "up"),
+    "stabilizing": (64.0, (10, 12, 15, 10, 12, 5), 1.0, "down", "stable"),
+    "falling": (35.0, (5, 5, 5, 10, 5, 5), 0.05, "down", "down"),
+    "no_sells": (77.0, (20, 15, 12, 3, 12, 15), 1.0, "stable", "stable"),
+    "inactive": (55.0, (20, 5, 12, 3, 10, 5), 1.0, "down", "stable"),
+}
+WEIGHTED = {
+    "recovering": (76.4, (80, 66, 56, 75, 85, 70)),
+    "stabilizing": (58.4, (50, 66, 40, 60, 40, 70)),
+    "falling": (57.0, (80, 90, 15, 30, 40, 35)),
+    "no_sells": (63.8, (80, 65, 40, 45, 60, 55)),
+    "inactive": (35.5, (30, 25, 40, 30, 40, 35)),
+}
+
+
+@pytest.mark.parametrize("token", TOKENS)
+def test_classic_profile_matches_original_calculator(token):
+    brs_score, components, buy_sell_ratio, volume_trend, price_trend = CLASSIC[token]
+    result = BRSCalculator("classic").calculate_brs(TOKENS[token])
+
+    assert result["brs_score"] == brs_score
+    assert [result[f"{c}_score"] for c in COMPONENTS] == list(components)
+    assert result["buy_sell_ratio"] == buy_sell_ratio
+    assert result["volume_trend"] == volume_trend
+    assert result["price_trend"] == price_trend
+
+
+@pytest.mark.parametrize("token", TOKENS)
+def test_weighted_profile_matches_original_calculator(token):
+    brs_score, components = WEIGHTED[token]
+    result = BRSCalculator("weighted").calculate_brs(TOKENS[token])
+
+    assert result["brs_score"] == brs_score
+    assert [result[f"{c}_score"] for c in COMPONENTS] == list(components)
+
+
+def test_max_scores_bound_component_scores():
+    for profile in ("classic", "weighted"):
+        calculator = BRSCalculator(profile)
+        max_scores = calculator.get_max_scores()
+        for data in TOKENS.values():
+            result = calculator.calculate_brs(data)
+            assert all(0 <= result[f"{c}_score"] <= max_scores[c] for c in COMPONENTS)
+
+
+def test_profiles_path_is_read_on_first_use(tmp_path, monkeypatch):
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps({"flat": {"components": {"holder_resilience": {"default": 7, "max_score": 7}}}}))
+    monkeypatch.delenv("BRS_PROFILES_PATH", raising=False)
+    registry = ProfileRegistry()
+
+    # Set after construction, as a .env loaded after the services imports would
+    monkeypatch.setenv("BRS_PROFILES_PATH", str(path))
+    assert "flat" in registry.names()
+    assert registry.get("flat").evaluate({})["brs_score"] == 7
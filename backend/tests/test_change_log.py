@@ -0,0 +1,62 @@
+import json
+from datetime import datetime, timedelta
+
+from models.database import ChangeLog, Token, get_session, init_db
+from services.change_log import get_changes, install_change_log, latest_seq, prune_change_log
+
+
+def _session():
+    install_change_log()
+    return get_session(init_db("sqlite://"))
+
+
+def _seqs(page):
+    return [entry["seq"] for entry in json.loads(page["body"])]
+
+
+def test_writes_are_logged_in_order_and_paged_by_seq():
+    db = _session()
+    db.add(Token(address="a", symbol="A"))
+    db.commit()
+    db.get(Token, "a").symbol = "A2"
+    db.commit()
+
+    page = get_changes(db, 0, limit=1)
+    assert _seqs(page) == [1] and page["has_more"]
+    entries = json.loads(get_changes(db, page["next"], limit=10)["body"])
+    assert [(e["op"], e["data"]["symbol"]) for e in entries] == [("update", "A2")]
+    db.close()
+
+
+def test_pruned_gap_is_reported_but_rollback_gaps_are_not():
+    db = _session()
+    for address in "abcdef":
+        db.add(Token(address=address))
+        db.commit()
+
+    # Sequences on other databases skip values on rollback: a hole in seq with nothing pruned
+    db.query(ChangeLog).filter(ChangeLog.seq == 5).delete()
+    db.commit()
+    assert _seqs(get_changes(db, 4, limit=10)) == [6]
+
+    db.query(ChangeLog).filter(ChangeLog.seq <= 3).update({"created_at": datetime.utcnow() - timedelta(days=30)})
+    db.commit()
+    assert prune_change_log(db) == 3
+
+    # Consumers at or past the oldest kept entry carry on; anyone further behind must resync
+    assert _seqs(get_changes(db, 3, limit=10)) == [4, 6]
+    assert get_changes(db, 2, limit=10) is None
+    assert latest_seq(db) == 6
+    db.close()
+
+
+def test_pruning_keeps_the_newest_entry():
+    db = _session()
+    db.add(Token(address="a"))
+    db.commit()
+    db.query(ChangeLog).update({"created_at": datetime.utcnow() - timedelta(days=30)})
+    db.commit()
+
+    assert prune_change_log(db) == 0
+    assert latest_seq(db) == 1
+    db.close()
@@ -0,0 +1,73 @@
+import asyncio
+
+import httpx
+import pytest
+
+from models.database import Token, get_session, init_db
+from services import discovery_feed, dexscreener, token_manager
+from services.negative_cache import NegativeCache
+from services.pair_resolver import PairResolver
+from services.rate_limiter import DexscreenerLimiter
+from services.token_manager import TokenManager
+
+FEED_TOKENS = 45
+
+
+@pytest.fixture
+def isolated(monkeypatch, tmp_path):
+    limiter = DexscreenerLimiter(limits={"other": {"initial_rate": 1000.0, "max_rate": 1000.0}})
+    for module in (dexscreener, discovery_feed):
+        monkeypatch.setattr(module, "dexscreener_limiter", limiter)
+        monkeypatch.setattr(module, "negative_cache", NegativeCache())
+    monkeypatch.setattr(token_manager, "pair_resolver", PairResolver())
+    monkeypatch.setenv("DISCOVERY_SOURCE", "feed")
+    monkeypatch.setenv("DISCOVERY_CURSOR_PATH", str(tmp_path / "cursor.json"))
+    return init_db("sqlite://")
+
+
+def test_feed_cycles_rescore_tokens_already_tracked(isolated):
+    price = {"usd": "1"}
+    calls = []
+
+    def pair(address):
+        return {"chainId": "solana", "pairAddress": f"pair-{address}", "priceUsd": price["usd"],
+                "baseToken": {"address": address, "symbol": address.upper()}, "quoteToken": {"address": "SOL"},
+                "marketCap": 900000, "fdv": 900000, "liquidity": {"usd": 90000}, "volume": {"h24": 200000},
+                "priceChange": {"h24": -10, "h6": -3, "h1": -1}, "txns": {"h24": {"buys": 10, "sells": 5}}}
+
+    def handler(request):
+        path = request.url.path
+        last = path.rsplit("/", 1)[1].split(",")
+        if path.startswith("/token-profiles"):
+            calls.append("feed")
+            return httpx.Response(200, json=[{"chainId": "solana", "tokenAddress": f"t{i}"} for i in range(FEED_TOKENS)])
+        if path.startswith("/token-boosts"):
+            calls.append("feed")
+            return httpx.Response(200, json=[])
+        if "/pairs/" in path:
+            calls.append("pairs")
+            return httpx.Response(200, json={"pairs": [pair(p[len("pair-"):]) for p in last]})
+        calls.append("tokens")
+        return httpx.Response(200, json=[pair(address) for address in last])
+
+    async def cycle():
+        db = get_session(isolated)
+        manager = TokenManager(db)
+        await manager.dex_service.client.aclose()
+        manager.dex_service.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        await manager.discover_new_phoenixes(["solana"])
+        db.close()
+
+    asyncio.run(cycle())
+    price["usd"] = "2"
+    calls.clear()
+    asyncio.run(cycle())
+
+    # The feed has nothing new, yet every tracked token was re-priced through batched pair lookups
+    assert calls.count("feed") == 3
+    assert "tokens" not in calls
+    assert calls.count("pairs") <= 3
+    db = get_session(isolated)
+    assert db.query(Token).count() == FEED_TOKENS
+    assert db.query(Token).filter(Token.current_price == 2.0).count() == FEED_TOKENS
+    db.close()
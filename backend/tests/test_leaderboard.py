@@ -0,0 +1,118 @@
+import asyncio
+import random
+
+import pytest
+
+from services.leaderboard import LeaderboardDeltas, LeaderboardIndex, decode_cursor, encode_cursor
+
+
+def _rows(count=300, seed=7):
+    rng = random.Random(seed)
+    return [{
+        "address": f"token{i:04d}",
+        "chain": rng.choice(["solana", "base", None]),
+        # Coarse scores so ties are broken by address
+        "brs_score": float(rng.randint(40, 60)),
+        "market_cap": rng.choice([0, 250000, 500000, 750000, 2000000, 20000000]),
+        "volume_24h": rng.choice([0, 50000, 75000, 300000, 1000000]),
+    } for i in range(count)]
+
+
+def _expected(rows, min_score, chain, min_market_cap, min_volume):
+    matching = [
+        row for row in rows
+        if row["brs_score"] >= min_score
+        and chain in (None, "all", row["chain"])
+        and (row["market_cap"] or 0) >= min_market_cap
+        and (row["volume_24h"] or 0) >= min_volume
+    ]
+    return [row["address"] for row in sorted(matching, key=lambda r: (-r["brs_score"], r["address"]))]
+
+
+def _all_pages(index, limit, **filters):
+    addresses, after, totals = [], None, set()
+    while True:
+        page = index.query(limit=limit, after=after, **filters)
+        addresses.extend(row["address"] for row in page["items"])
+        totals.add(page["total"])
+        if page["next_cursor"] is None:
+            return addresses, totals
+        after = decode_cursor(page["next_cursor"])
+
+
+@pytest.mark.parametrize("chain", [None, "all", "solana", "base"])
+@pytest.mark.parametrize("min_market_cap", [0, 500000, 600000, 10000000])
+@pytest.mark.parametrize("min_volume", [0, 50000, 60000])
+def test_paging_through_any_filter_matches_a_full_scan(chain, min_market_cap, min_volume):
+    rows = _rows()
+    index = LeaderboardIndex(rows)
+    filters = dict(min_score=50, chain=chain, min_market_cap=min_market_cap, min_volume=min_volume)
+    expected = _expected(rows, **filters)
+
+    addresses, totals = _all_pages(index, limit=7, **filters)
+
+    assert addresses == expected
+    assert totals == {len(expected)}
+
+
+def test_unknown_chain_returns_an_empty_page():
+    assert LeaderboardIndex(_rows()).query(chain="tron") == {"items": [], "next_cursor": None, "total": 0}
+
+
+def test_query_json_matches_query():
+    index = LeaderboardIndex(_rows())
+    body, next_cursor, total = index.query_json(limit=5, min_volume=60000)
+    page = index.query(limit=5, min_volume=60000)
+
+    assert next_cursor == page["next_cursor"] and total == page["total"]
+    assert body.count(b'"address"') == len(page["items"]) == 5
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    assert decode_cursor(encode_cursor(55.5, "abc")) == (55.5, "abc")
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def _stream_frames(rows_by_cycle):
+    """Read a stream that is mid-yield when each later cycle is published"""
+    async def run():
+        deltas = LeaderboardDeltas()
+        deltas.publish(LeaderboardIndex(rows_by_cycle[0]))
+        stream = deltas.stream(f"{deltas.epoch}-0")
+        frames = [await stream.__anext__(), await stream.__anext__()]
+        for rows in rows_by_cycle[1:]:
+            # The stream is suspended at the yield of its last frame, as behind a slow client
+            deltas.publish(LeaderboardIndex(rows))
+            frames.append(await asyncio.wait_for(stream.__anext__(), 1))
+        await stream.aclose()
+        return deltas, frames
+
+    return asyncio.run(run())
+
+
+def test_stream_sends_deltas_published_while_a_frame_was_being_sent():
+    rows = _rows(count=3)
+    changed = [dict(rows[0], brs_score=99.0)] + rows[1:]
+
+    deltas, frames = _stream_frames([rows, changed, changed[1:]])
+
+    assert frames[0].startswith(b"retry:")
+    assert [frame.split(b"\n")[0] for frame in frames[1:]] == [
+        b"id: %s-%d" % (deltas.epoch.encode(), version) for version in (1, 2, 3)
+    ]
+    assert b'"brs_score":99.0' in frames[2]
+    assert b'"remove":["token0000"]' in frames[3]
+
+
+def test_stream_resets_clients_too_far_behind():
+    async def run():
+        deltas = LeaderboardDeltas(history=1)
+        for _ in range(3):
+            deltas.publish(LeaderboardIndex(_rows(count=2)))
+        stream = deltas.stream(f"{deltas.epoch}-0")
+        frames = [await stream.__anext__(), await stream.__anext__()]
+        await stream.aclose()
+        return frames
+
+    assert b"event: reset" in asyncio.run(run())[1]
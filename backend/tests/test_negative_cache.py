@@ -0,0 +1,82 @@
+import asyncio
+import json
+
+import httpx
+
+from services import discovery_feed
+from services.discovery_feed import DiscoveryFeed
+from services.negative_cache import DEFAULT_REJECTION_TTL, REJECTION_TTLS, NegativeCache
+from services.rate_limiter import DexscreenerLimiter
+
+
+def test_entries_expire_after_their_reason_ttl():
+    cache = NegativeCache()
+    cache.add("a", "not_found", now=0)
+    cache.add("b", "volume", now=0)
+
+    assert cache.reason("a", probable=False, now=REJECTION_TTLS["not_found"] - 1) == "not_found"
+    assert cache.reason("a", probable=False, now=REJECTION_TTLS["not_found"]) is None
+    assert cache.reason("b", probable=False, now=REJECTION_TTLS["volume"] - 1) == "volume"
+    assert cache.reason("b", probable=False, now=REJECTION_TTLS["volume"]) is None
+
+
+def test_unknown_reason_uses_default_ttl():
+    cache = NegativeCache()
+    cache.add("a", "something_else", now=0)
+
+    assert cache.reason("a", probable=False, now=DEFAULT_REJECTION_TTL - 1) == "something_else"
+    assert cache.reason("a", probable=False, now=DEFAULT_REJECTION_TTL) is None
+
+
+def test_bloom_answers_for_evicted_entries_within_ttl_only():
+    cache = NegativeCache(max_exact=1, bloom_bits=1 << 12)
+    cache.add("a", "pattern", now=0)
+    cache.add("b", "pattern", now=0)
+    ttl = REJECTION_TTLS["pattern"]
+
+    assert len(cache) == 1
+    assert cache.reason("a", probable=False, now=1) is None
+    assert cache.reason("a", now=1) == "pattern"
+    # Two rotations later the generation holding "a" is gone
+    assert cache.reason("a", now=ttl + 1) is None
+
+
+def _pair(base: str, quote: str) -> dict:
+    return {"chainId": "solana", "pairAddress": f"pair-{base}", "liquidity": {"usd": 1000},
+            "baseToken": {"address": base}, "quoteToken": {"address": quote}}
+
+
+def _fetch_pairs(monkeypatch, handler, addresses):
+    cache = NegativeCache()
+    monkeypatch.setattr(discovery_feed, "negative_cache", cache)
+    monkeypatch.setattr(discovery_feed, "dexscreener_limiter", DexscreenerLimiter(max_retries=0))
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await DiscoveryFeed().fetch_pairs(client, "solana", addresses)
+
+    return asyncio.run(run()), cache
+
+
+def test_fetch_pairs_caches_only_addresses_missing_from_every_pair(monkeypatch):
+    def handler(request):
+        return httpx.Response(200, content=json.dumps([_pair("A", "B")]).encode())
+
+    pairs, cache = _fetch_pairs(monkeypatch, handler, ["A", "B", "C"])
+
+    assert [pair.address for pair in pairs] == ["A"]
+    assert cache.reason("A", probable=False) is None
+    assert cache.reason("B", probable=False) is None  # Returned as a quote token
+    assert cache.reason("C", probable=False) == "not_found"
+
+
+def test_fetch_pairs_does_not_cache_failed_or_truncated_responses(monkeypatch):
+    for response in (
+        httpx.Response(429),
+        httpx.Response(200, content=b"not json"),
+        httpx.Response(200, content=b"[]"),
+        httpx.Response(200, content=json.dumps(
+            [_pair("A", "X")] * discovery_feed.TOKENS_RESPONSE_MAX_PAIRS).encode()),
+    ):
+        _, cache = _fetch_pairs(monkeypatch, lambda request: response, ["A", "C"])
+        assert len(cache) == 0
@@ -0,0 +1,108 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services.rate_limiter import AdaptiveRateLimiter, DexscreenerLimiter
+from services.response_cache import ResponseCache
+
+
+def test_clean_responses_raise_the_rate_up_to_the_ceiling():
+    limiter = AdaptiveRateLimiter("test", initial_rate=1.0, max_rate=2.0, increase=0.5)
+
+    limiter.record(200, 0.1)
+    assert limiter.rate == pytest.approx(1.5)
+    for _ in range(20):
+        limiter.record(200, 0.1)
+    assert limiter.rate == 2.0
+
+
+def test_throttling_cuts_the_rate_once_per_cooldown_and_pauses():
+    limiter = AdaptiveRateLimiter("test", initial_rate=4.0, decrease=0.5, cooldown=60)
+
+    limiter.record(429, 0.1, retry_after=30)
+    limiter.record(429, 0.1, retry_after=30)
+    assert limiter.rate == 2.0
+    assert limiter._paused_until > limiter._last_cut + 29
+
+
+def test_slow_responses_and_errors_trim_the_rate():
+    limiter = AdaptiveRateLimiter("test", initial_rate=2.0, latency_threshold=1.0, cooldown=0)
+
+    limiter.record(200, 5.0)
+    assert limiter.rate == pytest.approx(1.8)
+    limiter.record(None, 0.1)
+    assert limiter.rate == pytest.approx(1.62)
+    limiter.record(503, 0.1)
+    assert limiter.rate == pytest.approx(1.458)
+
+
+def test_rise_slows_near_the_last_throttled_rate():
+    limiter = AdaptiveRateLimiter("test", initial_rate=4.0, max_rate=10.0, increase=0.5, decrease=0.5, cooldown=0)
+    limiter.record(429, 0.1, retry_after=0)
+    limiter.rate = 3.8  # back within 10% of the throttled 4.0
+
+    limiter.record(200, 0.1)
+    assert limiter.rate == pytest.approx(3.8 + 0.5 / 3.8 / 10)
+
+
+def test_cached_responses_skip_the_network(tmp_path):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url)
+        return httpx.Response(200, content=b'{"pairs": []}')
+
+    async def run():
+        limiter = DexscreenerLimiter()
+        limiter.cache = ResponseCache(str(tmp_path / "cache.db"))
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            first = await limiter.get(client, "https://api.dexscreener.com/latest/dex/search", params={"q": "sol"})
+            second = await limiter.get(client, "https://api.dexscreener.com/latest/dex/search", params={"q": "sol"})
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert len(calls) == 1
+    assert first.content == second.content == b'{"pairs": []}'
+
+
+def _hedging_run(hedge_budget, requests, slow_first=True):
+    """Send ``requests`` hedged requests; returns (limiter, attempts made)"""
+    attempts = []
+    state = {"request": 0, "stalled": 0}
+
+    async def handler(request):
+        attempts.append(request.url)
+        # With slow_first, each request's first attempt stalls past the p95 and a duplicate answers at once
+        if slow_first and state["stalled"] < state["request"]:
+            state["stalled"] = state["request"]
+            await asyncio.sleep(0.5)
+        return httpx.Response(200, content=b"[]")
+
+    async def run():
+        limiter = DexscreenerLimiter(
+            limits={"other": {"initial_rate": 1000.0, "max_rate": 1000.0}}, hedge_budget=hedge_budget
+        )
+        limiter.for_family("pairs").latencies.extend([0.01] * 20)
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            for _ in range(requests):
+                state["request"] += 1
+                await limiter.get(client, "https://api.dexscreener.com/latest/dex/pairs/solana/x", hedge=True)
+        return limiter
+
+    return asyncio.run(run()), attempts
+
+
+def test_hedge_budget_accrues_per_eligible_request():
+    limiter, _ = _hedging_run(hedge_budget=0.25, requests=3, slow_first=False)
+
+    # Nothing was slow enough to hedge, so the budget was banked, not spent
+    assert limiter._hedge_tokens == pytest.approx(0.75)
+
+
+def test_hedges_are_capped_by_the_budget():
+    limiter, attempts = _hedging_run(hedge_budget=0.5, requests=2)
+
+    # One hedge earned over two slow requests: only the second gets a duplicate
+    assert len(attempts) == 3
+    assert limiter._hedge_tokens == pytest.approx(0)
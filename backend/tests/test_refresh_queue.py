@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from services.refresh_queue import RefreshQueue
+
+
+def _queue(refresh):
+    queue = RefreshQueue(engine=None, workers=1)
+    queue.refresh = refresh
+    return queue
+
+
+def test_concurrent_requests_share_one_refresh():
+    calls = []
+
+    async def refresh(address):
+        calls.append(address)
+        await asyncio.sleep(0.01)
+        return {"address": address}
+
+    async def run():
+        queue = _queue(refresh)
+        queue.start()
+        results = await asyncio.gather(*(queue.get_brs("a") for _ in range(5)))
+        await queue.stop()
+        return results
+
+    assert asyncio.run(run()) == [{"address": "a"}] * 5
+    assert calls == ["a"]
+
+
+def test_stopping_the_workers_cancels_waiting_callers():
+    async def refresh(address):
+        await asyncio.sleep(10)
+
+    async def run():
+        queue = _queue(refresh)
+        queue.start()
+        running = asyncio.create_task(queue.get_brs("a"))
+        queued = asyncio.create_task(queue.get_brs("b"))
+        await asyncio.sleep(0.01)
+        await queue.stop()
+        for caller in (running, queued):
+            with pytest.raises(asyncio.CancelledError):
+                await asyncio.wait_for(caller, 1)
+
+    asyncio.run(run())
+
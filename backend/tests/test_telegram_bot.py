@@ -0,0 +1,112 @@
+import asyncio
+import socket
+import threading
+import time
+
+import httpx
+import pytest
+import uvicorn
+from telegram import Update
+
+import fake_telegram
+from models.database import Alert, Token, get_session, init_db
+from services import telegram_bot
+from services.alert_dispatcher import AlertDispatcher
+from services.alert_engine import alert_engine
+from services.leaderboard import LeaderboardIndex, LeaderboardState
+
+
+@pytest.fixture(scope="module")
+def fake_api():
+    """fake_telegram.py served on a free local port for the whole module"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(fake_telegram.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join()
+
+
+@pytest.fixture
+def bot(fake_api, monkeypatch):
+    fake_telegram.messages.clear()
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "test")
+    monkeypatch.setenv("TELEGRAM_API_BASE_URL", f"{fake_api}/bot")
+    monkeypatch.delenv("TELEGRAM_CHAT_ID", raising=False)
+    monkeypatch.setattr(telegram_bot, "leaderboard_state", LeaderboardState())
+    monkeypatch.setattr(alert_engine, "thresholds", {})
+    return telegram_bot.TelegramAlertBot(init_db("sqlite://"))
+
+
+def _row(address, symbol, brs_score):
+    return {
+        "address": address, "symbol": symbol, "chain": "solana", "brs_score": brs_score,
+        "category": "Phoenix Rising", "market_cap": 2000000, "volume_24h": 300000, "price_change_24h": 12.5,
+    }
+
+
+async def _say(bot, fake_api, chat_id, *texts):
+    """Send user messages through the fake API and let the bot handle them; returns its replies"""
+    async with httpx.AsyncClient(base_url=fake_api) as client:
+        for text in texts:
+            await client.post("/fake/send", json={"chat_id": chat_id, "text": text})
+        updates = await bot.app.bot.get_updates(offset=fake_telegram.counters["update_id"] - len(texts) + 1)
+        for update in updates:
+            await bot.app.process_update(update)
+        return [m["text"] for m in (await client.get("/fake/messages", params={"clear": True})).json()]
+
+
+def test_top_and_stats_replies_are_cached_until_the_next_cycle(bot, fake_api):
+    state = telegram_bot.leaderboard_state
+    state.complete_cycle(LeaderboardIndex([_row("a", "AAA", 70.0)]), {"tokens_tracked": 1, "phoenixes_found": 1})
+    renders = []
+    render_top = bot._render_top
+    bot._render_top = lambda: renders.append("top") or render_top()
+
+    async def scenario():
+        await bot.app.initialize()
+        try:
+            first = await _say(bot, fake_api, 100, "/top", "/top", "/stats")
+            state.complete_cycle(LeaderboardIndex([_row("b", "BBB", 90.0)]), {"tokens_tracked": 2, "phoenixes_found": 2})
+            second = await _say(bot, fake_api, 100, "/top", "/stats")
+            return first, second
+        finally:
+            await bot.app.shutdown()
+
+    first, second = asyncio.run(scenario())
+    assert first[0] == first[1] and "AAA" in first[0]
+    assert "Tokens Tracked: 1" in first[2]
+    assert renders == ["top", "top"]
+    assert "BBB" in second[0] and "AAA" not in second[0]
+    assert "Tokens Tracked: 2" in second[1]
+
+
+def test_tracking_chat_receives_the_tokens_alerts(bot, fake_api):
+    telegram_bot.leaderboard_state.complete_cycle(LeaderboardIndex([_row("hot", "HOT", 75.0)]))
+    db = get_session(bot.engine)
+    db.add(Token(address="hot", symbol="HOT"))
+    db.commit()
+
+    async def scenario():
+        await bot.app.initialize()
+        await bot.bot.initialize()
+        try:
+            replies = await _say(bot, fake_api, 200, "/track hot 80", "/track hot 80")
+            db.add(Alert(token_address="hot", alert_type="phoenix_rising", message="HOT is rising", score_at_alert=85))
+            db.commit()
+            delivered = await AlertDispatcher(bot, bot.engine, chat_interval=0).dispatch_once()
+            return replies, delivered
+        finally:
+            await bot.bot.shutdown()
+            await bot.app.shutdown()
+
+    replies, delivered = asyncio.run(scenario())
+    assert replies == ["📊 Now tracking HOT, alerting from BRS 80", "📊 Already tracking HOT"]
+    assert delivered == 1
+    assert fake_telegram.messages == [{"chat_id": 200, "text": "HOT is rising", "parse_mode": "HTML"}]
+    db.close()
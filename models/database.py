@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import create_engine, Column, String, Float, DateTime, Integer, ForeignKey, Boolean
+from sqlalchemy import create_engine, Column, String, Float, DateTime, Integer, ForeignKey, Boolean, Index, Text, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from sqlalchemy.pool import StaticPool
@@ -64,6 +64,29 @@ class Alert(Base):
     # Relationship
     token = relationship("Token", back_populates="alerts")
 
+class AlertDelivery(Base):
+    """Outbound Telegram queue: one row per alert and chat, kept until the alert is delivered"""
+    __tablename__ = "alert_deliveries"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    alert_id = Column(Integer, ForeignKey("alerts.id"), nullable=False)
+    chat_id = Column(String, nullable=False)
+    status = Column(String, default="pending")  # pending, sent, failed
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    last_error = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime)
+    
+    # Relationship
+    alert = relationship("Alert")
+    
+    # The dispatcher polls (status, next_attempt_at); an alert is queued once per chat
+    __table_args__ = (
+        UniqueConstraint("alert_id", "chat_id"),
+        Index("ix_alert_deliveries_due", status, next_attempt_at),
+    )
+
 class Watchlist(Base):
     __tablename__ = "watchlist"
     
@@ -77,6 +100,54 @@ class Watchlist(Base):
     # Relationship
     token = relationship("Token", back_populates="watchlist_entries")
 
+class LeaderboardEntry(Base):
+    """Latest score per token, kept in step with brs_scores so ranking needs no max(timestamp) join"""
+    __tablename__ = "leaderboard"
+    
+    token_address = Column(String, ForeignKey("tokens.address"), primary_key=True)
+    brs_score_id = Column(Integer, ForeignKey("brs_scores.id"), nullable=False)
+    brs_score = Column(Float, nullable=False)
+    chain = Column(String, index=True)
+    market_cap = Column(Float)
+    volume_24h = Column(Float)
+    fdv = Column(Float)
+    price_change_24h = Column(Float)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    token = relationship("Token")
+    score = relationship("BRSScore")
+    
+    # Keyset pagination walks (brs_score desc, token_address asc)
+    __table_args__ = (
+        Index("ix_leaderboard_rank", brs_score.desc(), token_address),
+    )
+
+class TokenPair(Base):
+    """Most liquid pair per token, so refreshes can use batched pair lookups until it is revalidated"""
+    __tablename__ = "token_pairs"
+    
+    token_address = Column(String, primary_key=True)
+    chain = Column(String, nullable=False)
+    pair_address = Column(String, nullable=False)
+    liquidity_usd = Column(Float)
+    resolved_at = Column(DateTime, default=datetime.utcnow)
+
+class ChangeLog(Base):
+    """Append-only log of token, score and alert writes; seq orders them for incremental sync"""
+    __tablename__ = "change_log"
+    
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String, nullable=False)  # token, score or alert
+    entity_id = Column(String, nullable=False)  # token address, score id or alert id
+    op = Column(String, nullable=False)  # insert, update or delete
+    token_address = Column(String, index=True)
+    payload = Column(Text)  # JSON of the row's columns after the write
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    
+    # AUTOINCREMENT: seq is never reused, even after old rows are pruned
+    __table_args__ = {"sqlite_autoincrement": True}
+
 # Database connection setup
 def get_engine(database_url: str = "sqlite:///./bottom.db"):
     if "sqlite" in database_url:
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from models.database import Alert, Watchlist
+
+logger = logging.getLogger(__name__)
+
+# Every token alerts from this score up; watchers can only lower it for their tokens
+DEFAULT_ALERT_SCORE = 60.0
+
+
+class AlertEngine:
+    """Decides which scored tokens get alerts from in-memory cooldown and watchlist indexes"""
+
+    def __init__(self, cooldown_hours: float = 24, default_threshold: float = DEFAULT_ALERT_SCORE):
+        self.cooldown = timedelta(hours=cooldown_hours)
+        self.default_threshold = default_threshold
+        self.last_alert: Dict[str, datetime] = {}
+        self.thresholds: Dict[str, float] = {}
+        self.loaded = False
+
+    def load(self, db: Session):
+        """Rebuild both indexes from the database"""
+        since = datetime.utcnow() - self.cooldown
+        self.last_alert = dict(
+            db.query(Alert.token_address, func.max(Alert.timestamp))
+            .filter(Alert.timestamp > since)
+            .group_by(Alert.token_address)
+            .all()
+        )
+        # The most eager watcher can bring a token's alert below the default
+        self.thresholds = dict(
+            db.query(Watchlist.token_address, func.min(Watchlist.alert_threshold))
+            .filter(Watchlist.active == True)
+            .group_by(Watchlist.token_address)
+            .all()
+        )
+        self.loaded = True
+        logger.info(f"Alert engine loaded {len(self.last_alert)} cooldowns, {len(self.thresholds)} watched tokens")
+
+    def add_watch(self, db: Session, token_address: str, user_id: str = "default",
+                  alert_threshold: float = 80.0) -> bool:
+        """Add an active watchlist entry; False if the user already watches the token"""
+        existing = db.query(Watchlist).filter(
+            and_(
+                Watchlist.token_address == token_address,
+                Watchlist.user_id == user_id,
+                Watchlist.active == True
+            )
+        ).first()
+
+        if existing:
+            return False
+
+        db.add(Watchlist(
+            token_address=token_address,
+            user_id=user_id,
+            alert_threshold=alert_threshold
+        ))
+        db.commit()
+        self.watch(token_address, alert_threshold)
+        return True
+
+    def watch(self, token_address: str, alert_threshold: float):
+        current = self.thresholds.get(token_address)
+        if current is None or alert_threshold < current:
+            self.thresholds[token_address] = alert_threshold
+
+    def threshold_for(self, token_address: str) -> float:
+        return min(self.default_threshold, self.thresholds.get(token_address, self.default_threshold))
+
+    def evaluate(self, scored: Iterable[Tuple[str, str, float]], calculator,
+                 now: Optional[datetime] = None) -> List[Alert]:
+        """
+        Build alerts for a batch of (token_address, symbol, brs_score) tuples in one pass
+
+        The returned Alert rows are not added to any session; the cooldown
+        index is updated as if they were, so a token alerts once per batch.
+        """
+        now = now or datetime.utcnow()
+        cutoff = now - self.cooldown
+        alerts = []
+
+        for token_address, symbol, brs_score in scored:
+            if brs_score < self.threshold_for(token_address):
+                continue
+
+            # Check if we already sent an alert recently
+            last = self.last_alert.get(token_address)
+            if last and last > cutoff:
+                continue
+
+            category, description = calculator.get_score_interpretation(brs_score)
+            alerts.append(Alert(
+                token_address=token_address,
+                alert_type=category.lower().replace(" ", "_"),
+                timestamp=now,
+                message=f"🚀 {symbol} - {category}: {description}. BRS Score: {brs_score}",
+                score_at_alert=brs_score
+            ))
+            self.last_alert[token_address] = now
+
+        return alerts
+
+    def forget(self, alerts: Iterable[Alert]):
+        """Roll back the cooldowns taken by alerts that failed to persist"""
+        for alert in alerts:
+            if self.last_alert.get(alert.token_address) == alert.timestamp:
+                del self.last_alert[alert.token_address]
+
+
+alert_engine = AlertEngine()
@@ -0,0 +1,207 @@
+"""
+Declarative BRS scoring profiles.
+
+Each profile is a plain table of components. A component scores a token by
+taking the first matching entry of ``rules`` (or ``default``), adding the first
+matching entry of each ``bonuses`` group, and clamping the result. Conditions
+are ``[metric, op, value]`` triples where ``value`` is a number or
+``{"metric": name, "scale": k}``; a rule's ``score`` may likewise be a linear
+expression ``{"metric": name, "scale": k, "offset": c, "clamp": [lo, hi]}``
+(``round`` is also accepted). ``labels`` use the same rules to produce the
+non-numeric extras stored next to the score. ``max_score`` is the most a
+component can score on its own, before ``weight`` is applied.
+
+Profiles with the same structure can be supplied as JSON through the
+``BRS_PROFILES_PATH`` environment variable; they are merged over these
+defaults and reloaded when the file changes.
+"""
+
+DEFAULT_PROFILE = "classic"
+
+PROFILES = {
+    # Backend scoring: raw component points summed to a 0-100 score
+    "classic": {
+        "round": 2,
+        "error_score": 0,
+        "components": {
+            "holder_resilience": {
+                "max_score": 20,
+                "rules": [
+                    {"when": [["sells_24h", "==", 0]], "score": 20.0},
+                    {"when": [["buy_sell_ratio", ">", 1.2]], "score": 20.0},
+                    {"when": [["buy_sell_ratio", ">", 1.0]], "score": 15.0},
+                    {"when": [["buy_sell_ratio", ">", 0.8]], "score": 10.0},
+                ],
+                "default": 5.0,
+            },
+            "volume_floor": {
+                "max_score": 20,
+                "rules": [
+                    {"when": [["volume_24h", ">=", 500000]], "score": 20.0},
+                    {"when": [["volume_24h", ">=", 250000]], "score": 18.0},
+                    {"when": [["volume_24h", ">=", 100000]], "score": 15.0},
+                    {"when": [["volume_24h", ">=", 50000]], "score": 12.0},
+                    {"when": [["volume_24h", ">=", 25000]], "score": 8.0},
+                ],
+                "default": 5.0,
+            },
+            "price_recovery": {
+                "max_score": 20,
+                "rules": [
+                    {"when": [["price_change_1h", ">", 5], ["price_change_6h", ">", 0]], "score": 20.0},
+                    {"when": [["price_change_24h", ">", 0]], "score": 18.0},
+                    {"when": [["price_change_6h", ">", 0], ["price_change_1h", ">", -2]], "score": 15.0},
+                    {"when": [["price_change_24h", ">=", -5]], "score": 12.0},
+                    {"when": [["price_change_24h", ">=", -10]], "score": 8.0},
+                ],
+                "default": 5.0,
+            },
+            "distribution_health": {
+                "max_score": 10,
+                "rules": [
+                    {"when": [["market_cap", ">", 0], ["liquidity_to_mcap", ">=", 0.1]], "score": 10.0},
+                    {"when": [["market_cap", ">", 0], ["liquidity_to_mcap", ">=", 0.05]], "score": 8.0},
+                    {"when": [["market_cap", ">", 0], ["liquidity_to_mcap", ">=", 0.02]], "score": 6.0},
+                    {"when": [["market_cap", ">", 0]], "score": 4.0},
+                    # Fallback to absolute liquidity when market cap is unknown
+                    {"when": [["liquidity_usd", ">=", 100000]], "score": 8.0},
+                    {"when": [["liquidity_usd", ">=", 50000]], "score": 6.0},
+                ],
+                "default": 3.0,
+            },
+            "revival_momentum": {
+                "max_score": 15,
+                "rules": [
+                    {"when": [["volume_24h", ">", 100000], ["price_change_6h", ">", 0],
+                              ["buys_24h", ">", {"metric": "sells_24h"}]], "score": 15.0},
+                    {"when": [["volume_24h", ">", 50000], ["price_change_24h", ">=", -5],
+                              ["price_change_24h", "<=", 20]], "score": 12.0},
+                    {"when": [["volume_24h", ">", 50000]], "score": 10.0},
+                    {"when": [["price_change_6h", ">", -5],
+                              ["buys_24h", ">=", {"metric": "sells_24h", "scale": 0.8}]], "score": 10.0},
+                ],
+                "default": 5.0,
+            },
+            "smart_accumulation": {
+                "max_score": 15,
+                "rules": [
+                    {"when": [["buys_24h", ">", {"metric": "sells_24h", "scale": 1.5}],
+                              ["volume_24h", ">", 100000]], "score": 15.0},
+                    {"when": [["buys_24h", ">", {"metric": "sells_24h", "scale": 1.2}],
+                              ["volume_24h", ">", 50000]], "score": 13.0},
+                    {"when": [["buys_24h", ">", {"metric": "sells_24h"}],
+                              ["volume_24h", ">", 50000]], "score": 11.0},
+                    {"when": [["price_change_5m", ">", 0],
+                              ["buys_24h", ">", {"metric": "sells_24h", "scale": 0.8}]], "score": 8.0},
+                ],
+                "default": 5.0,
+            },
+        },
+        "labels": {
+            "buy_sell_ratio": {
+                "rules": [
+                    {"when": [["sells_24h", ">", 0]], "score": {"metric": "buy_sell_ratio", "round": 2}},
+                ],
+                "default": 1.0,
+            },
+            "volume_trend": {
+                "rules": [
+                    {"when": [["volume_24h", ">", 250000]], "score": "up"},
+                    {"when": [["volume_24h", ">", 100000]], "score": "stable"},
+                ],
+                "default": "down",
+            },
+            "price_trend": {
+                "rules": [
+                    {"when": [["price_change_6h", ">", 5]], "score": "up"},
+                    {"when": [["price_change_24h", ">", 0], ["price_change_6h", ">", 0]], "score": "up"},
+                    {"when": [["price_change_24h", "<", -10], ["price_change_6h", "<", -5]], "score": "down"},
+                ],
+                "default": "stable",
+            },
+        },
+        "categories": [
+            [80, "Phoenix Rising", "Strong buy signal - high recovery potential"],
+            [60, "Showing Life", "Add to watchlist - monitoring recommended"],
+            [40, "Still Dormant", "Monitor only - not ready yet"],
+            [None, "Dead Token", "Avoid - low recovery probability"],
+        ],
+    },
+
+    # Serverless API scoring: 0-100 component scores blended by weight
+    "weighted": {
+        "round": 1,
+        "component_round": 1,
+        "clamp": [20, 95],
+        "error_score": 30.0,
+        "components": {
+            "holder_resilience": {
+                "weight": 0.23,
+                "max_score": 100,
+                "rules": [
+                    {"when": [["liquidity_usd", ">", 0], ["volume_24h", ">", 0]],
+                     "score": {"metric": "volume_to_liquidity", "scale": 50, "clamp": [20, 80]}},
+                ],
+                "default": 30,
+            },
+            "volume_floor": {
+                "weight": 0.24,
+                "max_score": 100,
+                "rules": [
+                    {"when": [["market_cap", ">", 0]],
+                     "score": {"metric": "volume_to_mcap_pct", "scale": 3, "offset": 30, "clamp": [20, 90]}},
+                    {"when": [["volume_24h", ">", 50000]], "score": 65},
+                ],
+                "default": 25,
+            },
+            "price_recovery": {
+                "weight": 0.22,
+                "max_score": 100,
+                "rules": [
+                    {"when": [["price_change_24h", ">", 0]],
+                     "score": {"metric": "price_change_24h", "scale": 2, "offset": 40, "clamp": [40, 80]}},
+                    {"when": [["price_change_24h", "<", -10]],
+                     "score": {"metric": "price_change_24h", "offset": 40}},
+                ],
+                "default": 40,
+                "clamp": [15, 85],
+            },
+            "distribution_health": {
+                "weight": 0.11,
+                "max_score": 100,
+                "rules": [
+                    {"when": [["liquidity_usd", ">", 100000]], "score": 75},
+                    {"when": [["liquidity_usd", ">", 50000]], "score": 60},
+                    {"when": [["liquidity_usd", ">", 10000]], "score": 45},
+                ],
+                "default": 30,
+            },
+            "revival_momentum": {
+                "weight": 0.13,
+                "max_score": 100,
+                "default": 40,
+                "bonuses": [
+                    [{"when": [["volume_24h", ">", 100000]], "score": 20}],
+                    [{"when": [["price_change_24h", ">", 5]], "score": 25},
+                     {"when": [["price_change_24h", ">", 0]], "score": 10}],
+                ],
+                "clamp": [20, 85],
+            },
+            "smart_accumulation": {
+                "weight": 0.15,
+                "max_score": 100,
+                "default": 35,
+                "bonuses": [
+                    [{"when": [["liquidity_usd", ">", 50000]], "score": 15}],
+                    [{"when": [["volume_24h", ">", 50000]], "score": 20}],
+                ],
+                "clamp": [25, 80],
+            },
+        },
+        "categories": [
+            [75, "Phoenix Rising", "Strong recovery signals across volume and price"],
+            [60, "Showing Life", "Add to watchlist - monitoring recommended"],
+            [None, "Deep Bottom", "Monitor only - not ready yet"],
+        ],
+    },
+}
@@ -0,0 +1,64 @@
+"""
+Discovery thresholds compiled into a single predicate over PairRecord fields.
+
+The thresholds are bound once into one closure that checks the most
+selective fields first and names the first failure. Filters run right
+after a response is decoded, so rejected pairs never reach parsing,
+scoring or a per-token refresh request.
+"""
+from typing import Callable, Optional
+
+from services.pair_record import PairRecord
+
+
+def _compile(min_liquidity: float, min_volume: float, min_market_cap: float,
+             require_price: bool, phoenix_pattern: bool) -> Callable[[PairRecord], Optional[str]]:
+    def reject_reason(record: PairRecord) -> Optional[str]:
+        if not record.address:
+            return "address"
+        if record.market_cap < min_market_cap:
+            return "market_cap"
+        volume_24h = record.volume_24h
+        if volume_24h < min_volume:
+            return "volume"
+        if record.liquidity_usd < min_liquidity:
+            return "liquidity"
+        if require_price and record.price_usd <= 0:
+            return "price"
+        if phoenix_pattern:
+            # Falling price or unusually heavy volume; very lenient so more tokens get scored
+            h24_change = record.price_change_24h
+            if not (
+                h24_change < -5  # 5%+ drop in 24h
+                or (h24_change < -3 and record.price_change_6h < -2)  # Small consistent decline
+                or (h24_change < -1 and volume_24h > min_volume * 1.5)  # High volume despite small decline
+                or (h24_change < 0 and volume_24h > min_volume)  # Negative momentum and good volume
+                or volume_24h > min_volume * 3  # Exceptional volume even if price is stable
+            ):
+                return "pattern"
+        return None
+    return reject_reason
+
+
+class CandidateFilter:
+    """Compiled candidate predicate; a zero threshold always passes"""
+
+    def __init__(self, min_liquidity: float = 0, min_volume: float = 0, min_market_cap: float = 0,
+                 require_price: bool = False, phoenix_pattern: bool = False):
+        self.min_liquidity = min_liquidity
+        self.min_volume = min_volume
+        self.min_market_cap = min_market_cap
+        # Name of the first failed check, or None when the record is a candidate
+        self.reject_reason = _compile(min_liquidity, min_volume, min_market_cap, require_price, phoenix_pattern)
+
+    def accepts(self, record: PairRecord) -> bool:
+        return self.reject_reason(record) is None
+
+
+# Background discovery: liquidity and volume floors, 500k market cap and a phoenix-like price pattern
+DISCOVERY_FILTER = CandidateFilter(
+    min_liquidity=5000,   # Keep liquidity lower to find more tokens
+    min_volume=50000,     # 50k minimum volume
+    min_market_cap=500000,
+    phoenix_pattern=True
+)
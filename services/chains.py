@@ -0,0 +1,53 @@
+"""
+Per-chain discovery settings.
+
+``search_terms`` are the Dexscreener search queries swept for the chain,
+``max_concurrency`` caps the chain's share of in-flight requests,
+``min_interval`` is optional extra spacing in seconds between the chain's
+request starts (overall pacing is done by services.rate_limiter) and
+``sweep_timeout`` bounds a whole sweep so one slow chain cannot hold up the
+others. In feed discovery, ``refresh_limit`` caps how many tokens already
+on the leaderboard each cycle re-scores, stalest first.
+"""
+import os
+from typing import Dict, List
+
+DEFAULT_CHAIN_BUDGET = {
+    "max_concurrency": 2,
+    "min_interval": 0.0,
+    "sweep_timeout": 120.0,
+    "refresh_limit": 500,
+}
+
+CHAIN_CONFIGS: Dict[str, Dict] = {
+    "solana": {
+        "search_terms": [
+            "SOL", "BONK", "WIF", "BOME", "MEW", "POPCAT",
+            "MYRO", "WEN", "SAMO", "FOXY", "COPE", "SLERF",
+            "HARAMBE", "GIGA", "PONKE", "SMOLE", "ANALOS",
+            "meme", "pepe", "doge", "cat"
+        ],
+        "max_concurrency": 3,
+    },
+    "ethereum": {
+        "search_terms": ["PEPE", "SHIB", "MOG", "TURBO", "SPX", "NEIRO", "meme", "doge", "cat"],
+    },
+    "bsc": {
+        "search_terms": ["CAKE", "BABYDOGE", "FLOKI", "meme", "pepe", "doge", "cat"],
+    },
+    "polygon": {
+        "search_terms": ["POL", "meme", "pepe", "doge", "cat"],
+        "max_concurrency": 1,
+    },
+}
+
+
+def get_chain_config(chain: str) -> Dict:
+    """Chain settings merged over the default budget"""
+    return {**DEFAULT_CHAIN_BUDGET, "search_terms": [], **CHAIN_CONFIGS.get(chain, {})}
+
+
+def get_discovery_chains() -> List[str]:
+    """Chains swept by the background discovery task (DISCOVERY_CHAINS, comma separated)"""
+    chains = os.getenv("DISCOVERY_CHAINS", "solana")
+    return [c.strip() for c in chains.split(",") if c.strip() in CHAIN_CONFIGS]
@@ -1,227 +1,256 @@
 import httpx
 import asyncio
-from typing import List, Dict, Optional
+import os
+import time
+from typing import AsyncIterator, List, Dict, Optional
 from datetime import datetime, timedelta
 import logging
 
+from services.chains import CHAIN_CONFIGS, get_chain_config
+from services.discovery_feed import DiscoveryFeed
+from services.metrics import DISCOVERY_STAGE_SECONDS, dexscreener_event_hooks
+from services.log_config import token_logger
+from services.pair_record import PairRecord, best_pair, decode_pairs
+from services.candidate_filter import DISCOVERY_FILTER, CandidateFilter
+from services.negative_cache import negative_cache
+from services.rate_limiter import dexscreener_limiter
+
 logger = logging.getLogger(__name__)
+token_log = token_logger(__name__)
+
+# The pairs endpoint accepts up to 30 pair addresses per call
+PAIRS_BATCH_SIZE = 30
+
+class ChainBudget:
+    """Caps in-flight requests and spaces request starts for one chain"""
+    
+    def __init__(self, max_concurrency: int, min_interval: float):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.min_interval = min_interval
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+    
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        try:
+            async with self._lock:
+                loop = asyncio.get_running_loop()
+                delay = self._next_start - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self._next_start = loop.time() + self.min_interval
+        except BaseException:
+            self.semaphore.release()
+            raise
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        self.semaphore.release()
 
 class DexscreenerService:
     def __init__(self, base_url: str = "https://api.dexscreener.com"):
         self.base_url = base_url
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.client = httpx.AsyncClient(timeout=30.0, event_hooks=dexscreener_event_hooks())
+        self.chain_budgets: Dict[str, ChainBudget] = {}
+        # "feed" (incremental profiles/boosts), "search" (keyword sweep) or "both"
+        self.discovery_source = os.getenv("DISCOVERY_SOURCE", "feed")
+        self.feed = DiscoveryFeed(base_url, os.getenv("DISCOVERY_CURSOR_PATH", "./discovery_cursor.json"))
+        self._feed_poll: Optional[asyncio.Task] = None
         
-    async def get_token_data(self, token_address: str, chain: str = "solana") -> Optional[Dict]:
-        """Fetch token data from Dexscreener using the correct endpoint"""
+    async def get_token_data(self, token_address: str, chain: str = "solana", hedge: bool = False) -> Optional[PairRecord]:
+        """Fetch token data from Dexscreener using the correct endpoint; hedge when a user is waiting on it"""
+        # Addresses Dexscreener recently had no pairs for are answered without a request
+        if negative_cache.reason(token_address, probable=False) == "not_found":
+            return None
         try:
             # Use the token-pairs endpoint to get pools for a token
-            response = await self.client.get(f"{self.base_url}/token-pairs/v1/{chain}/{token_address}")
+            response = await dexscreener_limiter.get(self.client, f"{self.base_url}/token-pairs/v1/{chain}/{token_address}", hedge=hedge)
             if response.status_code == 200:
-                pairs = response.json()
-                if pairs and len(pairs) > 0:
-                    # Return the pair with highest liquidity
-                    return max(pairs, key=lambda x: float(x.get("liquidity", {}).get("usd", 0)))
+                # Return the pair with highest liquidity
+                pair = best_pair(decode_pairs(response.content))
+                if pair is None:
+                    negative_cache.add(token_address, "not_found")
+                return pair
             return None
         except Exception as e:
             logger.error(f"Error fetching token data for {token_address}: {e}")
             return None
     
-    async def get_tokens_by_addresses(self, chain: str, addresses: List[str]) -> List[Dict]:
+    async def get_pairs(self, chain: str, pair_addresses: List[str]) -> List[PairRecord]:
+        """Fetch pairs by pair address, up to 30 per request"""
+        async def fetch_batch(batch: List[str]) -> List[PairRecord]:
+            try:
+                response = await dexscreener_limiter.get(self.client, f"{self.base_url}/latest/dex/pairs/{chain}/{','.join(batch)}")
+                if response.status_code == 200:
+                    return decode_pairs(response.content)
+                return []
+            except Exception as e:
+                logger.error(f"Error fetching {len(batch)} pairs on {chain}: {e}")
+                return []
+        
+        batches = [pair_addresses[i:i + PAIRS_BATCH_SIZE] for i in range(0, len(pair_addresses), PAIRS_BATCH_SIZE)]
+        results = await asyncio.gather(*(fetch_batch(batch) for batch in batches))
+        return [pair for pairs in results for pair in pairs]
+    
+    async def get_tokens_by_addresses(self, chain: str, addresses: List[str]) -> List[PairRecord]:
         """Get multiple tokens by their addresses"""
         try:
             # API allows up to 30 addresses at once
             addresses_str = ",".join(addresses[:30])
-            response = await self.client.get(f"{self.base_url}/tokens/v1/{chain}/{addresses_str}")
+            response = await dexscreener_limiter.get(self.client, f"{self.base_url}/tokens/v1/{chain}/{addresses_str}")
             if response.status_code == 200:
-                return response.json()
+                return decode_pairs(response.content)
             return []
         except Exception as e:
             logger.error(f"Error fetching tokens by addresses: {e}")
             return []
     
-    async def search_tokens(self, query: str) -> List[Dict]:
+    async def search_tokens(self, query: str) -> List[PairRecord]:
         """Search for tokens by symbol or name"""
         try:
-            response = await self.client.get(f"{self.base_url}/latest/dex/search", params={"q": query})
+            response = await dexscreener_limiter.get(self.client, f"{self.base_url}/latest/dex/search", params={"q": query})
             if response.status_code == 200:
-                data = response.json()
-                return data.get("pairs", [])
+                return decode_pairs(response.content)
             return []
         except Exception as e:
             logger.error(f"Error searching tokens for {query}: {e}")
             return []
     
-    async def get_solana_tokens(self, min_liquidity: float = 5000, min_volume: float = 50000) -> List[Dict]:
-        """Get Solana tokens that meet criteria"""
-        try:
-            # Search for popular Solana memecoins and tokens
-            search_terms = [
-                "SOL", "BONK", "WIF", "BOME", "MEW", "POPCAT", 
-                "MYRO", "WEN", "SAMO", "FOXY", "COPE", "SLERF",
-                "HARAMBE", "GIGA", "PONKE", "SMOLE", "ANALOS",
-                "meme", "pepe", "doge", "cat"
-            ]
-            all_tokens = []
-            seen_addresses = set()
-            
-            for term in search_terms:
-                logger.info(f"Searching for Solana tokens with term: {term}")
-                response = await self.client.get(
-                    f"{self.base_url}/latest/dex/search", 
-                    params={"q": term}
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    pairs = data.get("pairs", [])
-                    
-                    # Filter for Solana tokens only
-                    solana_pairs = [p for p in pairs if p.get("chainId") == "solana"]
-                    
-                    # Add unique tokens
-                    for pair in solana_pairs:
-                        base_token = pair.get("baseToken", {})
-                        address = base_token.get("address", "")
-                        
-                        if address and address not in seen_addresses:
-                            seen_addresses.add(address)
-                            all_tokens.append(pair)
-                    
-                    logger.info(f"Found {len(solana_pairs)} Solana pairs for term '{term}'")
-                    
-                await asyncio.sleep(0.2)  # Rate limiting
-            
-            # Filter by liquidity and volume
-            filtered_tokens = []
-            for token in all_tokens:
-                liquidity = float(token.get("liquidity", {}).get("usd", 0))
-                volume = float(token.get("volume", {}).get("h24", 0))
-                
-                if liquidity >= min_liquidity and volume >= min_volume:
-                    filtered_tokens.append(token)
-            
-            logger.info(f"Total filtered Solana tokens: {len(filtered_tokens)}")
-            return filtered_tokens
-            
-        except Exception as e:
-            logger.error(f"Error fetching Solana tokens: {e}")
-            return []
+    def _get_budget(self, chain: str) -> "ChainBudget":
+        budget = self.chain_budgets.get(chain)
+        if budget is None:
+            config = get_chain_config(chain)
+            budget = ChainBudget(config["max_concurrency"], config["min_interval"])
+            self.chain_budgets[chain] = budget
+        return budget
     
-    async def find_crashed_tokens(self, chain: str = "solana", min_liquidity: float = 5000, min_volume: float = 50000) -> List[Dict]:
-        """Find tokens that have crashed significantly"""
-        potential_phoenixes = []
+    async def _search_chain_pairs(self, chain: str, term: str) -> List[PairRecord]:
+        """Run one search within the chain's budget and keep only that chain's pairs"""
+        async with self._get_budget(chain):
+            logger.info("Searching for %s tokens with term: %s", chain, term)
+            response = await dexscreener_limiter.get(
+                self.client,
+                f"{self.base_url}/latest/dex/search", 
+                params={"q": term}
+            )
         
-        if chain == "solana":
-            tokens = await self.get_solana_tokens(min_liquidity, min_volume)
-            logger.info(f"Analyzing {len(tokens)} tokens for phoenix patterns")
-            
-            for token in tokens:
-                if self._is_potential_phoenix(token, min_liquidity, min_volume):
-                    potential_phoenixes.append(token)
-                    symbol = token.get("baseToken", {}).get("symbol", "Unknown")
-                    price_change = token.get("priceChange", {}).get("h24", 0)
-                    logger.info(f"Found potential phoenix: {symbol} (24h: {price_change}%)")
+        if response.status_code != 200:
+            return []
         
-        logger.info(f"Found {len(potential_phoenixes)} potential phoenix tokens")
-        return potential_phoenixes
+        chain_pairs = [p for p in decode_pairs(response.content) if p.chain == chain]
+        logger.info("Found %d %s pairs for term '%s'", len(chain_pairs), chain, term)
+        return chain_pairs
+    
+    async def _feed_pairs(self, chain: str) -> List[PairRecord]:
+        """Most liquid pair of every new or changed feed token on a chain, unfiltered"""
+        # All chains share one poll of the feeds per service instance
+        if self._feed_poll is None:
+            self._feed_poll = asyncio.ensure_future(self.feed.poll(self.client, list(CHAIN_CONFIGS)))
+        changes = await asyncio.shield(self._feed_poll)
+        
+        return await self.feed.fetch_pairs(
+            self.client, chain, changes.get(chain, []), budget=self._get_budget(chain)
+        )
+    
+    def commit_feed(self, chain: str):
+        """Mark the feed entries polled for a chain as processed"""
+        if self.discovery_source in ("feed", "both"):
+            self.feed.commit(chain)
     
-    def _is_potential_phoenix(self, token_data: Dict, min_liquidity: float, min_volume: float) -> bool:
-        """Check if token meets phoenix criteria"""
+    async def iter_potential_phoenixes(self, chain: str,
+                                       candidate_filter: CandidateFilter = DISCOVERY_FILTER) -> AsyncIterator[PairRecord]:
+        """
+        Yield phoenix candidates for a chain as each search term or feed batch completes
+        
+        Every source runs as its own task, so later searches stay in flight while
+        the caller processes earlier results. Each batch is filtered as soon as it
+        is decoded, and the accepted pairs are deduplicated by base token.
+        Raises asyncio.TimeoutError once the chain's sweep_timeout has passed,
+        after yielding everything that arrived in time.
+        """
+        if chain not in CHAIN_CONFIGS:
+            logger.warning(f"No discovery configuration for chain '{chain}'")
+            return
+        
+        config = get_chain_config(chain)
+        
+        # Feed lookups return each token's most liquid pair, so their rejections are
+        # remembered per token; a search hit is just one pool and is not
+        sources = []
+        if self.discovery_source in ("feed", "both"):
+            sources.append((self._feed_pairs(chain), True))
+        if self.discovery_source in ("search", "both"):
+            sources.extend((self._search_chain_pairs(chain, term), False) for term in config["search_terms"])
+        
+        filter_seconds = 0.0
+        
+        async def filtered(source, remember: bool) -> List[PairRecord]:
+            # Filtering inside the task means a finished source only keeps its candidates alive
+            nonlocal filter_seconds
+            pairs = await source
+            filter_start = time.perf_counter()
+            candidates = []
+            for pair in pairs:
+                reason = candidate_filter.reject_reason(pair)
+                if reason is None:
+                    candidates.append(pair)
+                elif remember:
+                    negative_cache.add(pair.address, reason)
+            filter_seconds += time.perf_counter() - filter_start
+            return candidates
+        
+        tasks = [asyncio.ensure_future(filtered(source, remember)) for source, remember in sources]
+        
+        # Search time ends when the last source finished, not when its results were consumed
+        search_start = time.perf_counter()
+        finished = [search_start]
+        for task in tasks:
+            task.add_done_callback(lambda _: finished.append(time.perf_counter()))
+        
+        seen_addresses = set()
+        found = 0
         try:
-            # Check liquidity
-            liquidity = float(token_data.get("liquidity", {}).get("usd", 0))
-            if liquidity < min_liquidity:
-                return False
-            
-            # Check volume
-            volume_24h = float(token_data.get("volume", {}).get("h24", 0))
-            if volume_24h < min_volume:
-                return False
-            
-            # Check price change (looking for significant drops)
-            price_changes = token_data.get("priceChange", {})
-            h24_change = float(price_changes.get("h24", 0))
-            h6_change = float(price_changes.get("h6", 0))
-            h1_change = float(price_changes.get("h1", 0))
-            
-            # No age requirement - include all tokens that meet criteria
-            
-            # Look for tokens that have dropped or show high volume
-            # Very lenient criteria to find tokens
-            if h24_change < -5:  # 5%+ drop in 24h
-                return True
-            
-            # Also include tokens showing any weakness
-            if h24_change < -3 and h6_change < -2:  # Small consistent decline
-                return True
-            
-            # Include tokens with high volume despite small decline
-            if h24_change < -1 and volume_24h > min_volume * 1.5:
-                return True
-            
-            # Include any token with negative momentum and good volume
-            if h24_change < 0 and volume_24h > min_volume:
-                return True
-            
-            # Include tokens with exceptional volume even if price is stable
-            if volume_24h > min_volume * 3:
-                return True
+            for next_batch in asyncio.as_completed(tasks, timeout=config["sweep_timeout"]):
+                try:
+                    pairs = await next_batch
+                except asyncio.TimeoutError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error searching {chain} tokens: {e}")
+                    continue
                 
-            return False
-            
-        except Exception as e:
-            logger.error(f"Error checking phoenix criteria: {e}")
-            return False
+                candidates = []
+                for pair in pairs:
+                    if not pair.address or pair.address in seen_addresses:
+                        continue
+                    seen_addresses.add(pair.address)
+                    candidates.append(pair)
+                    token_log.info(
+                        "Found potential phoenix: %s (24h: %s%%)",
+                        pair.symbol or "Unknown", pair.price_change_24h
+                    )
+                
+                for pair in candidates:
+                    found += 1
+                    yield pair
+        finally:
+            for task in tasks:
+                task.cancel()
+            DISCOVERY_STAGE_SECONDS.observe(max(finished) - search_start, stage="search", chain=chain)
+            DISCOVERY_STAGE_SECONDS.observe(filter_seconds, stage="filter", chain=chain)
+        
+        logger.info("Found %d potential phoenix tokens on %s", found, chain)
     
-    def parse_token_data(self, raw_data: Dict) -> Dict:
-        """Parse Dexscreener data into our format"""
+    async def find_crashed_tokens(self, chain: str = "solana", min_liquidity: float = 5000, min_volume: float = 50000) -> List[PairRecord]:
+        """Find tokens that have crashed significantly"""
+        candidate_filter = CandidateFilter(min_liquidity, min_volume, phoenix_pattern=True)
+        return [pair async for pair in self.iter_potential_phoenixes(chain, candidate_filter)]
+    
+    def parse_token_data(self, raw_data) -> Dict:
+        """Parse Dexscreener data (a PairRecord or a raw pair dict) into our format"""
         try:
-            # Calculate market cap if we have price and supply
-            base_token = raw_data.get("baseToken", {})
-            price = float(raw_data.get("priceUsd", 0))
-            
-            # Use FDV if available, otherwise marketCap
-            fdv = float(raw_data.get("fdv", 0))
-            market_cap = float(raw_data.get("marketCap", 0))
-            
-            # Use the higher of FDV or marketCap
-            final_market_cap = max(fdv, market_cap)
-            
-            # If neither is available, estimate from liquidity
-            if final_market_cap == 0 and price > 0:
-                liquidity = float(raw_data.get("liquidity", {}).get("usd", 0))
-                # Rough estimate: market cap ≈ liquidity * 10 for small caps
-                final_market_cap = liquidity * 10
-            
-            # Calculate token age
-            pair_created_at = raw_data.get("pairCreatedAt")
-            token_age_days = None
-            if pair_created_at:
-                created_date = datetime.fromtimestamp(pair_created_at / 1000)
-                token_age_days = (datetime.utcnow() - created_date).days
-            
-            return {
-                "address": base_token.get("address", ""),
-                "symbol": base_token.get("symbol", ""),
-                "name": base_token.get("name", ""),
-                "chain": raw_data.get("chainId", ""),
-                "current_price": price,
-                "market_cap": market_cap,  # Keep original market cap
-                "fdv": fdv,  # Keep original FDV
-                "liquidity_usd": float(raw_data.get("liquidity", {}).get("usd", 0)),
-                "volume_24h": float(raw_data.get("volume", {}).get("h24", 0)),
-                "price_change_24h": float(raw_data.get("priceChange", {}).get("h24", 0)),
-                "price_change_6h": float(raw_data.get("priceChange", {}).get("h6", 0)),
-                "price_change_1h": float(raw_data.get("priceChange", {}).get("h1", 0)),
-                "price_change_5m": float(raw_data.get("priceChange", {}).get("m5", 0)),
-                "buys_24h": raw_data.get("txns", {}).get("h24", {}).get("buys", 0),
-                "sells_24h": raw_data.get("txns", {}).get("h24", {}).get("sells", 0),
-                "pair_created_at": pair_created_at,
-                "token_age_days": token_age_days,
-                "dex_id": raw_data.get("dexId", ""),
-                "pair_address": raw_data.get("pairAddress", ""),
-                "url": raw_data.get("url", "")
-            }
+            record = raw_data if isinstance(raw_data, PairRecord) else PairRecord(raw_data)
+            return record.to_dict()
         except Exception as e:
             logger.error(f"Error parsing token data: {e}")
             return {}
@@ -236,7 +265,7 @@ class DexscreenerService:
             # Dexscreener doesn't provide historical data in their free API
             # We'll simulate it for now, but in production you'd use a different service
             # or store historical data yourself
-            response = await self.client.get(f"{self.base_url}/tokens/{chain}/{pair_address}")
+            response = await dexscreener_limiter.get(self.client, f"{self.base_url}/tokens/{chain}/{pair_address}")
             if response.status_code == 200:
                 return response.json()
             return None
@@ -279,10 +308,10 @@ class DexscreenerService:
             # Try priceUsd as fallback
             price = float(token_data.get("priceUsd", 0))
             
-        logger.info(f"Generating transactions with price: ${price}")
+        logger.debug("Generating transactions with price: $%s", price)
             
         if price == 0:
-            logger.warning(f"No price found for token, cannot generate transactions. Token data keys: {list(token_data.keys())}")
+            logger.warning("No price found for token, cannot generate transactions. Token data keys: %s", list(token_data))
             return []
         
         # Generate 15-40 large transactions to ensure some meet the $3000 threshold
@@ -312,6 +341,6 @@ class DexscreenerService:
         # Sort by timestamp descending
         transactions.sort(key=lambda x: x["timestamp"], reverse=True)
         
-        logger.info(f"Generated {len(transactions)} total transactions")
+        logger.debug("Generated %d total transactions", len(transactions))
         
         return transactions 
\ No newline at end of file
@@ -0,0 +1,171 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from services.negative_cache import negative_cache
+from services.pair_record import PairRecord, decode_pairs
+from services.rate_limiter import dexscreener_limiter
+
+logger = logging.getLogger(__name__)
+
+# Dexscreener feeds listing recently listed or promoted tokens across all chains
+FEED_ENDPOINTS = {
+    "profiles": "/token-profiles/latest/v1",
+    "boosts": "/token-boosts/latest/v1",
+    "top_boosts": "/token-boosts/top/v1",
+}
+
+# The tokens endpoint accepts up to 30 addresses per call
+TOKENS_BATCH_SIZE = 30
+
+# Responses this long may have been cut short, so their misses are not cached
+TOKENS_RESPONSE_MAX_PAIRS = 30
+
+
+def _fingerprint(item: Dict) -> str:
+    return hashlib.sha1(json.dumps(item, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+class DiscoveryCursor:
+    """Last seen fingerprint of every feed entry, optionally persisted as JSON"""
+
+    def __init__(self, path: Optional[str] = None, retention_hours: float = 48):
+        self.path = path
+        self.retention_seconds = retention_hours * 3600
+        self.entries: Dict[str, List] = {}  # key -> [fingerprint, last_seen]
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                self.entries = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading discovery cursor from {self.path}: {e}")
+            self.entries = {}
+
+    def save(self):
+        if not self.path:
+            return
+        # Forget entries that left the feeds long ago so they are re-checked if they come back
+        cutoff = time.time() - self.retention_seconds
+        self.entries = {k: v for k, v in self.entries.items() if v[1] >= cutoff}
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Error saving discovery cursor to {self.path}: {e}")
+
+    def is_new(self, key: str, fingerprint: str) -> bool:
+        entry = self.entries.get(key)
+        return entry is None or entry[0] != fingerprint
+
+    def mark(self, key: str, fingerprint: str):
+        self.entries[key] = [fingerprint, time.time()]
+
+
+class DiscoveryFeed:
+    """Incremental discovery from Dexscreener's token profile and boost feeds"""
+
+    def __init__(self, base_url: str = "https://api.dexscreener.com", state_path: Optional[str] = None):
+        self.base_url = base_url
+        self.cursor = DiscoveryCursor(state_path)
+        self._pending: Dict[str, Dict[str, str]] = {}  # chain -> key -> fingerprint
+
+    async def _fetch_feed(self, client: httpx.AsyncClient, name: str, path: str) -> List[Dict]:
+        try:
+            response = await dexscreener_limiter.get(client, f"{self.base_url}{path}")
+            if response.status_code == 200:
+                data = response.json()
+                return data if isinstance(data, list) else []
+            logger.warning(f"Discovery feed {name} returned {response.status_code}")
+        except Exception as e:
+            logger.error(f"Error fetching discovery feed {name}: {e}")
+        return []
+
+    async def poll(self, client: httpx.AsyncClient, chains: List[str]) -> Dict[str, List[str]]:
+        """Return the new or changed token addresses per chain since the last commit"""
+        feeds = await asyncio.gather(
+            *(self._fetch_feed(client, name, path) for name, path in FEED_ENDPOINTS.items())
+        )
+
+        changes: Dict[str, List[str]] = {chain: [] for chain in chains}
+        for name, items in zip(FEED_ENDPOINTS, feeds):
+            for item in items:
+                chain = item.get("chainId")
+                address = item.get("tokenAddress")
+                if chain not in changes or not address:
+                    continue
+
+                key = f"{name}:{chain}:{address}"
+                fingerprint = _fingerprint(item)
+                if not self.cursor.is_new(key, fingerprint):
+                    continue
+
+                self._pending.setdefault(chain, {})[key] = fingerprint
+                if address not in changes[chain]:
+                    changes[chain].append(address)
+
+        logger.info(f"Discovery feed changes: { {c: len(a) for c, a in changes.items()} }")
+        return changes
+
+    def commit(self, chain: Optional[str] = None):
+        """Advance the cursor past the entries polled for a chain (or all chains)"""
+        chains = [chain] if chain else list(self._pending)
+        for c in chains:
+            for key, fingerprint in self._pending.pop(c, {}).items():
+                self.cursor.mark(key, fingerprint)
+        self.cursor.save()
+
+    async def fetch_pairs(self, client: httpx.AsyncClient, chain: str, addresses: List[str],
+                          budget=None) -> List[PairRecord]:
+        """
+        Fetch the most liquid pair of each address through batched token lookups
+
+        Addresses in the negative cache are skipped. Addresses a complete,
+        successful lookup returns in no pair, as base or quote token, are
+        remembered as not found.
+        """
+        addresses = [address for address in addresses if negative_cache.reason(address) is None]
+        wanted = set(addresses)
+        batches = [addresses[i:i + TOKENS_BATCH_SIZE] for i in range(0, len(addresses), TOKENS_BATCH_SIZE)]
+
+        async def fetch_batch(batch: List[str]) -> List[PairRecord]:
+            try:
+                async with budget or contextlib.nullcontext():
+                    response = await dexscreener_limiter.get(client, f"{self.base_url}/tokens/v1/{chain}/{','.join(batch)}")
+                if response.status_code == 200:
+                    pairs = decode_pairs(response.content)
+                    # An empty list is also what a body that failed to decode gives
+                    if 0 < len(pairs) < TOKENS_RESPONSE_MAX_PAIRS:
+                        # Case-insensitive: EVM addresses may come back checksummed
+                        found = {a.lower() for pair in pairs for a in (pair.address, pair.quote_address)}
+                        for address in batch:
+                            if address.lower() not in found:
+                                negative_cache.add(address, "not_found")
+                    return pairs
+                logger.warning(f"Token batch lookup on {chain} returned {response.status_code}")
+            except Exception as e:
+                logger.error(f"Error fetching token batch on {chain}: {e}")
+            return []
+
+        best_pairs: Dict[str, PairRecord] = {}
+        for pairs in await asyncio.gather(*(fetch_batch(b) for b in batches)):
+            for pair in pairs:
+                if pair.address not in wanted:
+                    continue
+                current = best_pairs.get(pair.address)
+                if current is None or pair.liquidity_usd > current.liquidity_usd:
+                    best_pairs[pair.address] = pair
+
+        return list(best_pairs.values())
@@ -0,0 +1,142 @@
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Streams must reach the client as they are produced, so they are never buffered for compression
+_UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._impl = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._impl = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._impl.process(data)
+        return self._impl.compress(data)
+
+    def flush(self) -> bytes:
+        """Emit everything compressed so far so streamed chunks are not held back"""
+        return self._impl.flush() if self.encoding == "br" else self._impl.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._impl.finish() if self.encoding == "br" else self._impl.flush()
+
+
+def strip_encoding_suffix(etag: str) -> str:
+    """Undo the per-encoding suffix CompressionMiddleware adds to strong ETags"""
+    for encoding in ("br", "gzip"):
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+class CompressionMiddleware:
+    """
+    Brotli/gzip response compression for bodies above minimum_size
+
+    Brotli is used when the package is installed and the client accepts it.
+    Strong ETags get an encoding suffix so each representation keeps a
+    distinct validator; use strip_encoding_suffix when comparing If-None-Match.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _pick_encoding(self, accept_encoding: str) -> Optional[str]:
+        accepted = {part.split(";")[0].strip() for part in accept_encoding.lower().split(",")}
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._pick_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    "content-encoding" in headers
+                    or message["status"] < 200
+                    or message["status"] in (204, 304)
+                    or content_type.startswith(_UNCOMPRESSED_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    # Hold the headers until the first body chunk shows whether compression pays off
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start_message is not None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                if len(body) < self.minimum_size and not more_body:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = etag[:-1] + f'-{encoding}"'
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+
+                data = compressor.compress(body)
+                if more_body:
+                    data += compressor.flush()
+                else:
+                    data += compressor.finish()
+                    headers["Content-Length"] = str(len(data))
+
+                await send(start_message)
+                start_message = None
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            data = compressor.compress(body)
+            data += compressor.finish() if not more_body else compressor.flush()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
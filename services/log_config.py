@@ -0,0 +1,122 @@
+"""
+Logging setup shared by the backend and the Vercel API.
+
+Records are handed to a background thread through a queue and only
+formatted there, so the event loop never waits on log I/O or message
+formatting. Per-token messages go to ``<module>.tokens`` loggers from
+``token_logger``, which keep one record in every 1/rate. Sample rates are
+read from the environment on a logger's first record, so loggers created
+at import still honour a .env loaded afterwards.
+
+Environment:
+- LOG_LEVEL: root level (default INFO)
+- LOG_FORMAT: "text" (default) or "json", one object per line including ``extra`` fields
+- LOG_TOKEN_SAMPLE_RATE: share of per-token records kept (default 0.01)
+- LOG_SAMPLE_RATES: per-logger overrides, e.g. "services.dexscreener.tokens=0.1,main.tokens=1"
+"""
+import atexit
+import itertools
+import json
+import logging
+import os
+import queue
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+DEFAULT_TOKEN_SAMPLE_RATE = 0.01
+
+_listener: Optional[QueueListener] = None
+
+# Attributes every LogRecord has; anything else on a record came from ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps one in every round(1 / rate) records below WARNING; warnings and errors always pass"""
+
+    def __init__(self, rate: Optional[float] = None, logger_name: str = ""):
+        super().__init__()
+        # rate None: look it up for logger_name on the first record
+        self.rate = rate
+        self.logger_name = logger_name
+        self.every: Optional[int] = None
+        self._seen = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        if self.every is None:
+            rate = self.rate if self.rate is not None else _sample_rate(self.logger_name)
+            self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        if not self.every:
+            return False
+        return next(self._seen) % self.every == 0
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.utcfromtimestamp(record.created).isoformat(timespec="milliseconds") + "Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queues records as they are; the listener thread does all the formatting"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _sample_rates() -> Dict[str, float]:
+    rates = {}
+    for item in os.getenv("LOG_SAMPLE_RATES", "").split(","):
+        name, _, rate = item.partition("=")
+        try:
+            rates[name.strip()] = float(rate)
+        except ValueError:
+            continue
+    return rates
+
+
+def _sample_rate(logger_name: str) -> float:
+    return _sample_rates().get(logger_name, float(os.getenv("LOG_TOKEN_SAMPLE_RATE", DEFAULT_TOKEN_SAMPLE_RATE)))
+
+
+def token_logger(name: str) -> logging.Logger:
+    """Sampled child logger for messages emitted once per token"""
+    logger = logging.getLogger(f"{name}.tokens")
+    if not any(isinstance(f, SamplingFilter) for f in logger.filters):
+        logger.addFilter(SamplingFilter(logger_name=logger.name))
+    return logger
+
+
+def configure_logging(level: Optional[str] = None):
+    """Route the root logger through a queue to a background writer; safe to call more than once"""
+    global _listener
+    if _listener is not None:
+        return
+
+    handler = logging.StreamHandler()
+    if os.getenv("LOG_FORMAT", "text") == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers = [_DeferredQueueHandler(log_queue)]
+    root.setLevel(level or os.getenv("LOG_LEVEL", "INFO"))
+
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -0,0 +1,239 @@
+"""
+Process-local metrics rendered in the Prometheus text format.
+
+Counters and histograms are kept in plain dicts keyed by label values, so
+recording costs a lock and a dict update. ``registry.render()`` produces
+the body served at /metrics.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
+
+# Seconds; wide enough for a sub-millisecond cache hit and a multi-minute discovery sweep
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic count per label combination"""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Bucketed observations per label combination"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple, List] = {}  # key -> [per-bucket counts (+Inf last), sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted((key, ([*entry[0]], entry[1], entry[2])) for key, entry in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+DISCOVERY_STAGE_SECONDS = registry.register(Histogram(
+    "bottom_discovery_stage_seconds", "Time spent per discovery stage", ("stage", "chain")
+))
+HTTP_REQUEST_SECONDS = registry.register(Histogram(
+    "bottom_http_request_seconds", "API request latency by endpoint", ("method", "endpoint", "status")
+))
+DEXSCREENER_REQUESTS = registry.register(Counter(
+    "bottom_dexscreener_requests_total", "Dexscreener responses by endpoint family and status", ("endpoint", "status")
+))
+DEXSCREENER_REQUEST_SECONDS = registry.register(Histogram(
+    "bottom_dexscreener_request_seconds", "Dexscreener response time by endpoint family", ("endpoint",)
+))
+CACHE_REQUESTS = registry.register(Counter(
+    "bottom_cache_requests_total", "Cache lookups by cache and result (hit/miss)", ("cache", "result")
+))
+DB_QUERY_SECONDS = registry.register(Histogram(
+    "bottom_db_query_seconds", "Database statement time by statement type", ("operation",)
+))
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+# Path segment -> endpoint family, so per-token URLs do not explode label cardinality
+_DEXSCREENER_FAMILIES = {
+    "search": "search",
+    "pairs": "pairs",
+    "token-pairs": "pairs",
+    "tokens": "tokens",
+    "token-profiles": "feed",
+    "token-boosts": "feed",
+}
+
+
+def dexscreener_family(url: str) -> str:
+    segments = [s for s in urlsplit(str(url)).path.split("/") if s]
+    # Legacy endpoints live under /latest/dex/<family>
+    if segments[:2] == ["latest", "dex"]:
+        segments = segments[2:]
+    return _DEXSCREENER_FAMILIES.get(segments[0], "other") if segments else "other"
+
+
+async def _stamp_request(request):
+    request.extensions["metrics_start"] = time.perf_counter()
+
+
+async def _record_response(response):
+    family = dexscreener_family(response.request.url)
+    DEXSCREENER_REQUESTS.inc(endpoint=family, status=str(response.status_code))
+    start = response.request.extensions.get("metrics_start")
+    if start is not None:
+        DEXSCREENER_REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=family)
+
+
+def dexscreener_event_hooks() -> Dict:
+    """httpx event hooks counting Dexscreener responses and timing them up to the response headers"""
+    return {"request": [_stamp_request], "response": [_record_response]}
+
+
+def instrument_engine(engine):
+    """Time every statement run through a SQLAlchemy engine"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["metrics_query_start"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        if operation not in ("SELECT", "INSERT", "UPDATE", "DELETE"):
+            operation = "OTHER"
+        DB_QUERY_SECONDS.observe(time.perf_counter() - start, operation=operation)
+
+
+class MetricsMiddleware:
+    """Records request latency labelled by the endpoint function that served it"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched endpoint in the shared scope
+            endpoint = scope.get("endpoint")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                endpoint=getattr(endpoint, "__name__", "unmatched"),
+                status=str(status["code"])
+            )
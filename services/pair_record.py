@@ -0,0 +1,177 @@
+"""
+Compact, typed view of a Dexscreener pair.
+
+Response bodies are decoded from bytes (orjson when installed) and each
+pair is projected once into a ``PairRecord``: the nested ``.get`` chains
+and float conversions run a single time, and every later stage (phoenix
+filter, parsing, scoring) reads plain attributes. ``__slots__`` keeps each
+record to the fields we actually use; the decoded payload (websites,
+socials, labels, ...) is dropped right away, or appended to ``raw_archive``
+when PAIR_ARCHIVE_DIR is set.
+"""
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from typing import IO, Any, Dict, List, Optional
+
+from services.json_codec import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+
+def _float(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class PairRecord:
+    """One Dexscreener pair reduced to the fields discovery and scoring read"""
+
+    __slots__ = (
+        "address", "symbol", "name", "quote_address", "chain", "pair_address", "dex_id",
+        "price_usd", "liquidity_usd", "volume_24h", "market_cap", "fdv",
+        "price_change_24h", "price_change_6h", "price_change_1h", "price_change_5m",
+        "buys_24h", "sells_24h", "pair_created_at",
+    )
+
+    def __init__(self, raw: Dict):
+        base_token = raw.get("baseToken") or {}
+        price_change = raw.get("priceChange") or {}
+        txns_24h = (raw.get("txns") or {}).get("h24") or {}
+
+        self.address: str = base_token.get("address") or ""
+        self.symbol: str = base_token.get("symbol") or ""
+        self.name: str = base_token.get("name") or ""
+        self.quote_address: str = (raw.get("quoteToken") or {}).get("address") or ""
+        # A handful of distinct values repeated across every pair
+        self.chain: str = sys.intern(raw.get("chainId") or "")
+        self.pair_address: str = raw.get("pairAddress") or ""
+        self.dex_id: str = sys.intern(raw.get("dexId") or "")
+        self.price_usd = _float(raw.get("priceUsd"))
+        self.liquidity_usd = _float((raw.get("liquidity") or {}).get("usd"))
+        self.volume_24h = _float((raw.get("volume") or {}).get("h24"))
+        self.market_cap = _float(raw.get("marketCap"))
+        self.fdv = _float(raw.get("fdv"))
+        self.price_change_24h = _float(price_change.get("h24"))
+        self.price_change_6h = _float(price_change.get("h6"))
+        self.price_change_1h = _float(price_change.get("h1"))
+        self.price_change_5m = _float(price_change.get("m5"))
+        self.buys_24h: int = txns_24h.get("buys") or 0
+        self.sells_24h: int = txns_24h.get("sells") or 0
+        self.pair_created_at: Optional[int] = raw.get("pairCreatedAt")
+
+    @property
+    def url(self) -> str:
+        return f"https://dexscreener.com/{self.chain}/{self.pair_address}" if self.pair_address else ""
+
+    def __repr__(self) -> str:
+        return f"PairRecord({self.chain}:{self.symbol} {self.address})"
+
+    def to_dict(self) -> Dict:
+        """The flat token data dict stored and scored by the rest of the app"""
+        token_age_days = None
+        if self.pair_created_at:
+            created_date = datetime.fromtimestamp(self.pair_created_at / 1000)
+            token_age_days = (datetime.utcnow() - created_date).days
+
+        return {
+            "address": self.address,
+            "symbol": self.symbol,
+            "name": self.name,
+            "chain": self.chain,
+            "current_price": self.price_usd,
+            "market_cap": self.market_cap,
+            "fdv": self.fdv,
+            "liquidity_usd": self.liquidity_usd,
+            "volume_24h": self.volume_24h,
+            "price_change_24h": self.price_change_24h,
+            "price_change_6h": self.price_change_6h,
+            "price_change_1h": self.price_change_1h,
+            "price_change_5m": self.price_change_5m,
+            "buys_24h": self.buys_24h,
+            "sells_24h": self.sells_24h,
+            "pair_created_at": self.pair_created_at,
+            "token_age_days": token_age_days,
+            "dex_id": self.dex_id,
+            "pair_address": self.pair_address,
+            "url": self.url,
+        }
+
+
+class RawArchive:
+    """Appends raw pair payloads to one JSON-lines file per UTC day; disabled until opened"""
+
+    def __init__(self):
+        self.directory: Optional[str] = None
+        self._day = ""
+        self._file: Optional[IO[bytes]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def open(self, directory: Optional[str]):
+        self.close()
+        self.directory = directory or None
+        if self.directory:
+            logger.info(f"Archiving raw Dexscreener pairs to {self.directory}")
+
+    def write(self, pairs: List):
+        try:
+            day = time.strftime("%Y%m%d", time.gmtime())
+            if self._file is None or day != self._day:
+                self.close_file()
+                os.makedirs(self.directory, exist_ok=True)
+                # Buffered, so a sweep costs a few large writes rather than one per pair
+                self._file = open(os.path.join(self.directory, f"pairs-{day}.jsonl"), "ab", buffering=1 << 20)
+                self._day = day
+            fetched_at = int(time.time())
+            for raw in pairs:
+                self._file.write(dumps({"fetched_at": fetched_at, "pair": raw}) + b"\n")
+        except Exception as e:
+            logger.error(f"Error archiving raw pairs to {self.directory}: {e}")
+            self.directory = None
+            self.close_file()
+
+    def close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        self.close_file()
+        self.directory = None
+
+
+raw_archive = RawArchive()
+
+
+def decode_pairs(body: bytes) -> List[PairRecord]:
+    """
+    Decode a Dexscreener response body into records
+
+    Accepts both the ``{"pairs": [...]}`` envelope of the legacy endpoints
+    and the bare list returned by the v1 endpoints.
+    """
+    try:
+        data = loads(body)
+    except ValueError as e:
+        logger.error(f"Error decoding Dexscreener response: {e}")
+        return []
+
+    if isinstance(data, dict):
+        data = data.get("pairs")
+    if not isinstance(data, list):
+        return []
+    if raw_archive.enabled:
+        raw_archive.write(data)
+    return [PairRecord(raw) for raw in data if isinstance(raw, dict)]
+
+
+def best_pair(records: List[PairRecord]) -> Optional[PairRecord]:
+    """The most liquid record, or None"""
+    return max(records, key=lambda r: r.liquidity_usd, default=None)
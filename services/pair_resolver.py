@@ -0,0 +1,128 @@
+"""
+Token -> most liquid pair resolution, persisted across restarts.
+
+Refreshing a token through the tokens endpoint downloads its whole pool
+list just to pick the most liquid pair. Once that pair is known, hot
+refreshes ask the pairs endpoint for it directly, 30 pairs per request.
+The full pool list is only fetched again when the mapping is older than
+PAIR_REVALIDATE_SECONDS or its pair stops coming back.
+"""
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
+from sqlalchemy.orm import Session
+
+from models.database import TokenPair
+from services.pair_record import PairRecord
+
+logger = logging.getLogger(__name__)
+
+# A token's most liquid pool rarely changes; re-download its full pool list this often
+PAIR_REVALIDATE_SECONDS = 6 * 3600
+
+
+class PairResolver:
+    """Token -> most liquid pair mapping, persisted in token_pairs and revalidated on a slow schedule"""
+
+    def __init__(self, revalidate_seconds: float = PAIR_REVALIDATE_SECONDS):
+        self.revalidate_seconds = revalidate_seconds
+        self.pairs: Dict[str, Tuple[str, str, float, float]] = {}  # token -> (chain, pair, liquidity, resolved_at)
+        self._dirty: set = set()
+        self.loaded = False
+
+    def load(self, db: Session):
+        self.pairs = {
+            row.token_address: (row.chain, row.pair_address, row.liquidity_usd or 0.0,
+                                row.resolved_at.timestamp() if row.resolved_at else 0.0)
+            for row in db.query(TokenPair).all()
+        }
+        self._dirty.clear()
+        self.loaded = True
+        logger.info(f"Pair resolver loaded {len(self.pairs)} token pairs")
+
+    def fresh_pair(self, token_address: str, chain: str, now: Optional[float] = None) -> Optional[str]:
+        """Mapped pair address if it was resolved within the revalidation window"""
+        entry = self.pairs.get(token_address)
+        if entry is None or entry[0] != chain:
+            return None
+        now = now if now is not None else time.time()
+        return entry[1] if now - entry[3] < self.revalidate_seconds else None
+
+    def remember(self, token_address: str, pair: PairRecord, now: Optional[float] = None):
+        now = now if now is not None else time.time()
+        self.pairs[token_address] = (pair.chain, pair.pair_address, pair.liquidity_usd, now)
+        self._dirty.add(token_address)
+
+    async def iter_resolved(self, dex_service, chain: str, addresses: List[str]) -> AsyncIterator[Tuple[str, PairRecord]]:
+        """
+        Yield (address, pair record) for each address that has one, as lookups finish
+
+        Tokens with a fresh mapping share batched pair lookups; the rest, and
+        any whose mapped pair no longer comes back, download their full pool
+        list and are re-mapped to its most liquid pair. Call ``load`` first;
+        this touches no database state.
+        """
+        async def lookup_pairs(fresh: Dict[str, str]) -> List[Tuple[str, Optional[PairRecord]]]:
+            found = {}
+            for pair in await dex_service.get_pairs(chain, [self.pairs[a][1] for a in fresh.values()]):
+                address = fresh.get(pair.pair_address.lower())
+                if address and pair.address == address:
+                    found[address] = pair
+            # Misses come back as None and are re-resolved from the token's pool list
+            return [(address, found.get(address)) for address in fresh.values()]
+
+        async def lookup_token(address: str) -> List[Tuple[str, Optional[PairRecord]]]:
+            pair = await dex_service.get_token_data(address, chain=chain)
+            if pair is not None:
+                self.remember(address, pair)
+            return [(address, pair or False)]
+
+        fresh: Dict[str, str] = {}  # lower-cased pair address -> token
+        pending = set()
+        for address in addresses:
+            pair_address = self.fresh_pair(address, chain)
+            if pair_address:
+                fresh[pair_address.lower()] = address
+            else:
+                pending.add(asyncio.create_task(lookup_token(address)))
+        if fresh:
+            pending.add(asyncio.create_task(lookup_pairs(fresh)))
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    for address, pair in task.result():
+                        if pair is None:
+                            pending.add(asyncio.create_task(lookup_token(address)))
+                        elif pair:
+                            yield address, pair
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def save(self, db: Session):
+        """Write mappings resolved since the last save"""
+        if not self._dirty:
+            return
+        try:
+            for address in self._dirty:
+                chain, pair_address, liquidity, resolved_at = self.pairs[address]
+                db.merge(TokenPair(
+                    token_address=address,
+                    chain=chain,
+                    pair_address=pair_address,
+                    liquidity_usd=liquidity,
+                    resolved_at=datetime.fromtimestamp(resolved_at)
+                ))
+            db.commit()
+            self._dirty.clear()
+        except Exception as e:
+            logger.error(f"Error saving token pairs: {e}")
+            db.rollback()
+
+
+pair_resolver = PairResolver()
@@ -0,0 +1,313 @@
+"""
+Adaptive (AIMD) request pacing for Dexscreener, shared by every caller in the process.
+
+Each endpoint family gets its own request rate. Clean, fast responses
+raise it additively, by about ``increase`` requests/s for every second of
+traffic, up to the family ceiling. Near the rate of the last 429 the rise
+slows tenfold, so the limiter settles just under the server's real limit
+instead of repeatedly overshooting it. A 429 cuts the rate by ``decrease``
+and pauses the family for Retry-After. Slow responses or transport errors
+trim it by 10%. Cuts are applied at most once per ``cooldown`` so a burst
+of in-flight failures counts as one congestion signal.
+
+Requests made under ``prioritized()`` take the next free start slot ahead
+of any background request already waiting, without raising the family's
+overall rate.
+
+Hedged requests send a duplicate once the first has run past the family's
+recent p95 response time and take whichever answers first. Hedges are
+capped at ``hedge_budget`` of hedge-eligible requests.
+
+When a ResponseCache is attached, fresh cached bodies are returned before
+any pacing and successful responses are written back to it. Its SQLite
+reads and writes run on the default executor, off the event loop.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Optional, Set
+
+import httpx
+
+from services.metrics import Counter, Histogram, dexscreener_family, record_cache, registry
+from services.response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+# Requests per second. Ceilings are Dexscreener's published limits: 300 requests/min (5/s)
+# for search, pairs and tokens, 60 requests/min (1/s) for the feeds and every other endpoint
+FAMILY_LIMITS = {
+    "search": {"initial_rate": 2.0, "max_rate": 5.0},
+    "pairs": {"initial_rate": 2.0, "max_rate": 5.0},
+    "tokens": {"initial_rate": 2.0, "max_rate": 5.0},
+    "feed": {"initial_rate": 0.5, "max_rate": 1.0},
+    "other": {"initial_rate": 0.5, "max_rate": 1.0},
+}
+
+# Set for on-demand work (a user waiting on a refresh) so it starts ahead of discovery sweeps
+_priority: ContextVar[bool] = ContextVar("dexscreener_priority", default=False)
+
+RATE_ADJUSTMENTS = registry.register(Counter(
+    "bottom_rate_limiter_adjustments_total", "Adaptive limiter rate changes by family and reason", ("family", "reason")
+))
+HEDGES = registry.register(Counter(
+    "bottom_dexscreener_hedges_total", "Hedge decisions for slow requests by family and outcome (won/lost/skipped)", ("endpoint", "outcome")
+))
+HEDGE_SAVED_SECONDS = registry.register(Histogram(
+    "bottom_dexscreener_hedge_saved_seconds", "How much sooner a winning hedge answered than its primary", ("endpoint",)
+))
+
+# Hedge only once a family has this many successful responses to take a p95 from
+HEDGE_MIN_SAMPLES = 20
+# Unused hedge budget banked for bursts of slow responses
+HEDGE_BURST = 5
+
+
+class AdaptiveRateLimiter:
+    """Paces request starts for one endpoint family and adapts the rate to the responses"""
+
+    def __init__(self, family: str, initial_rate: float = 2.0, max_rate: float = 5.0,
+                 min_rate: float = 0.2, increase: float = 0.5, decrease: float = 0.7,
+                 latency_threshold: float = 3.0, max_concurrency: int = 8, cooldown: float = 2.0):
+        self.family = family
+        self.rate = initial_rate
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_threshold = latency_threshold
+        self.cooldown = cooldown
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self._next_start = 0.0
+        self._priority_next = 0.0
+        self._displaced = 0  # background slots handed to priority requests
+        self._paused_until = 0.0
+        self._last_cut = 0.0
+        self._throttled_rate: Optional[float] = None  # rate at the most recent 429
+        self.latencies: Deque[float] = deque(maxlen=200)
+
+    async def acquire(self, priority: bool = False):
+        await self.semaphore.acquire()
+        try:
+            while True:
+                # Reserve the next start slot without holding a lock across the sleep
+                now = time.monotonic()
+                if priority:
+                    # Jump the queue: paced among priority requests only, and the next
+                    # background slot holder to wake queues again to give up the slot
+                    start = max(now, self._priority_next, self._paused_until)
+                    self._priority_next = start + 1 / self.rate
+                    if self._next_start > now:
+                        self._displaced += 1
+                    self._next_start = max(self._next_start, now) + 1 / self.rate
+                else:
+                    start = max(now, self._next_start, self._paused_until)
+                    self._next_start = start + 1 / self.rate
+                if start <= now:
+                    break
+                await asyncio.sleep(start - now)
+                if not priority and self._displaced:
+                    self._displaced -= 1
+                    continue
+                # A 429 that arrived while waiting voids the slot; queue again behind the pause
+                if time.monotonic() >= self._paused_until:
+                    break
+        except BaseException:
+            self.semaphore.release()
+            raise
+
+    def release(self):
+        self.semaphore.release()
+
+    def _cut(self, factor: float, reason: str) -> bool:
+        now = time.monotonic()
+        if now - self._last_cut < self.cooldown:
+            return False
+        self._last_cut = now
+        self.rate = max(self.min_rate, self.rate * factor)
+        # Slots reserved at the old rate would otherwise keep the burst going
+        self._next_start = max(self._next_start, now + 1 / self.rate)
+        RATE_ADJUSTMENTS.inc(family=self.family, reason=reason)
+        logger.info("Rate limiter %s cut to %.2f req/s (%s)", self.family, self.rate, reason)
+        return True
+
+    def latency_p95(self) -> Optional[float]:
+        """p95 of recent successful response times, or None until HEDGE_MIN_SAMPLES are in"""
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(len(ordered) * 0.95)]
+
+    def record(self, status_code: Optional[int], latency: float, retry_after: Optional[float] = None):
+        """Feed back one response (status_code None for a transport error)"""
+        if status_code == 200:
+            self.latencies.append(latency)
+        if status_code == 429:
+            throttled_at = self.rate
+            if self._cut(self.decrease, "throttled"):
+                self._throttled_rate = throttled_at
+            pause = retry_after if retry_after is not None else 1 / self.rate
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+        elif status_code is None or status_code >= 500 or latency > self.latency_threshold:
+            self._cut(0.9, "slow" if status_code is not None and status_code < 500 else "error")
+        elif self.rate < self.max_rate:
+            step = self.increase / self.rate
+            if self._throttled_rate and self.rate >= 0.9 * self._throttled_rate:
+                step /= 10
+            self.rate = min(self.max_rate, self.rate + step)
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
+
+
+class DexscreenerLimiter:
+    """One AdaptiveRateLimiter per endpoint family, picked from the request URL"""
+
+    def __init__(self, limits: Dict[str, Dict] = FAMILY_LIMITS, max_retries: int = 1, hedge_budget: float = 0.05):
+        self.limits = limits
+        self.max_retries = max_retries
+        self.limiters: Dict[str, AdaptiveRateLimiter] = {}
+        self.cache: Optional[ResponseCache] = None
+        # Fraction of hedge-eligible requests that may send a duplicate
+        self.hedge_budget = hedge_budget
+        self._hedge_tokens = 0.0
+        self._stragglers: Set[asyncio.Task] = set()  # primaries outrun by their hedge, still finishing
+
+    @contextmanager
+    def prioritized(self):
+        """Requests made inside (including from tasks started inside) start ahead of background traffic"""
+        token = _priority.set(True)
+        try:
+            yield
+        finally:
+            _priority.reset(token)
+
+    def for_family(self, family: str) -> AdaptiveRateLimiter:
+        limiter = self.limiters.get(family)
+        if limiter is None:
+            limiter = self.limiters[family] = AdaptiveRateLimiter(family, **self.limits.get(family, self.limits["other"]))
+        return limiter
+
+    async def get(self, client: httpx.AsyncClient, url: str, hedge: bool = False, **kwargs) -> httpx.Response:
+        """
+        client.get paced by the URL's family; a 429 is retried after the pause up to max_retries times
+
+        With ``hedge`` (implied for prioritized requests, which a user is
+        waiting on) a duplicate request is sent once the first has been out
+        longer than the family's observed p95, budget permitting, and the
+        first response wins.
+        """
+        family = dexscreener_family(url)
+        if self.cache is not None:
+            key = str(httpx.URL(url, params=kwargs.get("params")))
+            body = await asyncio.get_running_loop().run_in_executor(None, self.cache.get, key, family)
+            record_cache("dexscreener_disk", body is not None)
+            if body is not None:
+                return httpx.Response(200, content=body, request=httpx.Request("GET", key))
+
+        limiter = self.for_family(family)
+        if hedge or _priority.get():
+            response = await self._hedged(limiter, client, url, **kwargs)
+        else:
+            response = await self._send(limiter, client, url, **kwargs)
+
+        if self.cache is not None and response.status_code == 200:
+            await asyncio.get_running_loop().run_in_executor(None, self.cache.put, key, family, response.content)
+        return response
+
+    async def _send(self, limiter: AdaptiveRateLimiter, client: httpx.AsyncClient, url: str,
+                    sent: Optional[asyncio.Event] = None, **kwargs) -> httpx.Response:
+        priority = _priority.get()
+        for attempt in range(self.max_retries + 1):
+            await limiter.acquire(priority)
+            if sent is not None:
+                sent.set()
+            start = time.monotonic()
+            try:
+                response = await client.get(url, **kwargs)
+            except Exception:
+                limiter.record(None, time.monotonic() - start)
+                raise
+            finally:
+                limiter.release()
+
+            limiter.record(response.status_code, time.monotonic() - start, _retry_after(response))
+            if response.status_code != 429:
+                break
+        return response
+
+    def _take_hedge(self) -> bool:
+        if self._hedge_tokens < 1:
+            return False
+        self._hedge_tokens -= 1
+        return True
+
+    async def _hedged(self, limiter: AdaptiveRateLimiter, client: httpx.AsyncClient, url: str, **kwargs) -> httpx.Response:
+        # Every hedge-eligible request earns ``hedge_budget`` of a hedge, banked up to HEDGE_BURST
+        self._hedge_tokens = min(HEDGE_BURST, self._hedge_tokens + self.hedge_budget)
+        sent = asyncio.Event()
+        primary = asyncio.create_task(self._send(limiter, client, url, sent=sent, **kwargs))
+        try:
+            # The hedge clock starts once the primary leaves the pacing queue
+            leaving = asyncio.ensure_future(sent.wait())
+            try:
+                await asyncio.wait({primary, leaving}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                leaving.cancel()
+            delay = limiter.latency_p95()
+            if delay is None or primary.done():
+                return await primary
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                return primary.result()
+            if not self._take_hedge():
+                HEDGES.inc(endpoint=limiter.family, outcome="skipped")
+                return await primary
+        except BaseException:
+            primary.cancel()
+            raise
+
+        hedge_start = time.monotonic()
+        hedge = asyncio.create_task(self._send(limiter, client, url, **kwargs))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), None)
+                if winner is not None:
+                    break
+            else:
+                # Both failed; surface the primary's error
+                return primary.result()
+        except BaseException:
+            primary.cancel()
+            hedge.cancel()
+            raise
+
+        if winner is hedge:
+            HEDGES.inc(endpoint=limiter.family, outcome="won")
+            if pending:
+                # Let the slow primary finish in the background to measure what the hedge saved
+                won_at = time.monotonic()
+                primary.add_done_callback(lambda task: self._record_saving(limiter.family, won_at, task))
+                self._stragglers.add(primary)
+                primary.add_done_callback(self._stragglers.discard)
+        else:
+            HEDGES.inc(endpoint=limiter.family, outcome="lost")
+            hedge.cancel()
+        logger.debug("Hedged %s after %.2fs: %s answered %.2fs later", limiter.family, delay,
+                     "hedge" if winner is hedge else "primary", time.monotonic() - hedge_start)
+        return winner.result()
+
+    def _record_saving(self, family: str, won_at: float, primary: asyncio.Task):
+        if not primary.cancelled():
+            HEDGE_SAVED_SECONDS.observe(time.monotonic() - won_at, endpoint=family)
+
+dexscreener_limiter = DexscreenerLimiter()
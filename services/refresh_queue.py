@@ -0,0 +1,125 @@
+"""
+On-demand token refreshes for /api/token/{address}/brs.
+
+Concurrent requests for the same token share one in-flight job, so ten
+users opening a token cost one fetch and one score insert. Tokens scored
+within ``max_age`` seconds, whether by a previous refresh or by the last
+discovery cycle, are answered from that score without a job. Jobs run on
+a few workers whose Dexscreener requests start ahead of background
+sweeps (see ``DexscreenerLimiter.prioritized``).
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from models.database import get_session
+from services.leaderboard import leaderboard_state
+from services.metrics import record_cache
+from services.rate_limiter import dexscreener_limiter
+from services.token_manager import TokenManager
+
+logger = logging.getLogger(__name__)
+
+
+def _retrieve_exception(future: asyncio.Future):
+    if not future.cancelled():
+        future.exception()
+
+
+class RefreshQueue:
+    """Coalesced, prioritized token refresh jobs; raises asyncio.QueueFull when too many are waiting"""
+
+    def __init__(self, engine, max_age: float = 60.0, workers: int = 2, max_pending: int = 100):
+        self.engine = engine
+        self.max_age = max_age
+        self.workers = workers
+        self._queue: asyncio.Queue = asyncio.Queue(max_pending)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._recent: Dict[str, Tuple[float, Dict]] = {}  # address -> (refreshed at, phoenix)
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self.run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Jobs still queued will never run
+        for future in self._inflight.values():
+            future.cancel()
+        self._inflight.clear()
+
+    def _fresh(self, address: str) -> Optional[Dict]:
+        now = time.time()
+        recent = self._recent.get(address)
+        if recent and now - recent[0] < self.max_age:
+            return recent[1]
+
+        # Tokens the last discovery cycle just scored
+        index = leaderboard_state.index
+        row = index.get(address) if index is not None else None
+        if row and (datetime.utcnow() - datetime.fromisoformat(row["last_updated"])).total_seconds() < self.max_age:
+            return row
+        return None
+
+    async def get_brs(self, address: str) -> Optional[Dict]:
+        """Latest score for the token, refreshing it first unless it was scored within max_age"""
+        phoenix = self._fresh(address)
+        record_cache("brs_refresh", phoenix is not None)
+        if phoenix is not None:
+            return phoenix
+
+        future = self._inflight.get(address)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            # Every caller may have disconnected by the time the job fails
+            future.add_done_callback(_retrieve_exception)
+            self._queue.put_nowait(address)
+            self._inflight[address] = future
+        # Shielded so one caller disconnecting does not cancel the job for the others
+        return await asyncio.shield(future)
+
+    async def run(self):
+        while True:
+            address = await self._queue.get()
+            future = self._inflight[address]
+            try:
+                phoenix = await self.refresh(address)
+                future.set_result(phoenix)
+            except Exception as e:
+                logger.error(f"Error refreshing {address}: {e}")
+                future.set_exception(e)
+            finally:
+                del self._inflight[address]
+                # Worker cancelled mid-job: waiting callers get CancelledError instead of hanging
+                if not future.done():
+                    future.cancel()
+
+    async def refresh(self, address: str) -> Optional[Dict]:
+        session = get_session(self.engine)
+        token_manager = TokenManager(session)
+        try:
+            with dexscreener_limiter.prioritized():
+                token = await token_manager.update_token_data(address)
+            if not token:
+                return None
+
+            phoenix = token_manager.get_token_phoenix(address)
+            if phoenix is not None:
+                self._prune()
+                self._recent[address] = (time.time(), phoenix)
+            return phoenix
+        finally:
+            session.close()
+            await token_manager.cleanup()
+
+    def _prune(self):
+        cutoff = time.time() - self.max_age
+        for address in [a for a, (refreshed_at, _) in self._recent.items() if refreshed_at < cutoff]:
+            del self._recent[address]
+
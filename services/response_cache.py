@@ -0,0 +1,105 @@
+"""
+Optional on-disk cache of Dexscreener responses, shared across processes and restarts.
+
+Successful GET bodies are stored in a SQLite file keyed by the full URL
+(query string included) and served while younger than their endpoint
+family's TTL. It is meant for local development loops and for serverless
+cold starts, where a warm container's /tmp answers in milliseconds
+instead of re-running every search.
+
+Environment:
+- DEXSCREENER_CACHE_PATH: SQLite file to use; unset disables the cache
+- DEXSCREENER_CACHE_TTLS: per-family overrides in seconds, e.g. "search=600,pairs=60"
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds a response stays fresh, by endpoint family (see metrics.dexscreener_family)
+DEFAULT_TTLS = {
+    "search": 120,
+    "pairs": 30,
+    "tokens": 30,
+    "feed": 15,
+    "other": 30,
+}
+
+# Expired rows are swept after this many writes
+_SWEEP_EVERY = 200
+
+
+class ResponseCache:
+    """SQLite-backed URL -> body cache with per-family TTLs"""
+
+    def __init__(self, path: str, ttls: Optional[Dict[str, float]] = None):
+        self.path = path
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=2000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, family TEXT NOT NULL, fetched_at REAL NOT NULL, body BLOB NOT NULL)"
+        )
+
+    def ttl(self, family: str) -> float:
+        return self.ttls.get(family, self.ttls["other"])
+
+    def get(self, url: str, family: str) -> Optional[bytes]:
+        """Fresh body for url, or None"""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT fetched_at, body FROM responses WHERE url = ?", (url,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading response cache {self.path}: {e}")
+            return None
+        if row is None or time.time() - row[0] > self.ttl(family):
+            return None
+        return row[1]
+
+    def put(self, url: str, family: str, body: bytes):
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (url, family, fetched_at, body) VALUES (?, ?, ?, ?)",
+                    (url, family, time.time(), body)
+                )
+                self._writes += 1
+                if self._writes % _SWEEP_EVERY == 0:
+                    self._conn.execute(
+                        "DELETE FROM responses WHERE fetched_at < ?", (time.time() - max(self.ttls.values()),)
+                    )
+        except sqlite3.Error as e:
+            logger.error(f"Error writing response cache {self.path}: {e}")
+
+
+def cache_from_env() -> Optional[ResponseCache]:
+    """ResponseCache configured from the environment, or None when disabled"""
+    path = os.getenv("DEXSCREENER_CACHE_PATH")
+    if not path:
+        return None
+
+    ttls = {}
+    for item in os.getenv("DEXSCREENER_CACHE_TTLS", "").split(","):
+        family, _, seconds = item.partition("=")
+        try:
+            ttls[family.strip()] = float(seconds)
+        except ValueError:
+            continue
+
+    try:
+        cache = ResponseCache(path, ttls)
+        logger.info(f"Dexscreener response cache at {path}")
+        return cache
+    except sqlite3.Error as e:
+        logger.error(f"Error opening response cache {path}: {e}")
+        return None
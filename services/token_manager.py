@@ -1,32 +1,83 @@
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_, func
+from datetime import datetime
+from typing import AsyncIterator, List, Dict, Optional
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import desc, and_, or_, func
+import asyncio
 import logging
+import time
 
-from models.database import Token, BRSScore, Alert, Watchlist
-from services.dexscreener import DexscreenerService
+from models.database import Token, BRSScore, Alert, LeaderboardEntry
+from services.dexscreener import DexscreenerService, PAIRS_BATCH_SIZE
+from services.candidate_filter import DISCOVERY_FILTER
 from services.brs_calculator import BRSCalculator
+from services.chains import get_chain_config, get_discovery_chains
+from services.leaderboard import LeaderboardIndex, leaderboard_state, encode_cursor, decode_cursor
+from services.alert_engine import alert_engine, DEFAULT_ALERT_SCORE
+from services.pair_resolver import pair_resolver
+from services.metrics import DISCOVERY_STAGE_SECONDS
+from services.log_config import token_logger
 
 logger = logging.getLogger(__name__)
+token_log = token_logger(__name__)
+
+# Bound on each discovery pipeline hand-off; a full queue pauses the stage feeding it
+PIPELINE_QUEUE_SIZE = 32
 
 class TokenManager:
     def __init__(self, db_session: Session):
         self.db = db_session
         self.dex_service = DexscreenerService()
         self.brs_calculator = BRSCalculator()
+        # (address, symbol, brs_score) collected while a discovery cycle defers its alerts
+        self._scored_batch: Optional[List] = None
     
-    async def update_token_data(self, token_address: str) -> Optional[Token]:
+    async def update_token_data(self, token_address: str, chain: Optional[str] = None) -> Optional[Token]:
         """Fetch and update token data from Dexscreener"""
         try:
-            # Fetch data from Dexscreener
-            raw_data = await self.dex_service.get_token_data(token_address)
-            if not raw_data:
-                return None
-            
-            # Parse the data
-            parsed_data = self.dex_service.parse_token_data(raw_data)
+            if not chain:
+                token = self.db.query(Token).filter_by(address=token_address).first()
+                chain = token.chain if token and token.chain else "solana"
+            if not pair_resolver.loaded:
+                pair_resolver.load(self.db)
+        except Exception as e:
+            logger.error(f"Error updating token data for {token_address}: {e}")
+            self.db.rollback()
+            return None
+        
+        parsed_data = await self._fetch_token_data(token_address, chain)
+        pair_resolver.save(self.db)
+        if not parsed_data:
+            return None
+        return await self._store_token_data(token_address, parsed_data, chain)
+    
+    async def _fetch_token_data(self, token_address: str, chain: str) -> Optional[Dict]:
+        """Fetch and parse a token's most liquid pair; touches no database state"""
+        parsed_data = None
+        async for _, parsed_data in self._iter_token_data([token_address], chain):
+            pass
+        return parsed_data
+    
+    async def _iter_token_data(self, token_addresses: List[str], chain: str) -> AsyncIterator:
+        """Yield (address, parsed data) for each token as the pair resolver returns its most liquid pair"""
+        try:
+            # Fetch data from Dexscreener; time spent with the consumer is not counted
+            waited = time.perf_counter()
+            async for address, pair in pair_resolver.iter_resolved(self.dex_service, chain, token_addresses):
+                DISCOVERY_STAGE_SECONDS.observe(time.perf_counter() - waited, stage="fetch", chain=chain)
+                
+                # Parse the data
+                with DISCOVERY_STAGE_SECONDS.time(stage="parse", chain=chain):
+                    parsed_data = self.dex_service.parse_token_data(pair)
+                yield address, parsed_data
+                waited = time.perf_counter()
             
+        except Exception as e:
+            logger.error(f"Error fetching token data for {len(token_addresses)} tokens on {chain}: {e}")
+    
+    async def _store_token_data(self, token_address: str, parsed_data: Dict, chain: str) -> Optional[Token]:
+        """Persist parsed token data and score it; runs without yielding to the event loop"""
+        try:
+            persist_start = time.perf_counter()
             # Get or create token
             token = self.db.query(Token).filter_by(address=token_address).first()
             if not token:
@@ -68,6 +119,7 @@ class TokenManager:
                 token.crash_percentage = 0  # Reset crash percentage if at ATH
             
             self.db.commit()
+            DISCOVERY_STAGE_SECONDS.observe(time.perf_counter() - persist_start, stage="persist", chain=chain)
             
             # Calculate and store BRS score
             await self.calculate_and_store_brs(token, parsed_data)
@@ -83,19 +135,28 @@ class TokenManager:
         """Calculate BRS score and store in database"""
         try:
             # Calculate BRS
-            brs_data = self.brs_calculator.calculate_brs(latest_data)
+            scored_chain = token.chain
+            with DISCOVERY_STAGE_SECONDS.time(stage="score", chain=scored_chain):
+                brs_data = self.brs_calculator.calculate_brs(latest_data)
             
             # Create BRS score record
             brs_score = BRSScore(
                 token_address=token.address,
                 **brs_data
             )
+            scored = (token.address, token.symbol, brs_data["brs_score"])
             
-            self.db.add(brs_score)
-            self.db.commit()
+            with DISCOVERY_STAGE_SECONDS.time(stage="persist", chain=scored_chain):
+                self.db.add(brs_score)
+                self.db.flush()
+                self._update_leaderboard(token, brs_score, latest_data)
+                self.db.commit()
             
-            # Check if we need to create an alert
-            await self.check_and_create_alert(token, brs_data["brs_score"])
+            # Discovery evaluates alerts once for the whole cycle
+            if self._scored_batch is not None:
+                self._scored_batch.append(scored)
+            else:
+                self.create_alerts([scored])
             
             return brs_score
             
@@ -106,53 +167,59 @@ class TokenManager:
     
     async def check_and_create_alert(self, token: Token, brs_score: float):
         """Check if we should create an alert for this token"""
+        self.create_alerts([(token.address, token.symbol, brs_score)])
+    
+    def create_alerts(self, scored: List) -> List[Alert]:
+        """Evaluate (address, symbol, brs_score) tuples against the alert engine and insert the alerts in one commit"""
+        if not alert_engine.loaded:
+            alert_engine.load(self.db)
+        
+        with DISCOVERY_STAGE_SECONDS.time(stage="alert", chain="all"):
+            alerts = alert_engine.evaluate(scored, self.brs_calculator)
+        if not alerts:
+            return []
+        
         try:
-            # Get score interpretation
-            category, description = self.brs_calculator.get_score_interpretation(brs_score)
-            
-            # Only alert for high scores
-            if brs_score < 60:
-                return
-            
-            # Check if we already sent an alert recently (within 24 hours)
-            recent_alert = self.db.query(Alert).filter(
-                and_(
-                    Alert.token_address == token.address,
-                    Alert.timestamp > datetime.utcnow() - timedelta(hours=24)
-                )
-            ).first()
-            
-            if recent_alert:
-                return
-            
-            # Create alert
-            alert = Alert(
-                token_address=token.address,
-                alert_type=category.lower().replace(" ", "_"),
-                message=f"🚀 {token.symbol} - {category}: {description}. BRS Score: {brs_score}",
-                score_at_alert=brs_score
-            )
-            
-            self.db.add(alert)
-            self.db.commit()
+            with DISCOVERY_STAGE_SECONDS.time(stage="persist", chain="all"):
+                self.db.add_all(alerts)
+                self.db.commit()
+            logger.info(f"Created {len(alerts)} alerts from {len(scored)} scored tokens")
+            return alerts
             
         except Exception as e:
-            logger.error(f"Error creating alert: {e}")
+            logger.error(f"Error creating alerts: {e}")
             self.db.rollback()
+            alert_engine.forget(alerts)
+            return []
     
-    async def get_top_phoenixes(self, limit: int = 20, min_score: float = 0, 
-                               chain: Optional[str] = None, min_market_cap: float = 500000,
-                               min_volume: float = 50000) -> List[Dict]:
-        """Get top phoenix tokens by BRS score"""
+    def _update_leaderboard(self, token: Token, brs_score: BRSScore, latest_data: Dict):
+        """Point the token's leaderboard row at its newest score"""
+        entry = self.db.get(LeaderboardEntry, token.address)
+        if not entry:
+            entry = LeaderboardEntry(token_address=token.address)
+            self.db.add(entry)
+        
+        entry.brs_score_id = brs_score.id
+        entry.brs_score = brs_score.brs_score
+        entry.chain = token.chain
+        entry.market_cap = token.market_cap
+        entry.volume_24h = token.volume_24h
+        entry.fdv = latest_data.get("fdv", token.market_cap)
+        entry.price_change_24h = latest_data.get("price_change_24h", 0)
+        entry.updated_at = datetime.utcnow()
+    
+    def rebuild_leaderboard(self) -> int:
+        """Backfill the leaderboard from brs_scores for databases created before it existed"""
         try:
-            # First, get the latest BRS score for each token
+            if self.db.query(LeaderboardEntry).first():
+                return 0
+            
             latest_scores = self.db.query(
                 BRSScore.token_address,
                 func.max(BRSScore.timestamp).label('max_timestamp')
             ).group_by(BRSScore.token_address).subquery()
             
-            # Join with the full BRS scores and tokens
-            query = self.db.query(Token, BRSScore).join(
+            results = self.db.query(Token, BRSScore).join(
                 BRSScore, Token.address == BRSScore.token_address
             ).join(
                 latest_scores,
@@ -160,88 +227,188 @@ class TokenManager:
                     BRSScore.token_address == latest_scores.c.token_address,
                     BRSScore.timestamp == latest_scores.c.max_timestamp
                 )
-            )
+            ).all()
             
-            # Apply filters
-            if chain and chain != "all":
-                query = query.filter(Token.chain == chain)
+            for token, brs in results:
+                self._update_leaderboard(token, brs, {})
+            self.db.commit()
             
-            # Filter by market cap
-            query = query.filter(Token.market_cap >= min_market_cap)
+            logger.info(f"Rebuilt leaderboard with {len(results)} tokens")
+            return len(results)
             
-            # Filter by volume
-            query = query.filter(Token.volume_24h >= min_volume)
+        except Exception as e:
+            logger.error(f"Error rebuilding leaderboard: {e}")
+            self.db.rollback()
+            return 0
+    
+    def build_leaderboard_index(self) -> Optional[LeaderboardIndex]:
+        """Load the whole leaderboard into an in-memory index"""
+        try:
+            entries = self.db.query(LeaderboardEntry).options(
+                joinedload(LeaderboardEntry.token), joinedload(LeaderboardEntry.score)
+            ).all()
             
-            # Filter by BRS score
-            query = query.filter(BRSScore.brs_score >= min_score)
+            index = LeaderboardIndex([self._format_phoenix(e.token, e.score, e) for e in entries])
+            logger.info(f"Built leaderboard index with {len(index)} tokens")
+            return index
             
-            # Order by BRS score and limit
-            results = query.order_by(desc(BRSScore.brs_score)).limit(limit).all()
+        except Exception as e:
+            logger.error(f"Error building leaderboard index: {e}")
+            return None
+    
+    def build_cycle_stats(self, index: Optional[LeaderboardIndex]) -> Dict:
+        """Counters published with each cycle's index, for the bot's /stats"""
+        rows = index.rows if index else []
+        try:
+            alerts_sent = self.db.query(func.count(Alert.id)).filter(Alert.sent_status == True).scalar() or 0
+        except Exception as e:
+            logger.error(f"Error counting sent alerts: {e}")
+            alerts_sent = 0
+        
+        return {
+            "tokens_tracked": len(rows),
+            "phoenixes_found": sum(1 for row in rows if row["brs_score"] >= DEFAULT_ALERT_SCORE),
+            "alerts_sent": alerts_sent,
+            "watched_tokens": len(alert_engine.thresholds)
+        }
+    
+    def _leaderboard_query(self, min_score: float, chain: Optional[str],
+                           min_market_cap: float, min_volume: float):
+        query = self.db.query(LeaderboardEntry)
+        
+        # Apply filters
+        if chain and chain != "all":
+            query = query.filter(LeaderboardEntry.chain == chain)
+        
+        # Filter by market cap
+        query = query.filter(LeaderboardEntry.market_cap >= min_market_cap)
+        
+        # Filter by volume
+        query = query.filter(LeaderboardEntry.volume_24h >= min_volume)
+        
+        # Filter by BRS score
+        query = query.filter(LeaderboardEntry.brs_score >= min_score)
+        
+        return query
+    
+    async def get_top_phoenixes(self, limit: int = 20, min_score: float = 0, 
+                               chain: Optional[str] = None, min_market_cap: float = 500000,
+                               min_volume: float = 50000) -> List[Dict]:
+        """Get top phoenix tokens by BRS score"""
+        page = await self.get_top_phoenixes_page(
+            limit=limit, min_score=min_score, chain=chain,
+            min_market_cap=min_market_cap, min_volume=min_volume
+        )
+        return page["items"]
+    
+    async def get_top_phoenixes_page(self, limit: int = 20, cursor: Optional[str] = None,
+                                     min_score: float = 0, chain: Optional[str] = None,
+                                     min_market_cap: float = 500000, min_volume: float = 50000) -> Dict:
+        """
+        Get one page of phoenix tokens ordered by (brs_score desc, address asc)
+        
+        Returns dict with:
+        - items: formatted tokens
+        - next_cursor: opaque cursor for the following page, or None
+        - total: rows matching the filters, counted once per discovery cycle
+        """
+        # Raises ValueError for a malformed cursor
+        after = decode_cursor(cursor) if cursor else None
+        
+        # Served from memory once the first discovery cycle has published its index
+        index = leaderboard_state.index
+        if index is not None:
+            return index.query(
+                limit=limit, after=after, min_score=min_score, chain=chain,
+                min_market_cap=min_market_cap, min_volume=min_volume
+            )
+        
+        try:
+            query = self._leaderboard_query(min_score, chain, min_market_cap, min_volume)
             
-            # Format results
-            phoenixes = []
-            for token, brs in results:
-                category, description = self.brs_calculator.get_score_interpretation(brs.brs_score)
-                
-                logger.info(f"Processing token {token.symbol} for top phoenixes")
-                
-                # Get fresh data for price changes
-                fresh_data = await self.dex_service.get_token_data(token.address)
-                if fresh_data:
-                    parsed_fresh = self.dex_service.parse_token_data(fresh_data)
-                    price_change_24h = parsed_fresh.get("price_change_24h", 0)
-                    
-                    # Get FDV from fresh data
-                    fdv = float(fresh_data.get("fdv", 0))
-                    logger.info(f"Got fresh data for {token.symbol}: price_change_24h={price_change_24h}, fdv={fdv}")
-                else:
-                    price_change_24h = 0
-                    fdv = token.market_cap
-                    logger.warning(f"No fresh data for {token.symbol}")
-                
-                # Calculate token age
-                token_age_days = 0
-                if token.first_seen_date:
-                    token_age_days = (datetime.utcnow() - token.first_seen_date).days
-                
-                phoenix_data = {
-                    "address": token.address,
-                    "symbol": token.symbol,
-                    "name": token.name,
-                    "chain": token.chain,
-                    "current_price": token.current_price,
-                    "crash_percentage": token.crash_percentage if token.crash_percentage else 75.0,  # Default if not set
-                    "liquidity_usd": token.liquidity_usd,
-                    "volume_24h": token.volume_24h,
-                    "market_cap": token.market_cap,
-                    "fdv": fdv,  # Add FDV
-                    "price_change_24h": price_change_24h,  # Add 24h price change
-                    "brs_score": brs.brs_score,
-                    "category": category,
-                    "description": description,
-                    "holder_resilience_score": brs.holder_resilience_score,
-                    "volume_floor_score": brs.volume_floor_score,
-                    "price_recovery_score": brs.price_recovery_score,
-                    "distribution_health_score": brs.distribution_health_score,
-                    "revival_momentum_score": brs.revival_momentum_score,
-                    "smart_accumulation_score": brs.smart_accumulation_score,
-                    "buy_sell_ratio": brs.buy_sell_ratio,
-                    "volume_trend": brs.volume_trend,
-                    "price_trend": brs.price_trend,
-                    "last_updated": token.last_updated.isoformat(),
-                    "first_seen_date": token.first_seen_date.isoformat() if token.first_seen_date else None,
-                    "token_age_days": token_age_days
-                }
-                
-                phoenixes.append(phoenix_data)
+            total = leaderboard_state.get_count(
+                (chain, min_score, min_market_cap, min_volume), query.count
+            )
             
-            return phoenixes
+            # Seek past the last row of the previous page instead of using OFFSET
+            if after:
+                score, address = after
+                query = query.filter(or_(
+                    LeaderboardEntry.brs_score < score,
+                    and_(LeaderboardEntry.brs_score == score, LeaderboardEntry.token_address > address)
+                ))
+            
+            entries = query.options(
+                joinedload(LeaderboardEntry.token), joinedload(LeaderboardEntry.score)
+            ).order_by(
+                desc(LeaderboardEntry.brs_score), LeaderboardEntry.token_address
+            ).limit(limit + 1).all()
+            
+            next_cursor = None
+            if len(entries) > limit:
+                entries = entries[:limit]
+                next_cursor = encode_cursor(entries[-1].brs_score, entries[-1].token_address)
+            
+            return {
+                "items": [self._format_phoenix(entry.token, entry.score, entry) for entry in entries],
+                "next_cursor": next_cursor,
+                "total": total
+            }
             
         except Exception as e:
             logger.error(f"Error getting top phoenixes: {e}")
             import traceback
             traceback.print_exc()
-            return []
+            return {"items": [], "next_cursor": None, "total": 0}
+    
+    def get_token_phoenix(self, token_address: str) -> Optional[Dict]:
+        """The token's leaderboard row, formatted like get_top_phoenixes items"""
+        try:
+            entry = self.db.query(LeaderboardEntry).options(
+                joinedload(LeaderboardEntry.token), joinedload(LeaderboardEntry.score)
+            ).filter(LeaderboardEntry.token_address == token_address).first()
+            return self._format_phoenix(entry.token, entry.score, entry) if entry else None
+            
+        except Exception as e:
+            logger.error(f"Error getting phoenix {token_address}: {e}")
+            return None
+    
+    def _format_phoenix(self, token: Token, brs: BRSScore, entry: LeaderboardEntry) -> Dict:
+        category, description = self.brs_calculator.get_score_interpretation(brs.brs_score)
+        
+        # Calculate token age
+        token_age_days = 0
+        if token.first_seen_date:
+            token_age_days = (datetime.utcnow() - token.first_seen_date).days
+        
+        return {
+            "address": token.address,
+            "symbol": token.symbol,
+            "name": token.name,
+            "chain": token.chain,
+            "current_price": token.current_price,
+            "crash_percentage": token.crash_percentage if token.crash_percentage else 75.0,  # Default if not set
+            "liquidity_usd": token.liquidity_usd,
+            "volume_24h": token.volume_24h,
+            "market_cap": token.market_cap,
+            "fdv": entry.fdv if entry.fdv is not None else token.market_cap,
+            "price_change_24h": entry.price_change_24h or 0,
+            "brs_score": brs.brs_score,
+            "category": category,
+            "description": description,
+            "holder_resilience_score": brs.holder_resilience_score,
+            "volume_floor_score": brs.volume_floor_score,
+            "price_recovery_score": brs.price_recovery_score,
+            "distribution_health_score": brs.distribution_health_score,
+            "revival_momentum_score": brs.revival_momentum_score,
+            "smart_accumulation_score": brs.smart_accumulation_score,
+            "buy_sell_ratio": brs.buy_sell_ratio,
+            "volume_trend": brs.volume_trend,
+            "price_trend": brs.price_trend,
+            "last_updated": token.last_updated.isoformat(),
+            "first_seen_date": token.first_seen_date.isoformat() if token.first_seen_date else None,
+            "token_age_days": token_age_days
+        }
     
     async def get_token_analysis(self, token_address: str) -> Optional[Dict]:
         """Get detailed analysis for why a token was selected as a phoenix"""
@@ -271,7 +438,7 @@ class TokenManager:
             token, brs = result
             
             # Get fresh data from Dexscreener for detailed analysis
-            raw_data = await self.dex_service.get_token_data(token_address)
+            raw_data = await self.dex_service.get_token_data(token_address, hedge=True)
             if not raw_data:
                 return None
             
@@ -286,6 +453,7 @@ class TokenManager:
             
             # Get category interpretation
             category, description = self.brs_calculator.get_score_interpretation(brs.brs_score)
+            max_scores = self.brs_calculator.get_max_scores()
             
             # Get volume history (30 days)
             volume_history = self.dex_service.generate_volume_history(
@@ -300,7 +468,7 @@ class TokenManager:
                 "current_price": token.current_price  # Ensure we have the price
             }
             
-            logger.info(f"Calling generate_large_transactions with price: {transaction_data.get('current_price')}")
+            logger.debug("Calling generate_large_transactions with price: %s", transaction_data.get("current_price"))
             
             large_transactions = self.dex_service.generate_large_transactions(
                 token_data=transaction_data,
@@ -310,7 +478,7 @@ class TokenManager:
             # Filter for large buys only
             large_buys = [tx for tx in large_transactions if tx["type"] == "buy" and tx["usd_amount"] >= 3000]
             
-            logger.info(f"Generated {len(large_transactions)} transactions, {len(large_buys)} are large buys > $3000")
+            logger.debug("Generated %d transactions, %d are large buys > $3000", len(large_transactions), len(large_buys))
             
             # Build detailed analysis
             analysis = {
@@ -354,38 +522,38 @@ class TokenManager:
                     "score_breakdown": {
                         "holder_resilience": {
                             "score": brs.holder_resilience_score,
-                            "max_score": 20,
-                            "percentage": (brs.holder_resilience_score / 20 * 100),
+                            "max_score": max_scores["holder_resilience"],
+                            "percentage": (brs.holder_resilience_score / max_scores["holder_resilience"] * 100),
                             "explanation": self._explain_holder_resilience(brs.holder_resilience_score, brs.buy_sell_ratio)
                         },
                         "volume_floor": {
                             "score": brs.volume_floor_score,
-                            "max_score": 20,
-                            "percentage": (brs.volume_floor_score / 20 * 100),
+                            "max_score": max_scores["volume_floor"],
+                            "percentage": (brs.volume_floor_score / max_scores["volume_floor"] * 100),
                             "explanation": self._explain_volume_floor(brs.volume_floor_score, token.volume_24h)
                         },
                         "price_recovery": {
                             "score": brs.price_recovery_score,
-                            "max_score": 20,
-                            "percentage": (brs.price_recovery_score / 20 * 100),
+                            "max_score": max_scores["price_recovery"],
+                            "percentage": (brs.price_recovery_score / max_scores["price_recovery"] * 100),
                             "explanation": self._explain_price_recovery(brs.price_recovery_score, parsed_data)
                         },
                         "distribution_health": {
                             "score": brs.distribution_health_score,
-                            "max_score": 10,
-                            "percentage": (brs.distribution_health_score / 10 * 100),
+                            "max_score": max_scores["distribution_health"],
+                            "percentage": (brs.distribution_health_score / max_scores["distribution_health"] * 100),
                             "explanation": self._explain_distribution_health(brs.distribution_health_score, token)
                         },
                         "revival_momentum": {
                             "score": brs.revival_momentum_score,
-                            "max_score": 15,
-                            "percentage": (brs.revival_momentum_score / 15 * 100),
+                            "max_score": max_scores["revival_momentum"],
+                            "percentage": (brs.revival_momentum_score / max_scores["revival_momentum"] * 100),
                             "explanation": self._explain_revival_momentum(brs.revival_momentum_score, token, parsed_data)
                         },
                         "smart_accumulation": {
                             "score": brs.smart_accumulation_score,
-                            "max_score": 15,
-                            "percentage": (brs.smart_accumulation_score / 15 * 100),
+                            "max_score": max_scores["smart_accumulation"],
+                            "percentage": (brs.smart_accumulation_score / max_scores["smart_accumulation"] * 100),
                             "explanation": self._explain_smart_accumulation(brs.smart_accumulation_score, parsed_data)
                         }
                     }
@@ -526,68 +694,148 @@ class TokenManager:
         
         return risks
     
-    async def discover_new_phoenixes(self, chains: List[str] = ["solana"]):
-        """Discover new potential phoenix tokens - focused on Solana"""
+    async def discover_new_phoenixes(self, chains: Optional[List[str]] = None):
+        """Discover new potential phoenix tokens on every configured chain concurrently"""
+        chains = chains or get_discovery_chains()
+        logger.info(f"Discovering phoenixes on {', '.join(chains)}")
+        
+        self._scored_batch = []
+        cycle_start = time.perf_counter()
         try:
-            # Focus on Solana as requested
-            logger.info(f"Discovering phoenixes on Solana")
-            
-            # Find crashed tokens with proper volume and liquidity filters
-            potential_phoenixes = await self.dex_service.find_crashed_tokens(
-                chain="solana", 
-                min_liquidity=5000,  # Keep liquidity lower to find more tokens
-                min_volume=50000     # 50k minimum volume as requested
+            results = await asyncio.gather(
+                *(self._discover_chain(chain) for chain in chains),
+                return_exceptions=True
             )
-            
-            logger.info(f"Found {len(potential_phoenixes)} potential phoenix tokens")
-            
-            for token_data in potential_phoenixes:
-                address = token_data.get("baseToken", {}).get("address")
-                if address:
-                    # Check if market cap meets requirement
-                    parsed = self.dex_service.parse_token_data(token_data)
-                    market_cap = parsed.get("market_cap", 0)
-                    
-                    if market_cap >= 500000:  # 500k minimum market cap
-                        logger.info(f"Updating token {parsed.get('symbol')} - MC: ${market_cap:,.0f}")
-                        await self.update_token_data(address)
+            for chain, result in zip(chains, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error discovering phoenixes on {chain}: {result}")
+        finally:
+            scored, self._scored_batch = self._scored_batch, None
+            self.create_alerts(scored)
+            DISCOVERY_STAGE_SECONDS.observe(time.perf_counter() - cycle_start, stage="cycle", chain="all")
+    
+    async def _discover_chain(self, chain: str):
+        """
+        Discover and refresh phoenix candidates for a single chain as a streaming pipeline
+        
+        Search results feed a bounded queue of addresses, a pool of fetch workers
+        (the chain's max_concurrency) refreshes whatever is queued as one batch
+        into a second bounded queue, and one writer scores and persists them on
+        the shared session. Tokens with a known pair share batched lookups.
+        Feed polls only return new or changed tokens, so with feed discovery
+        the tokens already on the chain's leaderboard are queued as well.
+        Stages overlap, so a cycle takes about as long as its slowest stage; a
+        full queue pauses the stage feeding it.
+        """
+        fetch_queue: asyncio.Queue = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+        persist_queue: asyncio.Queue = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+        
+        queued = set()
+        
+        async def search():
+            # Liquidity, volume, market cap and price pattern are all checked by DISCOVERY_FILTER
+            async for pair in self.dex_service.iter_potential_phoenixes(chain, DISCOVERY_FILTER):
+                if pair.address in queued:
+                    continue
+                queued.add(pair.address)
+                token_log.info("Updating token %s - MC: $%.0f", pair.symbol, pair.market_cap)
+                await fetch_queue.put(pair.address)
+        
+        async def refresh_tracked(addresses: List[str]):
+            for address in addresses:
+                if address not in queued:
+                    queued.add(address)
+                    await fetch_queue.put(address)
+        
+        async def fetch():
+            done = False
+            while not done:
+                # Take whatever else is already queued so known pairs share one batched lookup
+                batch = []
+                address = await fetch_queue.get()
+                while address is not None:
+                    batch.append(address)
+                    if len(batch) >= PAIRS_BATCH_SIZE or fetch_queue.empty():
+                        break
+                    address = fetch_queue.get_nowait()
+                done = address is None
+                if batch:
+                    async for item in self._iter_token_data(batch, chain):
+                        await persist_queue.put(item)
+        
+        async def persist():
+            # Stores never yield mid-write, so writers of different chains cannot interleave on self.db
+            while (item := await persist_queue.get()) is not None:
+                await self._store_token_data(*item, chain)
+        
+        if not pair_resolver.loaded:
+            pair_resolver.load(self.db)
+        tracked = self._tracked_addresses(chain) if self.dex_service.discovery_source != "search" else []
+        fetchers = [asyncio.create_task(fetch()) for _ in range(get_chain_config(chain)["max_concurrency"])]
+        writer = asyncio.create_task(persist())
+        refresher = asyncio.create_task(refresh_tracked(tracked))
+        try:
+            swept = False
+            try:
+                await search()
+                swept = True
+            except asyncio.TimeoutError:
+                logger.error(f"Discovery sweep for {chain} timed out; keeping what arrived in time")
+            except Exception as e:
+                logger.error(f"Error searching phoenixes on {chain}: {e}")
+            await refresher
+            
+            # Drain: queued addresses are still refreshed, then each stage is told to stop
+            for _ in fetchers:
+                await fetch_queue.put(None)
+            await asyncio.gather(*fetchers)
+            await persist_queue.put(None)
+            await writer
+            pair_resolver.save(self.db)
+            
+            if swept:
+                self.dex_service.commit_feed(chain)
                         
         except Exception as e:
-            logger.error(f"Error discovering phoenixes: {e}")
+            logger.error(f"Error discovering phoenixes on {chain}: {e}")
+        finally:
+            for task in (*fetchers, writer, refresher):
+                task.cancel()
+    
+    def _tracked_addresses(self, chain: str) -> List[str]:
+        """Addresses on the chain's leaderboard, least recently scored first, up to its refresh_limit"""
+        try:
+            rows = self.db.query(LeaderboardEntry.token_address).filter(
+                LeaderboardEntry.chain == chain
+            ).order_by(LeaderboardEntry.updated_at).limit(get_chain_config(chain)["refresh_limit"]).all()
+            return [address for address, in rows]
+        except Exception as e:
+            logger.error(f"Error loading tracked tokens on {chain}: {e}")
+            self.db.rollback()
+            return []
     
     async def add_to_watchlist(self, token_address: str, user_id: str = "default", 
                               alert_threshold: float = 80.0) -> bool:
         """Add token to watchlist"""
         try:
-            # Check if already in watchlist
-            existing = self.db.query(Watchlist).filter(
-                and_(
-                    Watchlist.token_address == token_address,
-                    Watchlist.user_id == user_id,
-                    Watchlist.active == True
-                )
-            ).first()
-            
-            if existing:
-                return False
-            
-            # Add to watchlist
-            watchlist_item = Watchlist(
-                token_address=token_address,
-                user_id=user_id,
-                alert_threshold=alert_threshold
-            )
-            
-            self.db.add(watchlist_item)
-            self.db.commit()
-            
-            return True
+            return alert_engine.add_watch(self.db, token_address, user_id, alert_threshold)
             
         except Exception as e:
             logger.error(f"Error adding to watchlist: {e}")
             self.db.rollback()
             return False
     
+    def get_alerts_version(self) -> str:
+        """Changes whenever an alert is created or marked sent, in or between discovery cycles"""
+        try:
+            newest, sent = self.db.query(
+                func.max(Alert.id), func.count(Alert.id).filter(Alert.sent_status == True)
+            ).one()
+            return f"{newest or 0}.{sent}"
+        except Exception as e:
+            logger.error(f"Error reading alerts version: {e}")
+            return "0.0"
+    
     async def get_recent_alerts(self, limit: int = 10) -> List[Dict]:
         """Get recent alerts"""
         try: